@@ -2,6 +2,7 @@
 Django settings for config project.
 """
 import dj_database_url
+import json
 import os
 from pathlib import Path
 
@@ -158,3 +159,34 @@ STRIPE_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET", "").strip()
 
 # Strip trailing slashes to prevent url errors
 DOMAIN_URL = os.environ.get("DOMAIN_URL", "https://martechjobs.io").strip().rstrip('/')
+
+# ==============================================
+# INGESTION
+# ==============================================
+# SerpAPI result cache lifetime per caller, in hours (0 disables caching for that caller).
+SERPAPI_CACHE_TTLS = {
+    "hunt": float(os.environ.get("SERPAPI_CACHE_TTL_HUNT", 20)),
+    "logos": float(os.environ.get("SERPAPI_CACHE_TTL_LOGOS", 24 * 30)),
+}
+
+# Feeds polled by fetch_rss while the RssFeed table is empty (add rows in the admin to take over).
+RSS_FEEDS = [
+    {"name": "WeWorkRemotely", "url": "https://weworkremotely.com/categories/remote-marketing-jobs.rss", "tag": "WWR"},
+    {"name": "Remotive", "url": "https://remotive.com/remote-jobs/marketing/feed", "tag": "Remotive"},
+    {"name": "RemoteOK", "url": "https://remoteok.com/remote-marketing-jobs.rss", "tag": "RemoteOK"},
+]
+
+# Per-host politeness for the crawlers (jobs.http.HostScheduler): sustained requests/second
+# and burst size. Keys match the host or any parent domain; "default" covers everything else.
+# Override or extend with a JSON object in the CRAWL_HOST_LIMITS environment variable.
+CRAWL_HOST_LIMITS = {
+    "default": {"rate": 2.0, "burst": 5},
+    "serpapi.com": {"rate": 1.0, "burst": 1},
+    "greenhouse.io": {"rate": 5.0, "burst": 10},
+    "lever.co": {"rate": 5.0, "burst": 10},
+    "ashbyhq.com": {"rate": 5.0, "burst": 10},
+    "smartrecruiters.com": {"rate": 5.0, "burst": 10},
+    "workable.com": {"rate": 2.0, "burst": 5},
+    "logo.clearbit.com": {"rate": 5.0, "burst": 5},
+}
+CRAWL_HOST_LIMITS.update(json.loads(os.environ.get("CRAWL_HOST_LIMITS", "{}")))
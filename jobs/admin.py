@@ -5,7 +5,7 @@ from django.db.models import Count, Q
 from django.contrib import messages
 
 # Import all models
-from .models import Job, Tool, Category, Subscriber, BlockRule, UserSubmission, ActiveJob, BlogPost
+from .models import Job, Tool, Category, Subscriber, BlockRule, UserSubmission, ActiveJob, BlogPost, AtsBoard, FetchRun, RssFeed, IngestReport, ScreeningLabel
 from .emails import send_job_alert, send_digest_alert 
 
 # --- 1. GLOBAL ACTIONS ---
@@ -109,11 +109,20 @@ class BaseJobAdmin(admin.ModelAdmin):
     posted_date.short_description = "Posted"
     posted_date.admin_order_field = "created_at"
 
+    def record_labels(self, jobs, status):
+        # Review decisions become pre-classifier training labels (ScreeningLabel).
+        for job in jobs: ScreeningLabel.record(job.title, job.company, job.description, status, source="review")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "screening_status" in form.changed_data: self.record_labels([obj], obj.screening_status)
+
     @admin.action(description="📨 Send DIGEST Email")
     def send_digest(self, request, qs):
         jobs = list(qs.order_by('-created_at'))
         if not jobs: return
         qs.update(screening_status="approved", is_active=True)
+        self.record_labels(jobs, "approved")
         send_digest_alert(jobs)
         self.message_user(request, f"✅ Sent DIGEST with {len(jobs)} jobs.", messages.SUCCESS)
 
@@ -123,10 +132,13 @@ class BaseJobAdmin(admin.ModelAdmin):
         for job in qs:
             if job.screening_status != 'approved':
                 job.screening_status = "approved"; job.is_active = True; job.save(); send_job_alert(job)
+        self.record_labels(qs, "approved")
         self.message_user(request, f"✅ Approved {qs.count()} jobs.", messages.SUCCESS)
 
     @admin.action(description="❌ Reject")
-    def mark_rejected(self, request, qs): qs.update(screening_status="rejected", is_active=False)
+    def mark_rejected(self, request, qs):
+        self.record_labels(qs, "rejected")
+        qs.update(screening_status="rejected", is_active=False)
     @admin.action(description="⏳ Pending")
     def mark_pending(self, request, qs): qs.update(screening_status="pending", is_active=False)
     @admin.action(description="👁️ Visible")
@@ -160,4 +172,32 @@ class UserSubmissionAdmin(BaseJobAdmin):
 class SubscriberAdmin(admin.ModelAdmin): list_display = ("email", "created_at")
 
 @admin.register(BlockRule)
-class BlockRuleAdmin(admin.ModelAdmin): list_display = ("rule_type", "value", "enabled")
+class BlockRuleAdmin(admin.ModelAdmin):
+    list_display = ("rule_type", "value", "enabled", "hit_count", "last_hit_at")
+    list_filter = ("rule_type", "enabled")
+    readonly_fields = ("hit_count", "last_hit_at")
+
+@admin.register(AtsBoard)
+class AtsBoardAdmin(admin.ModelAdmin):
+    list_display = ("token", "source", "company", "is_active", "polls", "failed_polls", "postings", "approvals", "poll_interval_hours", "last_polled", "next_poll_at")
+    list_filter = ("source", "is_active")
+    search_fields = ("token", "company")
+    list_editable = ("is_active",)
+    readonly_fields = ("first_seen", "last_seen", "last_polled", "last_changed")
+
+@admin.register(FetchRun)
+class FetchRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "command", "status", "jobs_added", "resumes", "started_at", "finished_at")
+    list_filter = ("command", "status")
+    readonly_fields = ("started_at", "updated_at", "finished_at")
+
+@admin.register(RssFeed)
+class RssFeedAdmin(admin.ModelAdmin):
+    list_display = ("name", "url", "tag", "is_active")
+    list_editable = ("is_active",)
+
+@admin.register(IngestReport)
+class IngestReportAdmin(admin.ModelAdmin):
+    list_display = ("command", "started_at", "wall_seconds", "fetch_run")
+    list_filter = ("command",)
+    readonly_fields = ("command", "started_at", "finished_at", "wall_seconds", "report", "fetch_run")
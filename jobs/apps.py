@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class JobsConfig(AppConfig):
     name = 'jobs'
+
+    def ready(self):
+        # Registers the BlockRule save/delete handlers that invalidate the compiled blocklist.
+        from jobs import blocklist  # noqa: F401
@@ -0,0 +1,126 @@
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from jobs.keywords import KeywordMatcher
+from jobs.models import BlockRule
+
+logger = logging.getLogger("blocklist")
+
+# Rebuild at least this often, so processes that didn't see the admin save catch up.
+MAX_AGE = 300
+
+
+def _domain(value):
+    value = (value or "").strip().lower()
+    host = urlparse(value if "//" in value else f"//{value}").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class BlockList:
+    """
+    Every enabled BlockRule compiled into one in-memory matcher:
+    - domain: the apply URL's host or any parent domain is in a set (suffix lookups),
+    - company: the normalized company name is in a set,
+    - keyword: one KeywordMatcher over title, company and description,
+    - regex: precompiled (case-insensitive) over the same text.
+    match() returns the first rule hit; hits are tallied in memory and flushed to
+    BlockRule.hit_count / last_hit_at by flush_hits().
+    """
+
+    def __init__(self, rules):
+        self.domains, self.companies, self.keywords, self.regexes = {}, {}, {}, []
+        for rule in rules:
+            if rule.rule_type == "domain":
+                if _domain(rule.value): self.domains.setdefault(_domain(rule.value), rule)
+            elif rule.rule_type == "company":
+                self.companies.setdefault(self.normalize(rule.value), rule)
+            elif rule.rule_type == "keyword":
+                self.keywords.setdefault(rule.value.strip().lower(), rule)
+            elif rule.rule_type == "regex":
+                try:
+                    self.regexes.append((re.compile(rule.value, re.IGNORECASE), rule))
+                except re.error as e:
+                    logger.warning(f"Skipping invalid BlockRule regex {rule.value!r}: {e}")
+        self.keyword_matcher = KeywordMatcher(self.keywords)
+        self.built_at = time.monotonic()
+        self.hits = Counter()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text):
+        return " ".join((text or "").split()).lower()
+
+    def __len__(self):
+        return len(self.domains) + len(self.companies) + len(self.keywords) + len(self.regexes)
+
+    def match(self, title="", company="", description="", url=""):
+        """
+        The first BlockRule the posting trips (domain, company, keyword, regex), or None.
+        """
+        rule = self._find(title, company, description, url)
+        if rule:
+            with self.lock: self.hits[rule.pk] += 1
+        return rule
+
+    def _find(self, title, company, description, url):
+        if self.domains and url:
+            labels = _domain(url).split(".")
+            for i in range(len(labels) - 1):
+                rule = self.domains.get(".".join(labels[i:]))
+                if rule: return rule
+        if self.companies:
+            rule = self.companies.get(self.normalize(company))
+            if rule: return rule
+        if not self.keywords and not self.regexes: return None
+        text = f"{title or ''}\n{company or ''}\n{description or ''}"
+        hit = self.keyword_matcher.search(text)
+        if hit: return self.keywords[hit]
+        for regex, rule in self.regexes:
+            if regex.search(text): return rule
+        return None
+
+    def flush_hits(self):
+        """
+        Adds the hits counted since the last flush to BlockRule.hit_count.
+        """
+        with self.lock:
+            hits, self.hits = self.hits, Counter()
+        now = timezone.now()
+        for pk, n in hits.items():
+            BlockRule.objects.filter(pk=pk).update(hit_count=F('hit_count') + n, last_hit_at=now)
+        return hits
+
+
+_blocklist = None
+_build_lock = threading.Lock()
+
+
+def get_blocklist():
+    """
+    The process-wide BlockList, rebuilt after a BlockRule save/delete or MAX_AGE seconds.
+    """
+    global _blocklist
+    with _build_lock:
+        if _blocklist is None or time.monotonic() - _blocklist.built_at > MAX_AGE:
+            if _blocklist is not None: _blocklist.flush_hits()
+            _blocklist = BlockList(BlockRule.objects.filter(enabled=True))
+        return _blocklist
+
+
+@receiver([post_save, post_delete], sender=BlockRule)
+def invalidate(**kwargs):
+    global _blocklist
+    with _build_lock:
+        # Keep the counted hits: flush them before dropping the old matcher.
+        if _blocklist is not None:
+            stale, _blocklist = _blocklist, None
+            stale.flush_hits()
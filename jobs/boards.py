@@ -0,0 +1,75 @@
+from django.utils import timezone
+
+from jobs.models import AtsBoard, Job
+
+
+def board_company(source, token):
+    """
+    Company name stamped on a board's jobs. Workday tokens are "<host>/<site>", whose
+    host starts with the tenant.
+    """
+    if source == "workday": token = token.split(".")[0]
+    return token.capitalize()
+
+
+def tracked_board_keys():
+    """
+    (tags, company) pairs of jobs whose board is polled and whose last poll succeeded.
+    Those are closed by board diff, so per-URL dead-link probing can skip them. A board
+    that is failing (404/410, errors) never gets diffed, so its jobs are probed again.
+    """
+    return {(b.get_source_display(), b.company) for b in AtsBoard.objects.filter(is_active=True, failed_polls=0)}
+
+
+class BoardRegistry:
+    """
+    In-run view of the AtsBoard table. Search results register boards (discover),
+    fetch_jobs asks is_due() before fetching one, and record_poll() stores the outcome
+    and yield of every fetch so the next poll is scheduled adaptively.
+    """
+
+    def __init__(self):
+        self.boards = {}
+        self.seen = set()
+        self.discovered = 0
+
+    def load(self):
+        self.boards = {(b.source, b.token): b for b in AtsBoard.objects.all()}
+        return self
+
+    def discover(self, source, token):
+        key = (source, token)
+        if key in self.seen: return self.boards[key]
+        self.seen.add(key)
+        board = self.boards.get(key)
+        if board is None:
+            board = AtsBoard.objects.create(source=source, token=token, company=board_company(source, token))
+            self.boards[key] = board
+            self.discovered += 1
+        else:
+            board.last_seen = timezone.now()
+            board.save(update_fields=["last_seen"])
+        return board
+
+    def is_due(self, source, token):
+        board = self.boards.get((source, token))
+        return board is None or (board.is_active and board.next_poll_at <= timezone.now())
+
+    def due_boards(self):
+        now = timezone.now()
+        boards = [b for b in self.boards.values() if b.is_active and b.next_poll_at <= now]
+        return [(b.source, b.token) for b in sorted(boards, key=lambda b: b.next_poll_at)]
+
+    def record_poll(self, source, token, changed, postings=0, approvals=0, available=True):
+        board = self.boards.get((source, token)) or self.discover(source, token)
+        board.record_poll(changed, postings, approvals, available)
+        board.save()
+
+    def close_unlisted(self, source, token, listed_urls):
+        """
+        Deactivates active jobs ingested from this board whose apply_url is no longer listed.
+        One bulk UPDATE; returns the number of jobs closed.
+        """
+        board = self.boards.get((source, token)) or self.discover(source, token)
+        stale = Job.objects.filter(is_active=True, tags=board.get_source_display(), company=board.company).exclude(apply_url__in=listed_urls)
+        return stale.update(is_active=False, screening_status='rejected', screening_reason="Auto-Removed: No longer listed on ATS board", updated_at=timezone.now())
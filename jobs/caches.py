@@ -0,0 +1,171 @@
+import json
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.models import FetchState, ScreeningVerdict, SearchResult
+
+
+def content_hash(body):
+    if isinstance(body, str): body = body.encode("utf-8")
+    return hashlib.sha256(body or b"").hexdigest()
+
+
+class ConditionalCache:
+    """
+    Conditional-GET memory for polled endpoints, backed by FetchState.
+
+    1. prime(urls) loads stored validators in one query (required before async fetches).
+    2. headers_for(url) returns If-None-Match / If-Modified-Since headers for the request.
+    3. is_unchanged(url, ...) is True on a 304 or an identical body hash.
+    4. commit(url) persists the new validators once the body has been fully processed,
+       so a run that dies mid-board never marks that board as seen.
+    With force=True no conditional headers are sent and nothing counts as unchanged.
+    """
+
+    def __init__(self, force=False):
+        self.force = force
+        self.states = {}
+        self.pending = {}
+        self.unchanged = 0
+        self.changed = 0
+
+    def prime(self, urls):
+        missing = [u for u in urls if u not in self.states]
+        if not missing: return
+        found = {s.url: s for s in FetchState.objects.filter(url__in=missing)}
+        for url in missing:
+            self.states[url] = found.get(url)
+
+    def headers_for(self, url):
+        if self.force: return {}
+        self.prime([url])
+        state = self.states.get(url)
+        headers = {}
+        if state and state.etag: headers["If-None-Match"] = state.etag
+        if state and state.last_modified: headers["If-Modified-Since"] = state.last_modified
+        return headers
+
+    def is_unchanged(self, url, status_code, headers, body):
+        self.prime([url])
+        state = self.states.get(url)
+        now = timezone.now()
+        if status_code == 304 and state and not self.force:
+            self._save(url, checked_at=now)
+            self.unchanged += 1
+            return True
+        if status_code != 200:
+            return False
+
+        body_hash = content_hash(body)
+        validators = {"etag": headers.get("ETag", ""), "last_modified": headers.get("Last-Modified", ""), "content_hash": body_hash, "checked_at": now}
+        if state and state.content_hash == body_hash and not self.force:
+            self._save(url, **validators)
+            self.unchanged += 1
+            return True
+        self.pending[url] = dict(validators, changed_at=now)
+        self.changed += 1
+        return False
+
+    def commit(self, url):
+        validators = self.pending.pop(url, None)
+        if validators: self._save(url, **validators)
+
+    def _save(self, url, **fields):
+        state, _ = FetchState.objects.update_or_create(url=url, defaults=fields)
+        self.states[url] = state
+
+    def summary(self):
+        return f"{self.unchanged} unchanged, {self.changed} changed"
+
+
+class SearchCache:
+    """
+    Persistent SerpAPI cache. Entries are keyed by the normalized query plus the
+    result-shaping params (tbs, num, gl) and live for the caller's TTL
+    (settings.SERPAPI_CACHE_TTLS, in hours).
+    """
+    KEY_PARAMS = ("tbs", "num", "gl")
+
+    def __init__(self, caller, ttl_hours=None):
+        self.caller = caller
+        if ttl_hours is None: ttl_hours = settings.SERPAPI_CACHE_TTLS.get(caller, 24)
+        self.ttl = timedelta(hours=ttl_hours)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def make_key(cls, query, params):
+        normalized = " ".join((query or "").split()).lower()
+        keyed = {k: str(params.get(k, "")) for k in cls.KEY_PARAMS}
+        return content_hash(json.dumps([normalized, keyed], sort_keys=True))
+
+    def get(self, query, params):
+        """
+        Returns the cached organic_results list, or None on a miss/expired entry.
+        """
+        if self.ttl.total_seconds() > 0:
+            entry = SearchResult.objects.filter(key=self.make_key(query, params), expires_at__gt=timezone.now()).first()
+            if entry:
+                self.hits += 1
+                return entry.results
+        self.misses += 1
+        return None
+
+    def set(self, query, params, results):
+        if self.ttl.total_seconds() <= 0: return
+        now = timezone.now()
+        SearchResult.objects.update_or_create(key=self.make_key(query, params), defaults={
+            "caller": self.caller, "query": query, "params": {k: params.get(k) for k in self.KEY_PARAMS},
+            "results": results, "fetched_at": now, "expires_at": now + self.ttl,
+        })
+
+    def summary(self):
+        total = self.hits + self.misses
+        ratio = (100.0 * self.hits / total) if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({ratio:.0f}% hit rate, {self.hits} API calls saved)"
+
+
+class VerdictCache:
+    """
+    Persistent LLM screening verdicts (ScreeningVerdict). The key hashes the prompt
+    version with the normalized title, company and the description text the prompt
+    actually carries (snippet(description), i.e. the compacted description), so a
+    posting reached again through another board, feed or repost is screened once per
+    prompt version, and edits the prompt never sees don't cost another call.
+    """
+
+    def __init__(self, prompt_version, snippet):
+        self.prompt_version = prompt_version
+        self.snippet = snippet
+        self.memo = {}
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, title, company, description):
+        norm = lambda text: " ".join((text or "").split()).lower()
+        return content_hash(json.dumps([self.prompt_version, norm(title), norm(company), norm(self.snippet(description))]))
+
+    def get(self, title, company, description):
+        """
+        Returns the cached verdict dict (status, score, reason, signals), or None.
+        """
+        key = self.make_key(title, company, description)
+        if key not in self.memo:
+            self.memo[key] = ScreeningVerdict.objects.filter(key=key).values('status', 'score', 'reason', 'signals').first()
+        verdict = self.memo[key]
+        if verdict: self.hits += 1
+        else: self.misses += 1
+        return verdict
+
+    def set(self, title, company, description, status, score, reason, signals):
+        key = self.make_key(title, company, description)
+        verdict = {"status": status, "score": score, "reason": reason, "signals": signals}
+        ScreeningVerdict.objects.update_or_create(key=key, defaults=dict(
+            verdict, prompt_version=self.prompt_version, title=(title or "")[:200], company=(company or "")[:200]))
+        self.memo[key] = verdict
+
+    def summary(self):
+        return f"{self.hits} cached, {self.misses} sent to the LLM"
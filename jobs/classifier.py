@@ -0,0 +1,168 @@
+import re
+import html
+import zlib
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from jobs.models import ScreeningModel
+
+logger = logging.getLogger("classifier")
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[.+#-][a-z0-9]+)*")
+TAGS = re.compile(r"<[^>]+>")
+DESCRIPTION_CHARS = 5000
+
+
+def tokens(title, company, description):
+    """
+    Unigrams and bigrams per field, prefixed with the field so "adobe" in the title
+    and "adobe" as the company are different features.
+    """
+    out = []
+    text = html.unescape(TAGS.sub(" ", html.unescape(description or "")[:DESCRIPTION_CHARS]))
+    for prefix, value in (("t", title), ("c", company), ("d", text)):
+        words = TOKEN.findall((value or "").lower())
+        out.extend(f"{prefix}:{w}" for w in words)
+        out.extend(f"{prefix}:{a}_{b}" for a, b in zip(words, words[1:]))
+    return out
+
+
+def hashed_counts(docs, dim):
+    """
+    CSR arrays (indptr, indices, counts) of hashed token counts, one row per
+    (title, company, description) doc. crc32 keeps the hashing stable across processes.
+    """
+    indptr, indices, counts = [0], [], []
+    for doc in docs:
+        row = {}
+        for tok in tokens(*doc):
+            h = zlib.crc32(tok.encode("utf-8")) % dim
+            row[h] = row.get(h, 0) + 1
+        indices.extend(row.keys())
+        counts.extend(row.values())
+        indptr.append(len(indices))
+    return np.array(indptr, dtype=np.int64), np.array(indices, dtype=np.int64), np.array(counts, dtype=np.float32)
+
+
+class PreClassifier:
+    """
+    Hashed TF-IDF + logistic regression over title, company and description, trained
+    on stored screening outcomes (train_screener). predict() gives P(approved);
+    tier() turns that into "approved" / "rejected" when it is outside the uncertain
+    band [reject_below, approve_above], else None (ask the LLM).
+    """
+
+    def __init__(self, weights, bias, idf, approve_above=1.01, reject_below=-0.01):
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+        self.dim = len(weights)
+        self.approve_above = approve_above
+        self.reject_below = reject_below
+
+    @staticmethod
+    def _rows(indptr):
+        return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+    @classmethod
+    def tfidf(cls, indptr, indices, counts, idf):
+        # Sublinear tf, idf weighting, then L2-normalized rows.
+        data = (1.0 + np.log(counts)) * idf[indices]
+        rows = cls._rows(indptr)
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(indptr) - 1))
+        return data / np.maximum(norms, 1e-12)[rows]
+
+    def _scores(self, indptr, indices, data):
+        return np.bincount(self._rows(indptr), weights=data * self.weights[indices], minlength=len(indptr) - 1) + self.bias
+
+    def predict_many(self, docs):
+        indptr, indices, counts = hashed_counts(docs, self.dim)
+        return 1.0 / (1.0 + np.exp(-self._scores(indptr, indices, self.tfidf(indptr, indices, counts, self.idf))))
+
+    def predict(self, title, company, description):
+        return float(self.predict_many([(title, company, description)])[0])
+
+    def tier(self, probability):
+        if probability >= self.approve_above: return "approved"
+        if probability <= self.reject_below: return "rejected"
+        return None
+
+    @classmethod
+    def train(cls, docs, labels, dim=2 ** 18, epochs=300, lr=0.1, l2=1e-4):
+        """
+        Full-batch Adam on the class-balanced log loss. labels: 1 approved, 0 rejected.
+        """
+        y = np.asarray(labels, dtype=np.float64)
+        indptr, indices, counts = hashed_counts(docs, dim)
+        n = len(y)
+        df = np.bincount(indices, minlength=dim)
+        idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        data = cls.tfidf(indptr, indices, counts, idf)
+        rows = cls._rows(indptr)
+        pos = max(y.sum(), 1.0)
+        sample_w = np.where(y == 1, n / (2 * pos), n / (2 * max(n - pos, 1.0)))
+
+        model = cls(np.zeros(dim), 0.0, idf)
+        m, v, mb, vb = np.zeros(dim), np.zeros(dim), 0.0, 0.0
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        for t in range(1, epochs + 1):
+            p = 1.0 / (1.0 + np.exp(-model._scores(indptr, indices, data)))
+            err = (p - y) * sample_w / n
+            grad = np.bincount(indices, weights=data * err[rows], minlength=dim) + l2 * model.weights
+            grad_b = err.sum()
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad * grad
+            mb = beta1 * mb + (1 - beta1) * grad_b
+            vb = beta2 * vb + (1 - beta2) * grad_b * grad_b
+            scale = lr * np.sqrt(1 - beta2 ** t) / (1 - beta1 ** t)
+            model.weights -= scale * m / (np.sqrt(v) + eps)
+            model.bias -= scale * mb / (np.sqrt(vb) + eps)
+        model.weights = model.weights.astype(np.float32)
+        return model
+
+    def save(self, **fields):
+        ScreeningModel.objects.filter(is_active=True).update(is_active=False)
+        return ScreeningModel.objects.create(
+            dim=self.dim, weights=self.weights.astype(np.float32).tobytes(), idf=self.idf.astype(np.float32).tobytes(),
+            bias=float(self.bias), approve_above=self.approve_above, reject_below=self.reject_below, is_active=True, **fields)
+
+    @classmethod
+    def load_active(cls):
+        """
+        The active stored model, or None (no model trained yet, or NumPy not installed).
+        """
+        if np is None: return None
+        row = ScreeningModel.objects.filter(is_active=True).order_by('-created_at').first()
+        if not row: return None
+        return cls(np.frombuffer(row.weights, dtype=np.float32), row.bias, np.frombuffer(row.idf, dtype=np.float32), row.approve_above, row.reject_below)
+
+
+def precision_recall(y_true, y_pred, positive):
+    tp = sum(1 for t, p in zip(y_true, y_pred) if p == positive and t == positive)
+    predicted = sum(1 for p in y_pred if p == positive)
+    actual = sum(1 for t in y_true if t == positive)
+    return (tp / predicted if predicted else 0.0), (tp / actual if actual else 0.0)
+
+
+def pick_thresholds(probs, labels, target_precision):
+    """
+    The widest approve/reject bands whose decisions still reach target_precision:
+    approve_above is the lowest cut (never below 0.5) where P(approved) >= cut is
+    right that often, reject_below the highest cut (never above 0.5) where
+    P(approved) <= cut is. A band that can't reach the target stays closed.
+    """
+    order = sorted(zip(probs, labels), reverse=True)
+    approve_above, hits = 1.01, 0
+    for k, (p, y) in enumerate(order, 1):
+        hits += y
+        if p >= 0.5 and hits / k >= target_precision: approve_above = p
+    order.reverse()
+    reject_below, hits = -0.01, 0
+    for k, (p, y) in enumerate(order, 1):
+        hits += 1 - y
+        if p < 0.5 and hits / k >= target_precision: reject_below = p
+    return approve_above, reject_below
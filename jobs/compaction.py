@@ -0,0 +1,162 @@
+import re
+import html
+import threading
+
+from jobs.keywords import KeywordMatcher
+
+# Block-level tags become line breaks so section headings survive tag stripping.
+BLOCK_TAGS = re.compile(r"<\s*/?\s*(?:p|div|br|li|ul|ol|tr|table|section|h[1-6])\b[^>]*>", re.IGNORECASE)
+H_TAG = re.compile(r"<\s*h[1-6]\b[^>]*>", re.IGNORECASE)
+# A block that is nothing but one <strong>/<b> run is a heading too ("<p><b>Benefits</b></p>").
+BOLD_BLOCK = re.compile(r"\s*<\s*(strong|b)\b[^>]*>(?:(?!<\s*/?\s*\1\b).)*<\s*/\s*\1\s*>\s*", re.IGNORECASE | re.DOTALL)
+NOISE = re.compile(r"<\s*(script|style)\b.*?<\s*/\s*\1\s*>", re.IGNORECASE | re.DOTALL)
+TAGS = re.compile(r"<[^>]+>")
+SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(•·*-])|\s+[•·▪]\s+")
+HEADING_MARK = "\x00"
+
+# Sections that never help decide whether a role is MarTech.
+BOILERPLATE_SECTIONS = re.compile(
+    r"^(?:(?:our |the )?benefits|perks|(?:what|why) we offer|what you(?:'ll)? get|why (?:join|work)|compensation(?: and benefits)?|"
+    r"pay transparency|salary (?:range|transparency)|equal (?:employment )?opportunity|eeo|diversity(?:,| and| &)? (?:equity|inclusion)|"
+    r"accommodations?|privacy|(?:applicant |candidate )?privacy notice|e-verify|life at)\b",
+    re.IGNORECASE)
+# Dropped from descriptions too, but on a scraped page they are often the only place naming the company.
+COMPANY_SECTIONS = re.compile(r"^(?:about us|about the company|who we are)\b", re.IGNORECASE)
+# "Location: Boston, MA", "Company: Acme": short labelled facts a scraped page lists up top.
+LABEL_LINE = re.compile(r"^[A-Z][\w&/ .()-]{0,30}:\s+\S")
+BOILERPLATE_SENTENCES = re.compile(
+    r"equal opportunity employer|without regard to|race, colou?r|sexual orientation|gender identity|protected veteran|"
+    r"reasonable accommodations?|e-verify|privacy (?:notice|policy)|pay transparency|401\(?k\)?|paid time off|parental leave|"
+    r"medical, dental|dental,? (?:and )?vision|cookies?|fraudulent (?:job )?offers|recruiting scams",
+    re.IGNORECASE)
+
+
+def estimate_tokens(text):
+    """
+    Rough token count (~4 characters per token), the same scale the API bills.
+    """
+    return (len(text or "") + 3) // 4
+
+
+def strip_markup(text):
+    """
+    Visible text with one line per block; headings (<h*>, or a block that is all
+    <strong>/<b>) are prefixed with HEADING_MARK.
+    """
+    text = NOISE.sub(" ", html.unescape(text or ""))
+    lines = []
+    for block in BLOCK_TAGS.sub(lambda m: f"\n{HEADING_MARK}" if H_TAG.match(m.group(0)) else "\n", text).split("\n"):
+        heading = block.startswith(HEADING_MARK) or bool(BOLD_BLOCK.fullmatch(block))
+        for line in html.unescape(TAGS.sub(" ", block.lstrip(HEADING_MARK))).split("\n"):
+            line = " ".join(line.split())
+            if line: lines.append(HEADING_MARK + line if heading else line)
+    return lines
+
+
+def join_labels(lines):
+    """
+    Joins a bare "Label:" line to the short value line after it ("Location:" + "Boston, MA").
+    """
+    out = []
+    for line in lines:
+        prev = out[-1].lstrip(HEADING_MARK) if out else ""
+        if prev.endswith(":") and len(prev) <= 30 and len(line) <= 60 and not line.startswith(HEADING_MARK):
+            out[-1] = f"{prev} {line}"
+        else:
+            out.append(line)
+    return out
+
+
+class Compactor:
+    """
+    Shrinks a job description to a token budget before it goes into a prompt:
+    1. strip markup (scripts, styles, tags, entities),
+    2. drop boilerplate sections (benefits, EEO, privacy, about us...) and sentences,
+    3. dedupe repeated sentences,
+    4. if still over `budget` tokens, keep the first `lead` sentences plus the ones
+       naming the most keywords (tools, roles), in their original order,
+    and returns them one per line.
+    Token counts are tallied for summary() against what the prompt used to carry:
+    the first `baseline_chars` characters of the raw text.
+
+    With keep_header (scraped pages, where the prompt must also find the title, company
+    and location), the first `lead` lines and short "Label: value" lines are always kept
+    and picked first, and about-the-company sections are not dropped.
+    """
+
+    def __init__(self, keywords=(), budget=600, lead=3, baseline_chars=3000, keep_header=False):
+        self.matcher = KeywordMatcher(keywords)
+        self.budget = budget
+        self.lead = lead
+        self.baseline_chars = baseline_chars
+        self.keep_header = keep_header
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.lock = threading.Lock()
+
+    def sentences(self, text):
+        return [sentence for sentence, _ in self._sentences(text)]
+
+    def _sentences(self, text):
+        """
+        (sentence, pinned) pairs; pinned ones are header or label lines kept whole (keep_header).
+        """
+        lines, kept, skipping = strip_markup(text), [], False
+        if self.keep_header: lines = join_labels(lines)
+        for n, line in enumerate(lines):
+            bare = line.lstrip(HEADING_MARK)
+            pinned = self.keep_header and (n < self.lead or (len(bare) <= 80 and bool(LABEL_LINE.match(bare))))
+            if line.startswith(HEADING_MARK) or (len(line) <= 60 and line.endswith(":")):
+                title = bare.strip(" :")
+                skipping = bool(BOILERPLATE_SECTIONS.match(title) or (not self.keep_header and COMPANY_SECTIONS.match(title)))
+                # Headings only structure the page; keep one when it names a tool or role.
+                if not pinned and (skipping or not self.matcher.search(bare)): continue
+            if pinned or not skipping: kept.append((bare, pinned))
+        # Everything sat under a boilerplate heading (e.g. one "About us" on top): keep it all.
+        if not kept: kept = [(line.lstrip(HEADING_MARK), False) for line in lines]
+
+        out, seen = [], set()
+        for line, pinned in kept:
+            for sentence in [line] if pinned else SENTENCE.split(line):
+                sentence = sentence.strip(" •·▪")
+                key = re.sub(r"\W+", " ", sentence.lower()).strip()
+                if not key or key in seen or BOILERPLATE_SENTENCES.search(sentence): continue
+                seen.add(key)
+                out.append((sentence, pinned))
+        return out
+
+    def shrink(self, text, budget=None):
+        """
+        The compacted text alone, without counting it in summary().
+        """
+        budget = budget or self.budget
+        sentences = self._sentences(text)
+        if estimate_tokens("\n".join(s for s, _ in sentences)) > budget:
+            sentences = self._select(sentences, budget)
+        return "\n".join(s for s, _ in sentences)
+
+    def compact(self, text, budget=None):
+        compacted = self.shrink(text, budget)
+        with self.lock:
+            self.calls += 1
+            self.tokens_in += estimate_tokens((text or "")[:self.baseline_chars])
+            self.tokens_out += estimate_tokens(compacted)
+        return compacted
+
+    def _select(self, sentences, budget):
+        ranked = sorted(range(len(sentences)), key=lambda i: (
+            not sentences[i][1] and i >= self.lead, -len({kw for _, kw in self.matcher.find_all(sentences[i][0])}), i))
+        keep, used = set(), 0
+        for i in ranked:
+            cost = estimate_tokens(sentences[i][0]) + 1
+            if used + cost > budget: continue
+            keep.add(i)
+            used += cost
+        return [s for i, s in enumerate(sentences) if i in keep]
+
+    def summary(self):
+        if not self.calls: return "no prompts compacted"
+        saved = self.tokens_in - self.tokens_out
+        return (f"{self.calls} prompts, avg {self.tokens_in / self.calls:.0f} → {self.tokens_out / self.calls:.0f} description tokens, "
+                f"{saved / self.calls:.0f} saved per call ({saved / max(self.tokens_in, 1):.0%})")
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+class DedupeIndex:
+    """
+    In-memory duplicate check shared by the ingestion commands.
+    load() reads every stored apply_url plus the (title, company) pairs created in the
+    last `window_days` once per run; add() keeps it current as rows are inserted, so a
+    lookup is two set probes instead of two queries per posting.
+    """
+
+    def __init__(self, window_days=30):
+        self.window_days = window_days
+        self.urls = set()
+        self.keys = set()
+        self.skipped = 0
+
+    @staticmethod
+    def make_key(title, company):
+        return ((title or "").strip().lower(), (company or "").strip().lower())
+
+    def load(self):
+        self.urls = set(Job.objects.values_list('apply_url', flat=True))
+        since = timezone.now() - timedelta(days=self.window_days)
+        self.keys = {self.make_key(t, c) for t, c in Job.objects.filter(created_at__gte=since).values_list('title', 'company')}
+        return self
+
+    def has_url(self, url):
+        if url in self.urls:
+            self.skipped += 1
+            return True
+        return False
+
+    def is_duplicate(self, title, company, url):
+        if url in self.urls or self.make_key(title, company) in self.keys:
+            self.skipped += 1
+            return True
+        return False
+
+    def add(self, title, company, url):
+        self.urls.add(url)
+        self.keys.add(self.make_key(title, company))
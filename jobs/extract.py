@@ -0,0 +1,89 @@
+import re
+import json
+
+from bs4 import BeautifulSoup, CData, NavigableString
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+MAX_BYTES = 512 * 1024
+NOISE_TAGS = ["script", "style", "nav", "footer", "iframe", "noscript", "header", "form", "svg"]
+MAIN_SELECTORS = [("main", {}), (True, {"role": "main"}), ("article", {})]
+# What stripped_strings yields (no comments or doctypes), and the tags main_text(lines=True) breaks on.
+TEXT_TYPES = (NavigableString, CData)
+BLOCK_TAGS = {"p", "div", "br", "li", "dt", "dd", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "ul", "ol", "table"}
+
+
+def read_capped(resp, max_bytes=MAX_BYTES):
+    """
+    Reads a streamed response (stream=True) until max_bytes and closes it, so a huge
+    page never downloads past what extraction needs. Returns decoded text.
+    """
+    chunks, size = [], 0
+    try:
+        for chunk in resp.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes: break
+    finally:
+        resp.close()
+    return b"".join(chunks)[:max_bytes].decode(resp.encoding or "utf-8", errors="replace")
+
+
+def main_text(html, limit=4000, min_chars=250, lines=False):
+    """
+    Whitespace-collapsed visible text of the page's main content (<main>, role=main,
+    <article>), falling back to <body> when that is shorter than min_chars.
+    With lines=True every block element (paragraph, heading, list item, cell) starts
+    a new line. Stops collecting once `limit` characters are gathered.
+    """
+    soup = BeautifulSoup(html, PARSER)
+    for tag in soup(NOISE_TAGS): tag.decompose()
+    candidates = [soup.find(name, attrs=attrs) for name, attrs in MAIN_SELECTORS] + [soup.body, soup]
+    text = ""
+    for node in candidates:
+        if node is None: continue
+        text = _collect(node, limit, lines)
+        if len(text) >= min_chars: break
+    return text
+
+
+def _collect(node, limit, lines=False):
+    parts, size = [""], 0
+    for el in node.descendants:
+        if lines and getattr(el, "name", None) in BLOCK_TAGS:
+            if parts[-1]: parts.append("")
+            continue
+        if type(el) not in TEXT_TYPES: continue
+        s = " ".join(el.split())
+        if not s: continue
+        parts[-1] = f"{parts[-1]} {s}" if parts[-1] else s
+        size += len(s) + 1
+        if size >= limit: break
+    return "\n".join(p for p in parts if p)[:limit]
+
+
+LD_JSON = re.compile(r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.IGNORECASE | re.DOTALL)
+
+
+def job_posting_ld(html):
+    """
+    The first schema.org JobPosting embedded as JSON-LD (plain, list or @graph), or None.
+    """
+    for block in LD_JSON.findall(html or ""):
+        try:
+            data = json.loads(block.strip())
+        except ValueError:
+            continue
+        stack = data if isinstance(data, list) else [data]
+        while stack:
+            item = stack.pop(0)
+            if not isinstance(item, dict): continue
+            stack.extend(item.get("@graph") or [])
+            kind = item.get("@type")
+            if kind == "JobPosting" or (isinstance(kind, list) and "JobPosting" in kind):
+                return item
+    return None
@@ -0,0 +1,100 @@
+import re
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Parses the prompts MarTechScreener builds (single JOB CONTEXT or batched POSTING n blocks).
+TOOLS = re.compile(r"VALID TOOLS MENU:\s*\[(.*?)\]", re.DOTALL)
+POSTING = re.compile(r"(?:POSTING (\d+):|JOB CONTEXT:)\s*- Title: ([^\n]*)\n\s*- Company: ([^\n]*)\n\s*- Snippet: (.*?)(?=\n\s*POSTING \d+:|\n\s*✅ VALID TOOLS MENU|$)", re.DOTALL)
+
+
+class FakeLLM:
+    """
+    Deterministic stand-in for the chat completions endpoint, for exercising the
+    screener without an API key. Verdicts follow the prompt's own title rules: a menu
+    tool in the title approves (95), MOPs/MarTech titles approve (90), SEO/Social/Brand
+    titles reject, everything else is pending (65). drop_every=k leaves every k-th
+    posting of a batched prompt out of the answer, to exercise the single-call fallback.
+    throttle=n answers the first n requests with a 429 carrying Retry-After: retry_after,
+    to exercise the screener's backoff.
+    """
+
+    def __init__(self, latency=0.0, drop_every=0, throttle=0, retry_after=1):
+        self.latency = latency
+        self.drop_every = drop_every
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def verdict(self, title, snippet, tools):
+        t_low = title.lower()
+        stack = [t for t in tools if t.lower() in f"{t_low} {snippet.lower()}"]
+        if any(t.lower() in t_low for t in tools): return "APPROVE", 95, "Tool named in title.", stack
+        if any(k in t_low for k in ("marketing operations", "marketing ops", "martech")): return "APPROVE", 90, "Marketing operations role.", stack
+        if any(k in t_low for k in ("seo", "social", "brand")): return "REJECT", 0, "Non-technical marketing role.", stack
+        return "PENDING", 65, "No clear MarTech signal in the title.", stack
+
+    def answer(self, prompt):
+        match = TOOLS.search(prompt)
+        tools = [t.strip() for t in match.group(1).split(",") if t.strip()] if match else []
+        verdicts = []
+        for n, (pid, title, _company, snippet) in enumerate(POSTING.findall(prompt)):
+            if pid and self.drop_every and (n + 1) % self.drop_every == 0: continue
+            decision, score, reason, stack = self.verdict(title.strip(), snippet, tools)
+            verdicts.append({"id": int(pid or 0), "decision": decision, "score": score, "reason": reason, "signals": {"stack": stack, "role_type": "MOPs"}})
+        if "POSTING 0:" in prompt: return {"verdicts": verdicts}
+        return verdicts[0] if verdicts else {"decision": "PENDING", "score": 50, "reason": "No posting found."}
+
+    def rate_limited(self):
+        with self.lock:
+            if self.throttled >= self.throttle: return False
+            self.throttled += 1
+            return True
+
+    def completion(self, body):
+        with self.lock: self.requests += 1
+        if self.latency: time.sleep(self.latency)
+        prompt = "\n".join(m.get("content") or "" for m in body.get("messages", []))
+        content = json.dumps(self.answer(prompt))
+        return {
+            "id": f"fake-{self.requests}", "object": "chat.completion", "created": int(time.time()), "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+
+def serve(host="127.0.0.1", port=0, **options):
+    """
+    Starts a FakeLLM HTTP server in a daemon thread and returns it; point the OpenAI
+    client at it with OPENAI_BASE_URL=server.base_url. Stop it with server.shutdown().
+    """
+    llm = FakeLLM(**options)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if llm.rate_limited():
+                payload = json.dumps({"error": {"message": "Rate limit reached.", "type": "requests", "code": "rate_limit_exceeded"}}).encode()
+                self.send_response(429)
+                self.send_header("Retry-After", str(llm.retry_after))
+            else:
+                payload = json.dumps(llm.completion(body)).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args): pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.llm = llm
+    server.base_url = f"http://{host}:{server.server_address[1]}/v1"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
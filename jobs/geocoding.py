@@ -0,0 +1,74 @@
+import logging
+from datetime import timedelta
+
+from django.utils import timezone
+from geopy.exc import GeopyError
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.geocoders import Nominatim
+
+from jobs.models import GeocodeResult
+
+logger = logging.getLogger("geocoding")
+
+
+class Geocoder:
+    """
+    Resolves raw location strings to "City, State, Country" for the ingestion commands.
+
+    Lookups are persisted in GeocodeResult (misses included) and loaded once per run,
+    so each distinct string goes to Nominatim at most once per run and, in steady state,
+    not at all. Live calls go through geopy's RateLimiter to respect Nominatim's 1 req/s.
+    """
+
+    def __init__(self, user_agent="martechstack_jobs_bot_v2", min_delay=1.0, negative_ttl_days=30):
+        self.geolocator = Nominatim(user_agent=user_agent)
+        self.geocode = RateLimiter(self.geolocator.geocode, min_delay_seconds=min_delay, max_retries=1, swallow_exceptions=False)
+        self.negative_ttl = timedelta(days=negative_ttl_days)
+        self.memo = {}
+        self.hits = 0
+        self.lookups = 0
+
+    @staticmethod
+    def normalize(raw):
+        return " ".join((raw or "").split()).lower()[:255]
+
+    def load(self):
+        # Negative results expire so places Nominatim learns about get another chance.
+        stale = timezone.now() - self.negative_ttl
+        for query, formatted, found, updated_at in GeocodeResult.objects.values_list('query', 'formatted', 'found', 'updated_at'):
+            if found or updated_at >= stale:
+                self.memo[query] = formatted if found else None
+        return self
+
+    def resolve(self, raw_loc):
+        """
+        Returns the formatted location, or raw_loc unchanged when it can't be resolved.
+        """
+        if not raw_loc or len(raw_loc) < 3: return raw_loc
+        key = self.normalize(raw_loc)
+        if key in self.memo:
+            self.hits += 1
+            return self.memo[key] or raw_loc
+
+        self.lookups += 1
+        try:
+            location = self.geocode(raw_loc, language="en", addressdetails=True, timeout=10)
+        except GeopyError as e:
+            # Transient failure: don't remember it as a miss.
+            logger.warning(f"Geocoding failed for {raw_loc!r}: {e}")
+            return raw_loc
+
+        formatted = ""
+        if location:
+            addr = location.raw.get('address', {})
+            city = addr.get('city') or addr.get('town') or addr.get('village') or addr.get('county')
+            state = addr.get('state') or addr.get('region')
+            country = addr.get('country')
+            formatted = ", ".join([p for p in [city, state, country] if p])
+
+        self.memo[key] = formatted or None
+        GeocodeResult.objects.update_or_create(query=key, defaults={"formatted": formatted, "found": bool(formatted)})
+        return formatted or raw_loc
+
+    def summary(self):
+        return f"{self.hits} cached, {self.lookups} Nominatim lookups"
@@ -0,0 +1,285 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger("http")
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Longest Retry-After we honour: a bogus header must not park a worker for hours.
+MAX_RETRY_AFTER = 60.0
+# Multi-tenant ATS hosts: how many leading path segments name one board. Their circuit
+# breaker is kept per board, so one company's broken board doesn't cut off the whole host.
+BOARD_PATH_DEPTH = {
+    "boards-api.greenhouse.io": 3,   # /v1/boards/{token}
+    "api.lever.co": 3,               # /v0/postings/{token}
+    "api.ashbyhq.com": 3,            # /posting-api/job-board/{token}
+    "apply.workable.com": 5,         # /api/v1/widget/accounts/{token}
+    "api.smartrecruiters.com": 3,    # /v1/companies/{company}
+    "myworkdayjobs.com": 4,          # /wday/cxs/{tenant}/{site}
+}
+
+
+def retry_after_seconds(value):
+    """
+    Parses a Retry-After header (delta-seconds or HTTP-date), capped at MAX_RETRY_AFTER.
+    Returns None if absent/invalid.
+    """
+    if not value: return None
+    value = str(value).strip()
+    if value.isdigit(): return min(float(value), MAX_RETRY_AFTER)
+    try:
+        return min(max(0.0, (parsedate_to_datetime(value) - timezone.now()).total_seconds()), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):
+        return None
+
+
+def host_of(url):
+    return urlparse(str(url)).netloc or "unknown"
+
+
+def by_domain(table, host):
+    """
+    The table entry for host or its closest parent domain, or None.
+    """
+    parts = host.split(":")[0].split(".")
+    for i in range(len(parts) - 1):
+        value = table.get(".".join(parts[i:]))
+        if value: return value
+    return None
+
+
+def circuit_key(url):
+    """
+    What a circuit breaker covers: the host, or host + board path on BOARD_PATH_DEPTH hosts.
+    """
+    parts = urlparse(str(url))
+    host = parts.netloc or "unknown"
+    depth = by_domain(BOARD_PATH_DEPTH, host)
+    if not depth: return host
+    return "/".join([host] + [seg for seg in parts.path.split("/") if seg][:depth])
+
+
+class CircuitOpenError(requests.ConnectionError, httpx.TransportError):
+    """
+    Raised instead of calling a host (or board) whose circuit is open. It is both a requests
+    and an httpx error, so existing handlers of either client treat it as a failed call.
+    """
+
+
+class HostScheduler:
+    """
+    Per-host politeness shared by the sync and async clients.
+
+    Each host gets a token bucket from settings.CRAWL_HOST_LIMITS ({"rate": req/s, "burst": n});
+    keys match the host or any parent domain, "default" covers the rest. reserve() books the
+    next slot and returns how long to wait for it, so concurrent callers queue up fairly.
+    After `failure_threshold` consecutive failed attempts (network errors, 429/5xx) the circuit
+    opens and every further call fails fast with CircuitOpenError for the rest of the run. A
+    circuit covers one host, or one board on the shared ATS hosts (see circuit_key).
+    """
+
+    def __init__(self, limits=None, failure_threshold=5):
+        self.limits = settings.CRAWL_HOST_LIMITS if limits is None else limits
+        self.failure_threshold = failure_threshold
+        self.buckets = {}
+        self.failures = defaultdict(int)
+        self.open = set()
+        self.lock = threading.Lock()
+
+    def limit_for(self, host):
+        return by_domain(self.limits, host) or self.limits.get("default")
+
+    def reserve(self, url):
+        key = circuit_key(url)
+        if key in self.open: raise CircuitOpenError(f"Circuit open for {key} after {self.failures[key]} consecutive failures")
+        host = host_of(url)
+        limit = self.limit_for(host)
+        if not limit: return 0.0
+        rate, burst = float(limit["rate"]), float(limit.get("burst", 1))
+        with self.lock:
+            now = time.monotonic()
+            tokens, last = self.buckets.get(host, (burst, now))
+            # Tokens may go negative: that is the queue of callers already holding a slot.
+            tokens = min(burst, tokens + (now - last) * rate) - 1
+            self.buckets[host] = (tokens, now)
+        return -tokens / rate if tokens < 0 else 0.0
+
+    def success(self, url):
+        self.failures[circuit_key(url)] = 0
+
+    def failure(self, url):
+        key = circuit_key(url)
+        self.failures[key] += 1
+        if self.failures[key] >= self.failure_threshold and key not in self.open:
+            self.open.add(key)
+            logger.warning(f"Circuit opened for {key} after {self.failures[key]} consecutive failures")
+
+
+class HttpStats:
+    """
+    Per-host counters (requests, retries, bytes, errors, seconds waited on the politeness
+    scheduler, calls refused by an open circuit) shared by the sync and async clients.
+    """
+
+    def __init__(self):
+        self.hosts = defaultdict(lambda: {"requests": 0, "retries": 0, "bytes": 0, "errors": 0, "waited": 0.0, "blocked": 0})
+
+    def record(self, url, calls=0, retries=0, nbytes=0, errors=0, waited=0.0, blocked=0):
+        host = self.hosts[host_of(url)]
+        host["requests"] += calls
+        host["retries"] += retries
+        host["bytes"] += nbytes
+        host["errors"] += errors
+        host["waited"] += waited
+        host["blocked"] += blocked
+
+    def report_lines(self):
+        lines = []
+        for host, c in sorted(self.hosts.items(), key=lambda kv: -kv[1]["requests"]):
+            line = f"{host}: {c['requests']} req, {c['retries']} retries, {c['bytes'] / 1024:.1f} KB, {c['errors']} errors, {c['waited']:.1f}s throttled"
+            if c["blocked"]: line += f", {c['blocked']} blocked (circuit open)"
+            lines.append(line)
+        return lines
+
+    def write(self, stdout):
+        if not self.hosts: return
+        stdout.write("\n🌐 HTTP usage per host:")
+        for line in self.report_lines():
+            stdout.write(f"   {line}")
+
+
+class HttpClient:
+    """
+    Pooled keep-alive session with consistent timeouts and retry on 429/5xx.
+    Waits honour Retry-After, otherwise back off exponentially (backoff * 2**attempt).
+    Network errors are retried too and re-raised as requests exceptions once retries run out.
+    Every attempt first waits for its slot on the HostScheduler.
+    """
+
+    def __init__(self, timeout=10, retries=3, backoff=0.5, max_backoff=30.0, pool_size=10, headers=None, stats=None, scheduler=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = stats or HttpStats()
+        self.scheduler = scheduler or HostScheduler()
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        # One connection pool per host, kept alive for the whole command run.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _delay(self, attempt, resp=None):
+        delay = retry_after_seconds(resp.headers.get("Retry-After")) if resp is not None else None
+        if delay is None: delay = self.backoff * (2 ** attempt)
+        return min(delay, self.max_backoff)
+
+    def _wait_turn(self, url):
+        try:
+            wait = self.scheduler.reserve(url)
+        except CircuitOpenError:
+            self.stats.record(url, blocked=1)
+            raise
+        self.stats.record(url, waited=wait)
+        return wait
+
+    def request(self, method, url, retries=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            time.sleep(self._wait_turn(url))
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.stats.record(url, calls=1, errors=1)
+                self.scheduler.failure(url)
+                if attempt >= retries: raise
+                delay = self._delay(attempt)
+            else:
+                nbytes = int(resp.headers.get("Content-Length") or 0) if kwargs.get("stream") else len(resp.content)
+                self.stats.record(url, calls=1, nbytes=nbytes)
+                if resp.status_code not in RETRY_STATUSES:
+                    self.scheduler.success(url)
+                    return resp
+                self.scheduler.failure(url)
+                if attempt >= retries: return resp
+                delay = self._delay(attempt, resp)
+                resp.close()
+            self.stats.record(url, retries=1)
+            logger.info(f"Retrying {method} {url} in {delay:.1f}s (attempt {attempt + 1}/{retries})")
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs): return self.request("GET", url, **kwargs)
+    def post(self, url, **kwargs): return self.request("POST", url, **kwargs)
+    def head(self, url, **kwargs): return self.request("HEAD", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpClient:
+    """
+    asyncio counterpart of HttpClient (httpx), with the same retry policy, stats and scheduler.
+    Use as `async with AsyncHttpClient(...) as client:`.
+    """
+
+    def __init__(self, timeout=10, retries=3, backoff=0.5, max_backoff=30.0, pool_size=20, headers=None, stats=None, scheduler=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = stats or HttpStats()
+        self.scheduler = scheduler or HostScheduler()
+        self.client = httpx.AsyncClient(
+            headers=headers or DEFAULT_HEADERS, timeout=timeout, follow_redirects=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def __aenter__(self): return self
+    async def __aexit__(self, *exc): await self.client.aclose()
+
+    _delay = HttpClient._delay
+    _wait_turn = HttpClient._wait_turn
+
+    async def request(self, method, url, retries=None, **kwargs):
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._wait_turn(url))
+            try:
+                resp = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                self.stats.record(url, calls=1, errors=1)
+                self.scheduler.failure(url)
+                if attempt >= retries: raise
+                delay = self._delay(attempt)
+            else:
+                self.stats.record(url, calls=1, nbytes=len(resp.content))
+                if resp.status_code not in RETRY_STATUSES:
+                    self.scheduler.success(url)
+                    return resp
+                self.scheduler.failure(url)
+                if attempt >= retries: return resp
+                delay = self._delay(attempt, resp)
+            self.stats.record(url, retries=1)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url, **kwargs): return await self.request("GET", url, **kwargs)
+    async def post(self, url, **kwargs): return await self.request("POST", url, **kwargs)
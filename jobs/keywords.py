@@ -0,0 +1,62 @@
+import re
+
+WORD = re.compile(r"\w")
+
+
+class KeywordMatcher:
+    """
+    A keyword list compiled into one regex, so checking a text is a single scan instead
+    of one `kw in text` pass per keyword. Matching is case-insensitive: keywords and
+    texts are lowercased (cheaper than re.IGNORECASE on long descriptions).
+
+    The keywords are folded into a trie before compiling (shared prefixes such as
+    "adobe", "adobe analytics", "adobe target" become one branch), and each keyword
+    is anchored at word boundaries on the sides where it starts/ends with a word
+    character: "heap" no longer fires on "cheap", while "seo " keeps its trailing space.
+    The longest keyword wins where several start at the same position.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = {}
+        for kw in keywords:
+            if kw and kw.lower() not in self.keywords: self.keywords[kw.lower()] = kw
+        self.regex = re.compile(self._pattern(self.keywords))
+
+    @classmethod
+    def _pattern(cls, keywords):
+        bounded = [kw for kw in keywords if WORD.match(kw)]
+        loose = [kw for kw in keywords if not WORD.match(kw)]
+        branches = []
+        if bounded: branches.append(r"(?<!\w)" + cls._trie_pattern(cls._trie(bounded)))
+        if loose: branches.append(cls._trie_pattern(cls._trie(loose)))
+        return "|".join(f"(?:{b})" for b in branches) or "(?!)"
+
+    @staticmethod
+    def _trie(keywords):
+        root = {}
+        for kw in keywords:
+            node = root
+            for ch in kw: node = node.setdefault(ch, {})
+            node[""] = bool(WORD.match(kw[-1]))
+        return root
+
+    @classmethod
+    def _trie_pattern(cls, node):
+        branches = [re.escape(ch) + cls._trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+        # Ending here is tried last so longer keywords sharing this prefix win.
+        if "" in node: branches.append(r"(?!\w)" if node[""] else "")
+        if len(branches) == 1: return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    def search(self, text):
+        """
+        The first keyword found in text, or None.
+        """
+        m = self.regex.search((text or "").lower())
+        return self.keywords[m.group(0)] if m else None
+
+    def find_all(self, text):
+        """
+        Every (non-overlapping) hit as (position, keyword), in order of appearance.
+        """
+        return [(m.start(), self.keywords[m.group(0)]) for m in self.regex.finditer((text or "").lower())]
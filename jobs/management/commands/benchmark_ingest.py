@@ -0,0 +1,92 @@
+import os
+import io
+import json
+import time
+import argparse
+from collections import defaultdict
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from jobs.models import Job
+from jobs.replay import Archive, activate, stage_for
+
+
+class QueryCounter:
+    """
+    connection.execute_wrapper hook counting queries and time spent in the database.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.monotonic() - start
+
+
+class Command(BaseCommand):
+    help = 'Replays a recorded ingestion run offline and reports postings/sec, wall time per stage and DB queries per posting.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help='Archive written by record_ingest.')
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Artificial latency added to every replayed exchange.')
+        parser.add_argument('--recorded-latency', action='store_true', help='Replay each exchange with the latency measured when it was recorded.')
+        parser.add_argument('--keep', action='store_true', help='Commit the database changes (plain replay) instead of rolling them back.')
+        parser.add_argument('--verbose', action='store_true', help="Show the replayed command's own output.")
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+        parser.add_argument('target', help='Command to replay, e.g. fetch_jobs or fetch_rss.')
+        parser.add_argument('target_args', nargs=argparse.REMAINDER, help='Arguments passed through to the command.')
+
+    def handle(self, *args, **options):
+        archive = Archive(options['archive']).load()
+        # Replay needs keys only where the recorded run had them (no real ones required);
+        # setting one the recording lacked would change which code paths run.
+        recorded = {stage_for(ex["url"]) for ex in archive.exchanges}
+        if "search" in recorded: os.environ.setdefault('SERPAPI_KEY', 'replay')
+        if "llm" in recorded: os.environ.setdefault('OPENAI_API_KEY', 'replay')
+        out = self.stdout if options['verbose'] else io.StringIO()
+        queries = QueryCounter()
+
+        with activate("replay", archive, latency=options['latency_ms'] / 1000.0, recorded_latency=options['recorded_latency']) as session:
+            with transaction.atomic(), connection.execute_wrapper(queries):
+                jobs_before = Job.objects.count()
+                start = time.monotonic()
+                call_command(options['target'], *options['target_args'], stdout=out, stderr=out)
+                wall = time.monotonic() - start
+                postings = Job.objects.count() - jobs_before
+                if not options['keep']: transaction.set_rollback(True)
+
+        stages = defaultdict(dict)
+        for stage in session.stage_calls:
+            stages[stage] = {"calls": session.stage_calls[stage], "seconds": round(session.stage_time[stage], 3)}
+        stages["db"] = {"calls": queries.count, "seconds": round(queries.seconds, 3)}
+        accounted = sum(s["seconds"] for s in stages.values())
+        stages["other"] = {"calls": 0, "seconds": round(max(0.0, wall - accounted), 3)}
+
+        report = {
+            "command": " ".join([options['target']] + options['target_args']),
+            "wall_seconds": round(wall, 3),
+            "postings": postings,
+            "postings_per_sec": round(postings / wall, 2) if wall else 0.0,
+            "queries_per_posting": round(queries.count / postings, 1) if postings else None,
+            "replayed": archive.served,
+            "unmatched": archive.misses,
+            "latency_ms": "recorded" if options['recorded_latency'] else options['latency_ms'],
+            "stages": dict(stages),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"⏱️ {report['command']}: {report['wall_seconds']}s wall, {postings} postings stored ({report['postings_per_sec']}/s)")
+        self.stdout.write(f"🗄️ {queries.count} DB queries ({report['queries_per_posting']} per posting)")
+        self.stdout.write(f"📼 {archive.served} exchanges replayed, {archive.misses} unmatched")
+        for stage, s in sorted(stages.items(), key=lambda kv: -kv[1]["seconds"]):
+            self.stdout.write(f"   {stage}: {s['seconds']}s ({s['calls']} calls)")
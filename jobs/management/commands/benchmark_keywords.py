@@ -0,0 +1,76 @@
+import time
+import random
+
+from django.core.management.base import BaseCommand
+
+from jobs.keywords import KeywordMatcher
+from jobs.models import Job
+from jobs.screener import MarTechScreener
+
+FILLER = ("we are looking for a driven teammate to own campaigns lifecycle reporting and stakeholder "
+          "alignment across regions you will partner with sales finance and product on quarterly goals").split()
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmarks the compiled keyword matcher against per-keyword `in` scans on the pre-LLM screening checks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='500,2000,8000,32000', help='Comma-separated synthetic description lengths (chars).')
+        parser.add_argument('--docs', type=int, default=200, help='Documents per size.')
+        parser.add_argument('--extra-keywords', type=int, default=0, help='Synthetic keywords added to the required list, to show scaling with list size.')
+        parser.add_argument('--from-db', action='store_true', help='Also benchmark the stored job descriptions.')
+
+    def handle(self, *args, **options):
+        screener = MarTechScreener()
+        keywords = screener.REQUIRED_KEYWORDS + [f"toolname{i}" for i in range(options['extra_keywords'])]
+        matcher = KeywordMatcher(keywords)
+        self.stdout.write(f"🔑 {len(keywords)} required keywords, {len(screener.tool_list_clean)} tools, {len(screener.VENDOR_COMPANIES)} vendors.")
+
+        rng = random.Random(42)
+        corpora = [(f"{size} chars", [self.synthetic(rng, size, keywords) for _ in range(options['docs'])]) for size in map(int, options['sizes'].split(','))]
+        if options['from_db']:
+            docs = [f"{t} {d}".lower() for t, d in Job.objects.values_list('title', 'description')[:options['docs']]]
+            if docs: corpora.append((f"db ({len(docs)} jobs)", docs))
+
+        self.stdout.write(f"\n{'corpus':<20}{'legacy µs/doc':>15}{'compiled µs/doc':>17}{'speedup':>10}{'disagree':>10}")
+        for label, docs in corpora:
+            legacy, legacy_s = self.timed(lambda text: any(kw in text for kw in keywords), docs)
+            compiled, compiled_s = self.timed(lambda text: bool(matcher.search(text)), docs)
+            disagree = sum(a != b for a, b in zip(legacy, compiled))
+            per_doc = lambda s: s / len(docs) * 1e6
+            self.stdout.write(f"{label:<20}{per_doc(legacy_s):>15.1f}{per_doc(compiled_s):>17.1f}{legacy_s / max(compiled_s, 1e-9):>9.1f}x{disagree:>10}")
+
+        # The whole pre-LLM stage (quick kill + keyword gate), old scans vs. the screener's matchers.
+        titles = [(rng.choice(["Marketing Operations Manager", "Software Engineer", "SEO Specialist", "Salesforce Developer", "Product Manager"]),
+                   rng.choice(["Adobe", "Acme Corp", "HubSpot", "Globex"])) for _ in range(options['docs'])]
+        _, legacy_s = self.timed(lambda tc: self.legacy_quick_kill(screener, *tc), titles)
+        _, compiled_s = self.timed(lambda tc: screener._quick_kill(*tc), titles)
+        self.stdout.write(f"\n⚡ _quick_kill: legacy {legacy_s / len(titles) * 1e6:.1f} µs, compiled {compiled_s / len(titles) * 1e6:.1f} µs per title.")
+        self.stdout.write("   (disagreements come from word boundaries: the legacy scan also matches inside words, e.g. 'heap' in 'cheap'.)")
+
+    def synthetic(self, rng, size, keywords):
+        words, length = [], 0
+        while length < size:
+            # Roughly one keyword per 2,000 chars, so some documents have none.
+            word = rng.choice(keywords) if rng.random() < 0.0007 else rng.choice(FILLER)
+            words.append(word)
+            length += len(word) + 1
+        return " ".join(words)[:size]
+
+    def timed(self, fn, items, repeat=3):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = [fn(item) for item in items]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return results, best
+
+    def legacy_quick_kill(self, screener, title, company):
+        # The per-keyword scans _quick_kill used before KeywordMatcher.
+        t_low, c_low = title.lower(), company.lower()
+        if any(bad in t_low for bad in screener.BAD_TITLE_KEYWORDS) and "operations" not in t_low and "technology" not in t_low:
+            return True
+        if any(v.lower() in c_low for v in screener.VENDOR_COMPANIES) and not any(tool in t_low for tool in screener.tool_list_clean):
+            return any(bt in t_low for bt in screener.VENDOR_BAD_TITLES) and "marketing" not in t_low and "martech" not in t_low
+        return False
@@ -2,24 +2,32 @@ import requests
 import re
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from jobs.boards import tracked_board_keys
+from jobs.http import HttpClient
 from jobs.models import Job
 
 class Command(BaseCommand):
     help = 'The Janitor: Scans active jobs and auto-rejects them if the link is dead, redirected, or expired.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Also probe ATS jobs whose board fetch_jobs polls successfully (normally closed by board diff).')
+
     def handle(self, *args, **options):
         self.stdout.write("🧹 Starting Dead Link Cleanup...")
         
-        # Only check active jobs (Live on site)
-        active_jobs = Job.objects.filter(is_active=True)
-        total = active_jobs.count()
+        # Only check active jobs (Live on site). Jobs on polled ATS boards are closed by
+        # fetch_jobs' board diff, so only AI-scraped / RSS / untracked jobs and those on
+        # boards whose last poll failed need a probe.
+        active_jobs = list(Job.objects.filter(is_active=True))
+        if not options.get('all'):
+            tracked = tracked_board_keys()
+            active_jobs = [job for job in active_jobs if (job.tags, job.company) not in tracked]
+        total = len(active_jobs)
         dead_count = 0
         
         self.stdout.write(f"   Scanning {total} active jobs...")
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
+        http = HttpClient(timeout=10, retries=1)
 
         # "Zombie Phrases" - If we see these, the job is likely dead even if status is 200 OK
         zombie_phrases = [
@@ -37,7 +45,7 @@ class Command(BaseCommand):
             try:
                 # 1. STATUS CHECK
                 # Allow redirects so we can catch "Job Page -> Home Page" redirects
-                r = requests.get(job.apply_url, headers=headers, timeout=10, allow_redirects=True)
+                r = http.get(job.apply_url, allow_redirects=True)
                 
                 # A. Check HTTP Codes
                 if r.status_code in [404, 410]:
@@ -63,7 +71,7 @@ class Command(BaseCommand):
             except requests.exceptions.Timeout:
                 # Be lenient on timeouts (might be temporary)
                 pass
-            except Exception as e:
+            except requests.RequestException:
                 # Other errors (DNS, etc) might be permanent
                 pass
 
@@ -81,3 +89,4 @@ class Command(BaseCommand):
                 self.stdout.write(".", ending="")
 
         self.stdout.write(self.style.SUCCESS(f"\n✨ Cleanup Complete. Removed {dead_count}/{total} dead jobs."))
+        http.stats.write(self.stdout)
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.compaction import Compactor, estimate_tokens
+from jobs.models import Job
+from jobs.screener import MarTechScreener
+
+
+class Command(BaseCommand):
+    help = 'Compares the screener prompt snippet before (first 3,000 chars) and after compaction on stored job descriptions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000, help='Jobs to sample (most recent first).')
+        parser.add_argument('--budget', type=int, default=MarTechScreener.SNIPPET_TOKENS, help='Token budget to evaluate.')
+
+    def handle(self, *args, **options):
+        screener = MarTechScreener(use_classifier=False)
+        compactor = Compactor(screener.REQUIRED_KEYWORDS, budget=options['budget'])
+        descriptions = [d for d in Job.objects.order_by('-created_at').values_list('description', flat=True)[:options['limit']] if d]
+        if not descriptions:
+            self.stdout.write("No stored job descriptions.")
+            return
+
+        start = time.perf_counter()
+        compacted = [compactor.compact(d) for d in descriptions]
+        elapsed = time.perf_counter() - start
+
+        # Tool coverage: of the tools the full description names, how many reach the prompt.
+        named = kept_legacy = kept_compacted = 0
+        for full, small in zip(descriptions, compacted):
+            tools = {kw for _, kw in screener.tool_matcher.find_all(full)}
+            named += len(tools)
+            kept_legacy += len(tools & {kw for _, kw in screener.tool_matcher.find_all(full[:3000])})
+            kept_compacted += len(tools & {kw for _, kw in screener.tool_matcher.find_all(small)})
+
+        full_tokens = sum(estimate_tokens(d) for d in descriptions) / len(descriptions)
+        self.stdout.write(f"📄 {len(descriptions)} descriptions, avg {full_tokens:.0f} tokens in full.")
+        self.stdout.write(f"✂️ {compactor.summary()}")
+        self.stdout.write(f"   {elapsed / len(descriptions) * 1000:.2f} ms per description")
+        if named:
+            self.stdout.write(f"🔧 Tool mentions reaching the prompt: legacy {kept_legacy / named:.1%}, compacted {kept_compacted / named:.1%} (of {named}).")
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.fakellm import serve
+
+
+class Command(BaseCommand):
+    help = 'Runs a local fake OpenAI chat-completions server with deterministic screening verdicts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every completion.')
+        parser.add_argument('--drop-every', type=int, default=0, help='Omit every Nth posting from batched answers (exercises the fallback).')
+        parser.add_argument('--throttle', type=int, default=0, help='Answer the first N requests with 429 Too Many Requests (exercises the backoff).')
+        parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with throttled responses.')
+
+    def handle(self, *args, **options):
+        server = serve(port=options['port'], latency=options['latency_ms'] / 1000.0, drop_every=options['drop_every'],
+                       throttle=options['throttle'], retry_after=options['retry_after'])
+        self.stdout.write(self.style.SUCCESS(f"🤖 Fake LLM listening on {server.base_url}"))
+        self.stdout.write(f"   export OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=fake")
+        try:
+            while True: time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+            self.stdout.write(f"\n🛑 Stopped after {server.llm.requests} requests.")
@@ -1,58 +1,230 @@
 import time
 import re
+import asyncio
 import dateutil.parser 
 import requests
+import httpx
 import os
 import json
+import html
 from datetime import datetime, timedelta
 from urllib.parse import urlparse, urlunparse
 from typing import Any, Dict
-from bs4 import BeautifulSoup
 from openai import OpenAI
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.conf import settings
 from django.db.models import Q
 
-from jobs.models import Job, Tool
+from jobs.boards import BoardRegistry, board_company, tracked_board_keys
+from jobs.caches import ConditionalCache, SearchCache
+from jobs.compaction import Compactor
+from jobs.dedupe import DedupeIndex
+from jobs.extract import job_posting_ld, main_text, read_capped
+from jobs.geocoding import Geocoder
+from jobs.http import HttpClient, AsyncHttpClient
+from jobs.metrics import StageMetrics
+from jobs.models import AtsBoard, FetchRun, Job, PostingDetail, Tool
 from jobs.screener import MarTechScreener
+from jobs.writer import JobWriter
+
+# ATS board endpoints: source -> (HTTP method, URL template). One request returns the whole board.
+BOARD_ENDPOINTS = {
+    "greenhouse": ("GET", "https://boards-api.greenhouse.io/v1/boards/{token}/jobs?content=true"),
+    "lever": ("GET", "https://api.lever.co/v0/postings/{token}?mode=json"),
+    "ashby": ("POST", "https://api.ashbyhq.com/posting-api/job-board/{token}"),
+    "workable": ("GET", "https://apply.workable.com/api/v1/widget/accounts/{token}"),
+    "smartrecruiters": ("GET", "https://api.smartrecruiters.com/v1/companies/{token}/postings"),
+    "workday": ("POST", "https://{host}/wday/cxs/{tenant}/{site}/jobs"),
+    "bamboohr": ("GET", "https://{token}.bamboohr.com/careers/list"),
+}
+# JSON bodies for POST endpoints that need one. Workday pages its listing 20 at a time.
+BOARD_PAYLOADS = {
+    "workday": {"appliedFacets": {}, "limit": 20, "offset": 0, "searchText": ""},
+}
+WORKDAY_MAX_PAGES = 10
+# BambooHR's own subdomains; every other <sub>.bamboohr.com is a company account.
+BAMBOOHR_RESERVED = {"www", "help", "marketplace", "partners", "api", "app", "status", "developers", "documentation", "blog", "community", "support", "go", "info", "learn"}
+CHECKPOINT_INTERVAL = 30  # seconds between checkpoint saves while processing links/boards
 
 class Command(BaseCommand):
     help = 'The "Direct-Apply" Hunter: Smart Deduplication + Geocoding + Clean URLs + Auto-Cleanup.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--serial', action='store_true', help='Fetch ATS boards one by one with blocking requests (legacy path).')
+        parser.add_argument('--concurrency', type=int, default=10, help='Max board fetches in flight across all hosts (async mode).')
+        parser.add_argument('--per-host', type=int, default=4, help='Max board fetches in flight per ATS host (async mode).')
+        parser.add_argument('--search-ttl', type=float, default=None, help='Hours to reuse cached SerpAPI results (default: settings.SERPAPI_CACHE_TTLS["hunt"], 0 disables).')
+        parser.add_argument('--batch-size', type=int, default=50, help='Screened postings buffered per bulk insert.')
+        parser.add_argument('--poll', action='store_true', help='Only poll known boards that are due; skip SerpAPI discovery.')
+        parser.add_argument('--refresh-boards', action='store_true', help='Ignore stored ETag/hash validators and re-process every board and scraped page.')
+        parser.add_argument('--resume', action='store_true', help='Continue the last unfinished run from its checkpoint.')
+        parser.add_argument('--screen-workers', type=int, default=4, help='Concurrent LLM screening calls per board.')
+        parser.add_argument('--screen-batch', type=int, default=1, help='Postings per LLM screening request (>1 uses the batched prompt).')
+
     def handle(self, *args, **options):
         self.stdout.write("🚀 Starting Job Hunt (Optimized Batch Mode)...")
+        self.serial = options.get('serial', False)
+        self.concurrency = max(1, options.get('concurrency') or 10)
+        self.per_host = max(1, options.get('per_host') or 4)
+        self.prefetched = {}
+        self.http = HttpClient(timeout=10)
+        self.metrics = StageMetrics("fetch_jobs")
+        self.board_cache = ConditionalCache(force=options.get('refresh_boards', False))
+        self.page_cache = ConditionalCache(force=options.get('refresh_boards', False))
+        self.search_cache = SearchCache("hunt", ttl_hours=options.get('search_ttl'))
+        self.poll_only = options.get('poll', False)
+        self.registry = BoardRegistry().load()
+        self.board_outcomes = {}
+        self.board_yield = {"postings": 0, "approvals": 0}
+
+        self.serpapi_key = os.environ.get('SERPAPI_KEY')
+        self.openai_key = os.environ.get('OPENAI_API_KEY')
+
+        # Checked before a run is recorded, so a misconfigured start leaves nothing to --resume.
+        if not self.serpapi_key and not self.poll_only:
+            self.stdout.write(self.style.ERROR("❌ Error: Missing SERPAPI_KEY."))
+            return
 
         # --- 0. INIT GEOCODER ---
-        self.geolocator = Nominatim(user_agent="martechstack_jobs_bot_v2")
-        self.location_cache = {}
+        self.geocoder = Geocoder(user_agent="martechstack_jobs_bot_v2").load()
+
+        self.run = self.start_run(options)
+        resuming = self.run.resumes > 0
 
         # --- 1. DEAD LINK CHECKER ---
-        self.check_dead_links()
+        # Already done by the run we are resuming.
+        if not resuming:
+            self.check_dead_links()
 
         # --- 2. AUTO-CLEANUP ---
         # Only remove explicitly rejected jobs. Keep pending for review.
         deleted_count = Job.objects.filter(screening_status='rejected').delete()[0]
         self.stdout.write(f"🧹 Database Cleanup: Removed {deleted_count} rejected jobs.")
-        
-        self.serpapi_key = os.environ.get('SERPAPI_KEY')
-        self.openai_key = os.environ.get('OPENAI_API_KEY')
-        
-        if not self.serpapi_key:
-            self.stdout.write(self.style.ERROR("❌ Error: Missing SERPAPI_KEY."))
-            return
+        self.dedupe = DedupeIndex().load()
 
         self.client = OpenAI(api_key=self.openai_key) if self.openai_key else None
         self.screener = MarTechScreener()
-        self.total_added = 0
+        # The AI scraper reads more of the page than it sends: 16k chars compacted to the old 4k-char budget.
+        self.page_compactor = Compactor(self.screener.REQUIRED_KEYWORDS, budget=1000, lead=6, baseline_chars=4000, keep_header=True)
+        self.screen_workers = options.get('screen_workers') or 4
+        self.screen_batch = options.get('screen_batch') or 1
+        self.total_added = self.run.jobs_added
+        self.total_closed = 0
+        self.writer = JobWriter(batch_size=options.get('batch_size') or 50, metrics=self.metrics)
         
         self.tool_cache = {self.screener._normalize(t.name): t for t in Tool.objects.all()}
         self.cutoff_date = timezone.now() - timedelta(days=14)
-        self.processed_tokens = set()
+        checkpoint = self.run.checkpoint
+        self.processed_tokens = set(checkpoint.get("processed_tokens", []))
+        self.completed_queries = set(checkpoint.get("completed_queries", []))
+        self.current_query = checkpoint.get("current_query")
+        self.pending_links = checkpoint.get("pending_links", [])
+        self._last_checkpoint = time.monotonic()
+
+        try:
+            # --- 3. DISCOVERY (SerpAPI) ---
+            if not self.poll_only:
+                self.hunt()
+
+            # --- 4. POLL KNOWN BOARDS ---
+            self.poll_boards()
+        except BaseException:
+            # Keep the checkpoint consistent with what was written, then leave the run resumable.
+            self.save_checkpoint(force=True)
+            self.end_run("failed")
+            raise
+
+        self.writer.flush()
+        self.end_run("completed")
+        self.stdout.write(self.style.SUCCESS(f"\n✨ Done! Added {self.total_added} new jobs, closed {self.total_closed} via board diff."))
+        self.stdout.write(f"🗂️ Board cache: {self.board_cache.summary()}")
+        self.stdout.write(f"📄 Page cache: {self.page_cache.summary()}")
+        self.stdout.write(f"📋 Board registry: {self.registry.discovered} new boards discovered, {len(self.registry.boards)} known.")
+        self.stdout.write(f"📍 Geocoding: {self.geocoder.summary()}")
+        self.stdout.write(f"♻️ Skipped {self.dedupe.skipped} duplicate postings.")
+        self.stdout.write(f"🔁 SerpAPI cache: {self.search_cache.summary()}")
+        self.stdout.write(f"🧠 Verdict cache: {self.screener.verdicts.summary()}")
+        self.stdout.write(f"⛔ Block rules: {self.screener.block_summary()}")
+        self.stdout.write(f"🤖 Pre-classifier: {self.screener.classifier_summary()}")
+        self.stdout.write(f"✂️ Screener prompts: {self.screener.compactor.summary()}")
+        self.stdout.write(f"✂️ AI scraper prompts: {self.page_compactor.summary()}")
+        self.http.stats.write(self.stdout)
+        self.write_report()
+
+    def write_report(self):
+        """
+        Prints the run's stage/cache report as JSON and stores it as an IngestReport.
+        """
+        self.metrics.cache("serpapi", self.search_cache.hits, self.search_cache.misses)
+        self.metrics.cache("boards", self.board_cache.unchanged, self.board_cache.changed)
+        self.metrics.cache("pages", self.page_cache.unchanged, self.page_cache.changed)
+        self.metrics.cache("geocoding", self.geocoder.hits, self.geocoder.lookups)
+        self.metrics.cache("verdicts", self.screener.verdicts.hits, self.screener.verdicts.misses)
+        self.metrics.count("duplicates_skipped", self.dedupe.skipped)
+        self.metrics.count("blocked", sum(self.screener.blocked.values()))
+        for tier, n in self.screener.tiers.items(): self.metrics.count(f"classifier_{tier}", n)
+        for name, compactor in (("screener", self.screener.compactor), ("ai_scraper", self.page_compactor)):
+            self.metrics.count(f"{name}_prompts_compacted", compactor.calls)
+            self.metrics.count(f"{name}_prompt_tokens_saved", compactor.tokens_in - compactor.tokens_out)
+        self.metrics.count("jobs_written", self.writer.written)
+        self.metrics.count("jobs_closed", self.total_closed)
+        report = self.metrics.save(fetch_run=self.run).report
+        self.stdout.write("\n📊 Run report:\n" + json.dumps(report, indent=2))
+
+    def start_run(self, options):
+        """
+        Returns the FetchRun to record progress on: with --resume, the most recent run if it
+        did not complete (an older unfinished run is stale once a later one completed),
+        otherwise a new one (older unfinished runs are marked failed).
+        """
+        if options.get('resume'):
+            run = FetchRun.objects.filter(command="fetch_jobs").order_by("-started_at", "-pk").first()
+            if run and run.status != "completed":
+                checkpoint = run.checkpoint
+                self.stdout.write(f"⏯️ Resuming run #{run.pk}: {len(checkpoint.get('completed_queries', []))} queries done, "
+                                  f"{len(checkpoint.get('processed_tokens', []))} boards processed, {len(checkpoint.get('pending_links', []))} links pending.")
+                run.resumes += 1
+                run.status = "running"
+                run.save(update_fields=["resumes", "status", "updated_at"])
+                return run
+            self.stdout.write("⏯️ No unfinished run to resume; starting a new one.")
+        FetchRun.objects.filter(command="fetch_jobs", status="running").update(status="failed")
+        keep = ("serial", "poll", "refresh_boards", "batch_size", "search_ttl")
+        run = FetchRun.objects.create(command="fetch_jobs", options={k: options.get(k) for k in keep})
+        self.stdout.write(f"🆔 Run #{run.pk}")
+        return run
+
+    def save_checkpoint(self, force=False):
+        """
+        Flushes buffered jobs, then records progress. Without force, saves at most every
+        CHECKPOINT_INTERVAL seconds; resuming redoes at most that much work.
+        """
+        if not force and time.monotonic() - self._last_checkpoint < CHECKPOINT_INTERVAL: return
+        self.writer.flush()
+        self.run.checkpoint = {
+            "completed_queries": sorted(self.completed_queries),
+            "processed_tokens": sorted(self.processed_tokens),
+            "current_query": self.current_query,
+            "pending_links": list(self.pending_links),
+        }
+        self.run.jobs_added = self.total_added
+        self.run.save(update_fields=["checkpoint", "jobs_added", "updated_at"])
+        self._last_checkpoint = time.monotonic()
+
+    def end_run(self, status):
+        self.run.status = status
+        self.run.finished_at = timezone.now()
+        self.run.jobs_added = getattr(self, 'total_added', self.run.jobs_added)
+        self.run.save(update_fields=["status", "finished_at", "jobs_added", "updated_at"])
 
+    def hunt(self):
+        """
+        Searches SerpAPI for postings on every ATS group x hunt_targets line. Board links
+        register their board; boards that are already known and not yet due are left to
+        poll_boards().
+        """
         # ATS Groups (Domains to search)
         ats_groups = [
             "site:greenhouse.io OR site:lever.co OR site:ashbyhq.com OR site:jobs.smartrecruiters.com",
@@ -88,7 +260,6 @@ class Command(BaseCommand):
         if not target_lines:
             target_lines = ['MarTech']
 
-        # --- MAIN LOOP ---
         for group_query in ats_groups:
             for line in target_lines:
                 # 1. Parse the OR line
@@ -107,32 +278,82 @@ class Command(BaseCommand):
                 joined_intitle = " OR ".join(intitle_parts)
                 final_query = f'({joined_intitle}) ({group_query}){exclude_str}'
 
+                if final_query in self.completed_queries: continue
+
                 self.stdout.write(f"\n🔎 Hunting Batch: {parts[:3]}... (Last 14 Days)")
-                time.sleep(1.0) # Respect rate limits
                 
-                links = self.search_google(final_query, num=100, tbs="qdr:d14")
-                self.stdout.write(f"   Found {len(links)} links. Processing...")
+                if final_query == self.current_query:
+                    # Interrupted mid-query: only the links that weren't processed yet.
+                    links = list(self.pending_links)
+                    self.stdout.write(f"   Resuming {len(links)} pending links...")
+                else:
+                    with self.metrics.stage("discover"):
+                        links = self.search_google(final_query, num=100, tbs="qdr:d14")
+                    self.stdout.write(f"   Found {len(links)} links. Processing...")
+                self.current_query, self.pending_links = final_query, list(links)
+                self.save_checkpoint(force=True)
+
+                # Async mode downloads every board of the batch up front; links are still processed in order.
+                if not self.serial:
+                    self.prefetch_boards(links)
 
-                for link in links:
+                for i, link in enumerate(links):
                     try:
                         self.analyze_and_fetch(link)
-                        time.sleep(0.5) 
                     except Exception:
                         pass
+                    self.pending_links = links[i + 1:]
+                    self.save_checkpoint()
+                self.prefetched.clear()
+                self.completed_queries.add(final_query)
+                self.current_query, self.pending_links = None, []
+                self.save_checkpoint(force=True)
+
+    def poll_boards(self):
+        """
+        Fetches every registered board whose next_poll_at has passed.
+        """
+        boards = [b for b in self.registry.due_boards() if b[1] not in self.processed_tokens]
+        if not boards: return
+        self.stdout.write(f"\n📋 Polling {len(boards)} known boards...")
+        if not self.serial:
+            self._prefetch(boards)
+        for source, token in boards:
+            try:
+                self.process_board(source, token)
+            except Exception as e:
+                self.stdout.write(f"      ❌ {source} board '{token}' failed: {e}")
+            self.save_checkpoint()
+        self.prefetched.clear()
+        self.save_checkpoint(force=True)
 
-        self.stdout.write(self.style.SUCCESS(f"\n✨ Done! Added {self.total_added} new jobs."))
+    def process_board(self, source, token):
+        """
+        Fetches one board, then records the outcome and yield in the registry.
+        """
+        if token in self.processed_tokens: return
+        self.board_yield = {"postings": 0, "approvals": 0}
+        getattr(self, f"fetch_{source}_api")(token)
+        # Unchanged and unavailable boards both back off; only a changed board is polled sooner.
+        outcome = self.board_outcomes.pop((source, token), "unavailable")
+        self.registry.record_poll(source, token, changed=(outcome == "changed"), available=(outcome != "unavailable"), **self.board_yield)
+        if not self.registry.boards[(source, token)].is_active:
+            self.stdout.write(self.style.WARNING(f"   💤 Deactivated {source} board '{token}' after {AtsBoard.MAX_FAILED_POLLS} unavailable polls"))
 
     def check_dead_links(self):
         # Checks if existing active jobs are 404ing
+        # ATS jobs on healthy polled boards are closed by board diff (see _finish_board); probe the rest.
         self.stdout.write("💀 Checking for dead links...")
+        tracked = tracked_board_keys()
         active_jobs = Job.objects.filter(is_active=True)
         for job in active_jobs:
+            if (job.tags, job.company) in tracked: continue
             try:
-                r = requests.head(job.apply_url, timeout=5, allow_redirects=True)
+                r = self.http.head(job.apply_url, timeout=5, allow_redirects=True, retries=1)
                 if r.status_code >= 400:
                     job.is_active = False
                     job.save()
-            except:
+            except requests.RequestException:
                 pass
 
     def search_google(self, query, num=100, tbs="qdr:d14"):
@@ -145,11 +366,18 @@ class Command(BaseCommand):
             "hl": "en",
             "tbs": tbs 
         }
+        cached = self.search_cache.get(query, params)
+        if cached is not None:
+            return [r.get("link") for r in cached]
         try:
-            resp = requests.get("https://serpapi.com/search", params=params, timeout=15)
+            resp = self.http.get("https://serpapi.com/search", params=params, timeout=15)
             if resp.status_code == 200:
-                return [r.get("link") for r in resp.json().get("organic_results", [])]
-        except: pass
+                results = resp.json().get("organic_results", [])
+                self.search_cache.set(query, params, results)
+                return [r.get("link") for r in results]
+            self.stdout.write(self.style.ERROR(f"   ❌ SerpAPI returned HTTP {resp.status_code}"))
+        except (requests.RequestException, ValueError) as e:
+            self.stdout.write(self.style.ERROR(f"   ❌ SerpAPI Failed: {e}"))
         return []
     
     def _clean_url(self, url):
@@ -171,156 +399,464 @@ class Command(BaseCommand):
         parsed = urlparse(url)
         return urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, '', ''))
 
-    def _is_duplicate(self, title, company, clean_url):
-        if Job.objects.filter(apply_url=clean_url).exists():
-            return True
-        # Check against last 30 days to prevent duplicates with slight URL variations
-        if Job.objects.filter(title__iexact=title, company__iexact=company, created_at__gte=timezone.now() - timedelta(days=30)).exists():
-            return True
-        return False
-
-    def analyze_and_fetch(self, url):
-        clean_url = self._clean_url(url)
-        
-        # Specialized Scrapers
+    def _match_board(self, clean_url):
+        """
+        Maps a cleaned posting URL to its ATS board as (source, token), or None.
+        """
+        match = None
         if "greenhouse.io" in clean_url:
-            match = re.search(r'(?:greenhouse\.io|eu\.greenhouse\.io|job-boards\.greenhouse\.io)/([^/]+)', clean_url)
-            if match: self.fetch_greenhouse_api(match.group(1)); return
+            source, match = "greenhouse", re.search(r'(?:greenhouse\.io|eu\.greenhouse\.io|job-boards\.greenhouse\.io)/([^/]+)', clean_url)
         elif "lever.co" in clean_url:
-            match = re.search(r'lever\.co/([^/]+)', clean_url)
-            if match: self.fetch_lever_api(match.group(1)); return
+            source, match = "lever", re.search(r'lever\.co/([^/]+)', clean_url)
         elif "ashbyhq.com" in clean_url:
-            match = re.search(r'jobs\.ashbyhq\.com/([^/]+)', clean_url)
-            if match: self.fetch_ashby_api(match.group(1)); return
+            source, match = "ashby", re.search(r'jobs\.ashbyhq\.com/([^/]+)', clean_url)
         elif "workable.com" in clean_url:
-            match = re.search(r'apply\.workable\.com/([^/]+)', clean_url) or re.search(r'([^.]+)\.workable\.com', clean_url)
-            if match: self.fetch_workable_api(match.group(1)); return
+            source, match = "workable", re.search(r'apply\.workable\.com/([^/]+)', clean_url) or re.search(r'([^.]+)\.workable\.com', clean_url)
         elif "smartrecruiters.com" in clean_url:
-            match = re.search(r'jobs\.smartrecruiters\.com/([^/]+)', clean_url) or re.search(r'([^.]+)\.smartrecruiters\.com', clean_url)
-            if match: self.fetch_smartrecruiters_api(match.group(1)); return
+            source, match = "smartrecruiters", re.search(r'jobs\.smartrecruiters\.com/([^/]+)', clean_url) or re.search(r'([^.]+)\.smartrecruiters\.com', clean_url)
+        elif "myworkdayjobs.com" in clean_url:
+            # Token is "<host>/<site>"; the optional locale segment (en-US) is not part of the site.
+            match = re.search(r'//([^/]+\.myworkdayjobs\.com)/(?:[a-z]{2}-[A-Z]{2}/)?([^/]+)/job/', clean_url)
+            return ("workday", f"{match.group(1)}/{match.group(2)}") if match else None
+        elif "bamboohr.com" in clean_url:
+            # Company subdomains only, and only their careers/jobs pages (not www, help, marketplace...).
+            match = re.search(r'//([^./]+)\.bamboohr\.com/(?:careers|jobs)\b', clean_url)
+            if match and match.group(1).lower() in BAMBOOHR_RESERVED: return None
+            source = "bamboohr"
+        return (source, match.group(1)) if match else None
 
-        # Fallback AI Scraper for generic ATS (Workday, Taleo, etc.)
-        if any(x in clean_url for x in ['myworkdayjobs.com', 'taleo.net', 'icims.com', 'jobvite.com', 'bamboohr.com']):
+    def analyze_and_fetch(self, url):
+        clean_url = self._clean_url(url)
+        
+        # Specialized Scrapers
+        board = self._match_board(clean_url)
+        if board:
+            source, token = board
+            due = self.registry.is_due(source, token)
+            self.registry.discover(source, token)
+            if due: self.process_board(source, token)
+            return
+
+        # Posting pages of ATSs without a board API (iCIMS, Jobvite, Taleo)
+        if any(x in clean_url for x in ['taleo.net', 'icims.com', 'jobvite.com']):
             # Ensure we are not scraping a search result page
             if any(k in clean_url for k in ['/job/', '/jobs/', '/detail/', '/req/', '/position/', '/career/']):
-                 self.fetch_generic_ai(clean_url)
+                if 'taleo.net' in clean_url: self.fetch_generic_ai(clean_url)
+                else: self.fetch_jsonld_posting(clean_url, "iCIMS" if 'icims.com' in clean_url else "Jobvite")
                  
-    def get_headers(self):
-        return {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'}
+    def prefetch_boards(self, links):
+        """
+        Downloads every not-yet-processed board referenced by `links` concurrently.
+        Results are parked in self.prefetched and consumed by the fetch_*_api methods,
+        which then build exactly the same payloads as the serial path.
+        """
+        boards, seen = [], set(self.processed_tokens)
+        for link in links:
+            board = self._match_board(self._clean_url(link))
+            if board and board[1] not in seen and self.registry.is_due(*board):
+                seen.add(board[1])
+                boards.append(board)
+        self._prefetch(boards)
+
+    def _prefetch(self, boards):
+        if boards:
+            # Validators are read up front: the ORM can't be used inside the event loop.
+            self.board_cache.prime([self._board_endpoint(*b)[1] for b in boards])
+            board_requests = []
+            for board in boards:
+                method, url = self._board_endpoint(*board)
+                board_requests.append((board, method, url, self._conditional_headers(method, url), BOARD_PAYLOADS.get(board[0])))
+            with self.metrics.stage("fetch"):
+                self.prefetched.update(asyncio.run(self._fetch_boards_async(board_requests)))
+
+    async def _fetch_boards_async(self, board_requests):
+        limit = asyncio.Semaphore(self.concurrency)
+        host_limits = {}
+
+        async with AsyncHttpClient(timeout=5, pool_size=self.concurrency, stats=self.http.stats, scheduler=self.http.scheduler) as client:
+            async def fetch(board, method, url, headers, payload):
+                host_limit = host_limits.setdefault(urlparse(url).netloc, asyncio.Semaphore(self.per_host))
+                async with limit, host_limit:
+                    try:
+                        return board, await client.request(method, url, headers=headers, json=payload)
+                    except httpx.HTTPError as e:
+                        self.stdout.write(f"      ❌ {board[0]} board '{board[1]}' failed: {e}")
+                        return board, None
+
+            results = await asyncio.gather(*(fetch(*r) for r in board_requests))
+        return dict(results)
+
+    def _board_endpoint(self, source, token):
+        method, url = BOARD_ENDPOINTS[source]
+        if source == "workday":
+            host, site = token.split("/", 1)
+            return method, url.format(host=host, tenant=host.split(".")[0], site=site)
+        return method, url.format(token=token)
+
+    def _conditional_headers(self, method, url):
+        # Only GET endpoints get If-None-Match / If-Modified-Since; POST boards rely on the body hash.
+        return self.board_cache.headers_for(url) if method == "GET" else {}
+
+    def _board_json(self, source, token):
+        """
+        Returns the decoded board listing, or None if the board is unavailable or unchanged
+        since the last processed fetch (304 / same body hash).
+        """
+        method, url = self._board_endpoint(source, token)
+        self.board_outcomes[(source, token)] = "unavailable"
+        if (source, token) in self.prefetched:
+            resp = self.prefetched.pop((source, token))
+            if resp is None: return None
+        else:
+            with self.metrics.stage("fetch"):
+                resp = self.http.request(method, url, timeout=5, headers=self._conditional_headers(method, url), json=BOARD_PAYLOADS.get(source))
+        if self.board_cache.is_unchanged(url, resp.status_code, resp.headers, resp.content):
+            self.board_outcomes[(source, token)] = "unchanged"
+            return None
+        if resp.status_code != 200: return None
+        data = resp.json()
+        self.board_outcomes[(source, token)] = "changed"
+        return data
+
+    def _finish_board(self, source, token, listed_urls):
+        """
+        Called once a changed board has been fully processed: deactivates our active jobs
+        from this board that it no longer lists, then persists the board's validators.
+        """
+        if listed_urls is not None:
+            closed = self.registry.close_unlisted(source, token, {self._clean_url(u) for u in listed_urls if u})
+            if closed:
+                self.total_closed += closed
+                self.stdout.write(self.style.WARNING(f"   🚫 Closed {closed} jobs no longer listed on {source} board '{token}'"))
+        # The board's postings must be stored before its validators, or a crash in between
+        # would make the next run treat the board as unchanged and never insert them.
+        self.writer.flush()
+        self.board_cache.commit(self._board_endpoint(source, token)[1])
 
-    # ... (API Fetchers for Greenhouse, Lever, etc. remain the same) ...
     def fetch_greenhouse_api(self, token):
         if token in self.processed_tokens: return
-        self.processed_tokens.add(token)
         try:
-            resp = requests.get(f"https://boards-api.greenhouse.io/v1/boards/{token}/jobs?content=true", headers=self.get_headers(), timeout=5)
-            if resp.status_code == 200:
-                for item in resp.json().get('jobs', []):
+            data = self._board_json("greenhouse", token)
+            if data is not None:
+                batch = []
+                for item in data.get('jobs', []):
                     if self.is_fresh(item.get('updated_at')):
                         raw_loc = item.get('location', {}).get('name')
                         clean_loc, arr = self._clean_location(raw_loc, "remote" in (raw_loc or "").lower())
-                        self.screen_and_upsert({
+                        batch.append({
                             "title": item.get('title'), "company": token.capitalize(), "location": clean_loc, 
                             "description": item.get('content'), "apply_url": item.get('absolute_url'), 
                             "work_arrangement": arr, "source": "Greenhouse"
                         })
-        except: pass
+                self.screen_and_upsert_many(batch)
+                self._finish_board("greenhouse", token, [item.get('absolute_url') for item in data.get('jobs', [])])
+        except Exception as e:
+            self.stdout.write(f"      ❌ Greenhouse ({token}) failed: {e}")
+        # Only once its postings are written and closures applied; an interrupted board is redone on --resume.
+        self.processed_tokens.add(token)
 
     def fetch_lever_api(self, token):
         if token in self.processed_tokens: return
-        self.processed_tokens.add(token)
         try:
-            resp = requests.get(f"https://api.lever.co/v0/postings/{token}?mode=json", headers=self.get_headers(), timeout=5)
-            if resp.status_code == 200:
-                for item in resp.json():
+            data = self._board_json("lever", token)
+            if data is not None:
+                batch = []
+                for item in data:
                     if item.get('createdAt') and datetime.fromtimestamp(item['createdAt']/1000.0, tz=timezone.utc) >= self.cutoff_date:
                         raw_loc = item.get('categories', {}).get('location')
                         clean_loc, arr = self._clean_location(raw_loc, "remote" in (raw_loc or "").lower())
-                        self.screen_and_upsert({
+                        batch.append({
                             "title": item.get('text'), "company": token.capitalize(), "location": clean_loc, 
                             "description": item.get('description'), "apply_url": item.get('hostedUrl'), 
                             "work_arrangement": arr, "source": "Lever"
                         })
-        except: pass
+                self.screen_and_upsert_many(batch)
+                self._finish_board("lever", token, [item.get('hostedUrl') for item in data])
+        except Exception as e:
+            self.stdout.write(f"      ❌ Lever ({token}) failed: {e}")
+        self.processed_tokens.add(token)
 
     def fetch_ashby_api(self, company):
         if company in self.processed_tokens: return
-        self.processed_tokens.add(company)
         try:
-            resp = requests.post("https://api.ashbyhq.com/posting-api/job-board/" + company, headers=self.get_headers(), timeout=5)
-            if resp.status_code == 200:
-                for item in resp.json().get('jobs', []):
+            data = self._board_json("ashby", company)
+            if data is not None:
+                batch = []
+                for item in data.get('jobs', []):
                     loc_obj = item.get('location') or {}
                     if isinstance(loc_obj, str): raw_loc = loc_obj
                     else: raw_loc = item.get('locationName') or "Remote"
                     clean_loc, arr = self._clean_location(raw_loc, item.get('isRemote', False))
-                    self.screen_and_upsert({
+                    batch.append({
                         "title": item.get('title'), "company": company.capitalize(), "location": clean_loc, 
                         "description": f"Full details at {item.get('jobUrl')}", "apply_url": item.get('jobUrl'), 
                         "work_arrangement": arr, "source": "Ashby"
                     })
-        except: pass
+                self.screen_and_upsert_many(batch)
+                self._finish_board("ashby", company, [item.get('jobUrl') for item in data.get('jobs', [])])
+        except Exception as e:
+            self.stdout.write(f"      ❌ Ashby ({company}) failed: {e}")
+        self.processed_tokens.add(company)
 
     def fetch_workable_api(self, sub):
         if sub in self.processed_tokens: return
-        self.processed_tokens.add(sub)
         try:
-            resp = requests.get(f"https://apply.workable.com/api/v1/widget/accounts/{sub}", headers=self.get_headers(), timeout=5)
-            if resp.status_code == 200:
-                for item in resp.json().get('jobs', []):
+            data = self._board_json("workable", sub)
+            if data is not None:
+                batch = []
+                for item in data.get('jobs', []):
                     if self.is_fresh(item.get('published_on')):
                         parts = [item.get('city'), item.get('state'), item.get('country')]
                         raw_loc = ", ".join([p for p in parts if p])
                         clean_loc, arr = self._clean_location(raw_loc, item.get('telecommuting', False))
-                        self.screen_and_upsert({
+                        batch.append({
                             "title": item.get('title'), "company": sub.capitalize(), "location": clean_loc, 
                             "description": item.get('description'), "apply_url": item.get('url'), 
                             "work_arrangement": arr, "source": "Workable"
                         })
-        except: pass
+                self.screen_and_upsert_many(batch)
+                self._finish_board("workable", sub, [item.get('url') for item in data.get('jobs', [])])
+        except Exception as e:
+            self.stdout.write(f"      ❌ Workable ({sub}) failed: {e}")
+        self.processed_tokens.add(sub)
 
     def fetch_smartrecruiters_api(self, company):
         if company in self.processed_tokens: return
+        try:
+            data = self._board_json("smartrecruiters", company)
+            if data is not None:
+                # Postings we already hold need neither a detail call nor screening.
+                fresh = [item for item in data.get('content', []) if self.is_fresh(item.get('releasedDate'))
+                         and not self.dedupe.is_duplicate(item.get('name'), company.capitalize(), f"https://jobs.smartrecruiters.com/{company}/{item.get('id')}")]
+                details = self._posting_details("smartrecruiters", company, {
+                    str(item.get('id')): (item.get('releasedDate') or "", f"https://api.smartrecruiters.com/v1/companies/{company}/postings/{item.get('id')}") for item in fresh
+                }, lambda d: d.get('jobAd',{}).get('sections',{}).get('jobDescription',{}).get('text',''))
+                batch = []
+                for item in fresh:
+                    desc = details.get(str(item.get('id')), "See Job Post")
+                    loc = item.get('location', {})
+                    parts = [loc.get('city'), loc.get('region'), loc.get('country')]
+                    raw_loc = ", ".join([p for p in parts if p])
+                    clean_loc, arr = self._clean_location(raw_loc, loc.get('remote', False))
+                    batch.append({
+                        "title": item.get('name'), "company": company.capitalize(), "location": clean_loc,
+                        "description": desc, "apply_url": f"https://jobs.smartrecruiters.com/{company}/{item.get('id')}", 
+                        "work_arrangement": arr, "source": "SmartRecruiters"
+                    })
+                # The postings endpoint is paginated; only a complete listing can be used for closures.
+                listed = [f"https://jobs.smartrecruiters.com/{company}/{item.get('id')}" for item in data.get('content', [])]
+                self.screen_and_upsert_many(batch)
+                self._finish_board("smartrecruiters", company, listed if data.get('totalFound', 0) <= len(listed) else None)
+        except Exception as e:
+            self.stdout.write(f"      ❌ SmartRecruiters ({company}) failed: {e}")
         self.processed_tokens.add(company)
+
+    def fetch_workday_api(self, token):
+        if token in self.processed_tokens: return
+        company = board_company("workday", token)
         try:
-            resp = requests.get(f"https://api.smartrecruiters.com/v1/companies/{company}/postings", headers=self.get_headers(), timeout=5)
-            if resp.status_code == 200:
-                for item in resp.json().get('content', []):
-                    if self.is_fresh(item.get('releasedDate')):
-                        try:
-                            d = requests.get(f"https://api.smartrecruiters.com/v1/companies/{company}/postings/{item.get('id')}", timeout=3).json()
-                            desc = d.get('jobAd',{}).get('sections',{}).get('jobDescription',{}).get('text','')
-                        except: desc = "See Job Post"
-                        loc = item.get('location', {})
-                        parts = [loc.get('city'), loc.get('region'), loc.get('country')]
-                        raw_loc = ", ".join([p for p in parts if p])
-                        clean_loc, arr = self._clean_location(raw_loc, loc.get('remote', False))
-                        self.screen_and_upsert({
-                            "title": item.get('name'), "company": company.capitalize(), "location": clean_loc,
-                            "description": desc, "apply_url": f"https://jobs.smartrecruiters.com/{company}/{item.get('id')}", 
-                            "work_arrangement": arr, "source": "SmartRecruiters"
-                        })
-        except: pass
+            data = self._board_json("workday", token)
+            if data is not None:
+                host, site = token.split("/", 1)
+                tenant = host.split(".")[0]
+                postings, total = list(data.get('jobPostings', [])), data.get('total', 0)
+                # The listing comes newest first: stop paging once a page ends past the cutoff.
+                url = self._board_endpoint("workday", token)[1]
+                for _ in range(WORKDAY_MAX_PAGES - 1):
+                    if len(postings) >= total or not self._workday_fresh(postings[-1].get('postedOn')): break
+                    with self.metrics.stage("fetch"):
+                        page = self.http.post(url, timeout=5, json=dict(BOARD_PAYLOADS["workday"], offset=len(postings))).json().get('jobPostings', [])
+                    if not page: break
+                    postings.extend(page)
+
+                fresh = [item for item in postings if self._workday_fresh(item.get('postedOn'))
+                         and not self.dedupe.is_duplicate(item.get('title'), company, f"https://{host}/{site}{item.get('externalPath', '')}")]
+                details = self._posting_details("workday", company, {
+                    self._workday_id(item): ("", f"https://{host}/wday/cxs/{tenant}/{site}{item.get('externalPath', '')}") for item in fresh
+                }, lambda d: d.get('jobPostingInfo', {}).get('jobDescription', ''))
+                batch = []
+                for item in fresh:
+                    raw_loc = item.get('locationsText')
+                    clean_loc, arr = self._clean_location(raw_loc, "remote" in (raw_loc or "").lower())
+                    batch.append({
+                        "title": item.get('title'), "company": company, "location": clean_loc,
+                        "description": details.get(self._workday_id(item), "See Job Post"), "apply_url": f"https://{host}/{site}{item.get('externalPath', '')}",
+                        "work_arrangement": arr, "source": "Workday"
+                    })
+                # Only a fully paged listing can be used for closures.
+                listed = [f"https://{host}/{site}{item.get('externalPath', '')}" for item in postings]
+                self.screen_and_upsert_many(batch)
+                self._finish_board("workday", token, listed if len(postings) >= total else None)
+        except Exception as e:
+            self.stdout.write(f"      ❌ Workday ({token}) failed: {e}")
+        self.processed_tokens.add(token)
+
+    def _workday_fresh(self, posted_on):
+        # "Posted Today", "Posted Yesterday", "Posted 3 Days Ago", "Posted 30+ Days Ago"
+        match = re.search(r'(\d+)(\+?)', posted_on or "")
+        if not match: return True
+        days = int(match.group(1)) + (1 if match.group(2) else 0)
+        return timezone.now() - timedelta(days=days) >= self.cutoff_date
+
+    @staticmethod
+    def _workday_id(item):
+        # bulletFields holds the requisition id; the path tail is unique too.
+        return ((item.get('bulletFields') or [None])[0] or (item.get('externalPath') or "").rsplit('/', 1)[-1])[:100]
+
+    def fetch_bamboohr_api(self, token):
+        if token in self.processed_tokens: return
+        company = board_company("bamboohr", token)
+        try:
+            data = self._board_json("bamboohr", token)
+            if data is not None:
+                openings = data.get('result', [])
+                # The list carries no posting dates: every open posting we don't hold yet is screened.
+                fresh = [item for item in openings if not self.dedupe.is_duplicate(item.get('jobOpeningName'), company, f"https://{token}.bamboohr.com/careers/{item.get('id')}")]
+                details = self._posting_details("bamboohr", company, {
+                    str(item.get('id')): ("", f"https://{token}.bamboohr.com/careers/{item.get('id')}/detail") for item in fresh
+                }, lambda d: d.get('result', {}).get('jobOpening', {}).get('description', ''))
+                batch = []
+                for item in fresh:
+                    loc = item.get('atsLocation') or item.get('location') or {}
+                    parts = [loc.get('city'), loc.get('state') or loc.get('province'), loc.get('country')]
+                    raw_loc = ", ".join([p for p in parts if p])
+                    clean_loc, arr = self._clean_location(raw_loc, bool(item.get('isRemote')) or str(item.get('locationType')) == "1")
+                    batch.append({
+                        "title": item.get('jobOpeningName'), "company": company, "location": clean_loc,
+                        "description": details.get(str(item.get('id')), "See Job Post"), "apply_url": f"https://{token}.bamboohr.com/careers/{item.get('id')}",
+                        "work_arrangement": arr, "source": "BambooHR"
+                    })
+                self.screen_and_upsert_many(batch)
+                self._finish_board("bamboohr", token, [f"https://{token}.bamboohr.com/careers/{item.get('id')}" for item in openings])
+        except Exception as e:
+            self.stdout.write(f"      ❌ BambooHR ({token}) failed: {e}")
+        self.processed_tokens.add(token)
+
+    def fetch_jsonld_posting(self, url, source):
+        """
+        iCIMS and Jobvite have no public board API, but their posting pages embed a
+        schema.org JobPosting. Reads that directly; only pages without one go to the AI scraper.
+        """
+        if self.dedupe.has_url(url): return
+        ld = None
+        # iCIMS serves the posting inside an iframe page.
+        for page_url in [url, f"{url}?in_iframe=1"] if source == "iCIMS" else [url]:
+            try:
+                with self.metrics.stage("fetch"):
+                    resp = self.http.get(page_url, timeout=15, allow_redirects=True, stream=True)
+                    page = read_capped(resp) if resp.status_code == 200 else None
+            except requests.RequestException as e:
+                self.stdout.write(f"      ❌ {source} ({url}) failed: {e}")
+                return
+            if page is None:
+                resp.close()
+                return
+            ld = job_posting_ld(page)
+            if ld: break
+        # The AI scraper reuses the page just downloaded (the iframe page for iCIMS).
+        if ld is None: return self.fetch_generic_ai(url, page=page, resp=resp)
+        if not self.is_fresh(ld.get('datePosted')): return
+
+        org = ld.get('hiringOrganization') or {}
+        places = ld.get('jobLocation') or []
+        if isinstance(places, dict): places = [places]
+        addr = (places[0].get('address') if places and isinstance(places[0], dict) else None) or {}
+        if isinstance(addr, str): raw_loc = addr
+        else:
+            country = addr.get('addressCountry')
+            if isinstance(country, dict): country = country.get('name')
+            raw_loc = ", ".join([p for p in [addr.get('addressLocality'), addr.get('addressRegion'), country] if p])
+        clean_loc, arr = self._clean_location(raw_loc, ld.get('jobLocationType') == "TELECOMMUTE")
+        self.screen_and_upsert({
+            "title": html.unescape(ld.get('title') or ""), "company": org.get('name') if isinstance(org, dict) else org, "location": clean_loc,
+            "description": html.unescape(ld.get('description') or ""), "apply_url": url, "work_arrangement": arr, "source": source
+        })
+
+    def _posting_details(self, source, company, postings, parse):
+        """
+        Returns {posting id: description} for postings = {posting id: (released, detail url)}.
+        A posting whose (company, id, released) was fetched before is served from PostingDetail;
+        the rest are fetched concurrently (one by one with --serial), parsed with
+        parse(json) and cached. Failed fetches are simply left out.
+        """
+        if not postings: return {}
+        details = {}
+        for pid, rel, desc in PostingDetail.objects.filter(source=source, company=company, posting_id__in=list(postings)).values_list('posting_id', 'released', 'description'):
+            if postings[pid][0] == rel: details[pid] = desc
+
+        urls = {pid: url for pid, (_, url) in postings.items() if pid not in details}
+        self.metrics.count("detail_cache_hits", len(details))
+        self.metrics.count("detail_fetches", len(urls))
+        if not urls: return details
+        with self.metrics.stage("fetch"):
+            if self.serial:
+                fetched = {}
+                for pid, url in urls.items():
+                    try: fetched[pid] = parse(self.http.get(url, timeout=3, retries=1).json())
+                    except (requests.RequestException, ValueError): pass
+            else:
+                fetched = asyncio.run(self._fetch_details_async(urls, parse))
+
+        now = timezone.now()
+        PostingDetail.objects.bulk_create(
+            [PostingDetail(source=source, company=company, posting_id=pid, released=postings[pid][0], description=desc, fetched_at=now) for pid, desc in fetched.items()],
+            update_conflicts=True, unique_fields=["source", "company", "posting_id"], update_fields=["released", "description", "fetched_at"],
+        )
+        details.update(fetched)
+        return details
+
+    async def _fetch_details_async(self, urls, parse):
+        # All detail calls of a board hit one host, so the per-host limit bounds the pool.
+        limit = asyncio.Semaphore(self.per_host)
+
+        async with AsyncHttpClient(timeout=3, retries=1, pool_size=self.per_host, stats=self.http.stats, scheduler=self.http.scheduler) as client:
+            async def fetch(pid, url):
+                async with limit:
+                    try:
+                        return pid, parse((await client.get(url)).json())
+                    except (httpx.HTTPError, ValueError):
+                        return pid, None
+
+            results = await asyncio.gather(*(fetch(pid, url) for pid, url in urls.items()))
+        return {pid: desc for pid, desc in results if desc is not None}
 
-    def fetch_generic_ai(self, url):
-        if self._is_duplicate("", "", url): return 
+    def fetch_generic_ai(self, url, page=None, resp=None):
+        """
+        Extracts a posting from an arbitrary page with the LLM. A caller that already
+        downloaded the page passes it (with its response) so it isn't fetched twice.
+        """
+        if self.dedupe.has_url(url): return
         self.stdout.write(f"   🤖 AI Scraping: {url}...")
         try:
-            resp = requests.get(url, headers=self.get_headers(), timeout=15, allow_redirects=True)
-            if resp.status_code != 200 or "/search" in resp.url or "/jobs" == resp.url.split('/')[-1]: return
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            for tag in soup(["script", "style", "nav", "footer", "iframe", "noscript", "header"]): tag.extract()
-            text = " ".join(soup.get_text(separator=' ').split())[:60000]
+            if page is None:
+                # Streamed and capped: only the start of the main content ever reaches the prompt.
+                with self.metrics.stage("fetch"):
+                    resp = self.http.get(url, timeout=15, allow_redirects=True, stream=True, headers=self.page_cache.headers_for(url))
+                    page = read_capped(resp) if resp.status_code == 200 else None
+                if resp.status_code == 304: self.page_cache.is_unchanged(url, 304, resp.headers, b"")
+                if page is None:
+                    resp.close()
+                    return
+            if "/search" in resp.url or "/jobs" == resp.url.split('/')[-1]: return
+            # One block per line, so the compactor can tell the page header and "Label: value" lines apart.
+            text = main_text(page, limit=16000, lines=True)
             if len(text) < 250: return
+            # Same extracted text as the last successful scrape: the LLM has already seen it.
+            if self.page_cache.is_unchanged(url, 200, resp.headers, text):
+                self.stdout.write("      ⏭️ Page unchanged since last scrape.")
+                return
             
-            prompt = f"Extract title, company, location (format: City, State, Country), is_remote, description_html (clean HTML) as JSON from: {text[:4000]}"
-            completion = self.client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": prompt}], response_format={"type": "json_object"})
+            prompt = f"Extract title, company, location (format: City, State, Country), is_remote, description_html (clean HTML) as JSON from: {self.page_compactor.compact(text)}"
+            with self.metrics.stage("extract"):
+                completion = self.client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": prompt}], response_format={"type": "json_object"})
             data = json.loads(completion.choices[0].message.content)
             clean_loc, arr = self._clean_location(data.get('location'), data.get('is_remote', False))
             self.screen_and_upsert({
                 "title": data.get('title'), "company": data.get('company'), "location": clean_loc,
                 "description": data.get('description_html') or data.get('description'), "apply_url": url, "work_arrangement": arr, "source": "AI Scraper"
             })
+            self.writer.flush()
+            self.page_cache.commit(url)
         except Exception as e:
             self.stdout.write(f"      ❌ AI Failed: {e}")
 
@@ -337,57 +873,70 @@ class Command(BaseCommand):
         except: return True
     
     def screen_and_upsert(self, job_data):
-        clean_url = self._clean_url(job_data.get("apply_url"))
-        if self._is_duplicate(job_data.get("title"), job_data.get("company"), clean_url): return
-        analysis = self.screener.screen(job_data.get("title",""), job_data.get("company"), job_data.get("location"), job_data.get("description"), clean_url)
+        self.screen_and_upsert_many([job_data])
+
+    def screen_and_upsert_many(self, batch):
+        """
+        Dedupes a board's postings, screens the survivors together (screener.screen_many:
+        LLM calls run concurrently) and upserts them in their original order.
+        """
+        fresh, seen = [], set()
+        for job_data in batch:
+            job_data = dict(job_data, apply_url=self._clean_url(job_data.get("apply_url")))
+            # Exact URL, or same title + company within 30 days (slight URL variations)
+            self.metrics.count("postings_seen")
+            with self.metrics.stage("dedupe"):
+                key = (job_data["apply_url"], self.dedupe.make_key(job_data.get("title"), job_data.get("company")))
+                if key[0] in seen or key[1] in seen or self.dedupe.is_duplicate(job_data.get("title"), job_data.get("company"), job_data["apply_url"]): continue
+            seen.update(key)
+            fresh.append(job_data)
+        if not fresh: return
+        with self.metrics.stage("screen"):
+            analyses = self.screener.screen_many(fresh, workers=self.screen_workers, batch_size=self.screen_batch)
+        for job_data, analysis in zip(fresh, analyses):
+            self._upsert(job_data, analysis)
+
+    def _upsert(self, job_data, analysis):
+        clean_url = job_data["apply_url"]
         score = float(analysis.get("score", 50.0))
+        self.board_yield["postings"] += 1
+        self.metrics.count(f"screened_{analysis.get('status', 'pending')}")
         if score <= 0: return
 
         status = analysis.get("status", "pending")
         signals = analysis.get("details", {}).get("signals", {})
         
-        job = Job.objects.create(
+        job = Job(
             title=job_data.get("title"), company=job_data.get("company"), company_logo=self.resolve_logo(job_data.get("company")),
             location=job_data.get("location"), work_arrangement=job_data.get("work_arrangement"),
             description=job_data.get("description"), apply_url=clean_url,
             role_type=signals.get("role_type", "full_time"), screening_status=status,
             screening_score=score, screening_reason=analysis.get("reason", ""),
-            is_active=(status == "approved"), screened_at=timezone.now(), tags=f"{job_data.get('source')}"
+            is_active=(status == "approved"), screened_at=timezone.now(), tags=f"{job_data.get('source')}",
+            fetch_run=self.run,
         )
+        tools = []
         for t in signals.get("stack", []):
             t_obj = self.tool_cache.get(self.screener._normalize(t))
-            if t_obj: job.tools.add(t_obj)
+            if t_obj: tools.append(t_obj)
+        self.writer.add(job, tools)
+        self.dedupe.add(job.title, job.company, clean_url)
         if status == "approved": 
             self.total_added += 1
+            self.board_yield["approvals"] += 1
             self.stdout.write(self.style.SUCCESS(f"   ✅ {job.title}"))
 
-    def resolve_location_automatically(self, raw_loc):
-        if not raw_loc or len(raw_loc) < 3: return raw_loc
-        if raw_loc in self.location_cache: return self.location_cache[raw_loc]
-        try:
-            location = self.geolocator.geocode(raw_loc, language="en", addressdetails=True, timeout=10)
-            if location:
-                addr = location.raw.get('address', {})
-                city = addr.get('city') or addr.get('town') or addr.get('village') or addr.get('county')
-                state = addr.get('state') or addr.get('region')
-                country = addr.get('country')
-                parts = [p for p in [city, state, country] if p]
-                formatted_loc = ", ".join(parts)
-                self.location_cache[raw_loc] = formatted_loc
-                return formatted_loc
-        except: pass
-        return raw_loc
-
     def _clean_location(self, location_str, is_remote_flag):
         if not location_str: return "Remote", 'remote'
-        clean_loc = location_str.strip().replace(' | ', ', ').replace('/', ', ').replace('(', '').replace(')', '')
-        clean_loc = re.sub(r'\s*,\s*', ', ', clean_loc)
-        loc_lower = clean_loc.lower()
-        arrangement = 'onsite'
-        if is_remote_flag or any(k in loc_lower for k in {'remote', 'anywhere', 'wfh', 'work from home'}): 
-            arrangement = 'remote'
-        elif any(k in loc_lower for k in {'hybrid', 'flexible'}): 
-            arrangement = 'hybrid'
-        if arrangement != 'remote':
-            clean_loc = self.resolve_location_automatically(clean_loc)
+        with self.metrics.stage("normalize"):
+            clean_loc = location_str.strip().replace(' | ', ', ').replace('/', ', ').replace('(', '').replace(')', '')
+            clean_loc = re.sub(r'\s*,\s*', ', ', clean_loc)
+            loc_lower = clean_loc.lower()
+            arrangement = 'onsite'
+            if is_remote_flag or any(k in loc_lower for k in {'remote', 'anywhere', 'wfh', 'work from home'}): 
+                arrangement = 'remote'
+            elif any(k in loc_lower for k in {'hybrid', 'flexible'}): 
+                arrangement = 'hybrid'
+            if arrangement != 'remote':
+                clean_loc = self.geocoder.resolve(clean_loc)
         return clean_loc, arrangement
@@ -1,65 +1,133 @@
 import feedparser
 import time
 import re
-import requests
 import os
+import asyncio
+import json
+import httpx
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from geopy.geocoders import Nominatim
-from jobs.models import Job, Tool
+from jobs.caches import ConditionalCache
+from jobs.dedupe import DedupeIndex
+from jobs.geocoding import Geocoder
+from jobs.http import HttpClient, AsyncHttpClient
+from jobs.metrics import StageMetrics
+from jobs.models import Job, RssFeed, Tool
 from jobs.screener import MarTechScreener
+from jobs.writer import JobWriter
 
 class Command(BaseCommand):
     help = 'Fetches high-quality MarTech jobs from RSS Feeds with Geocoding & Smart Parsing'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Screened entries buffered per bulk insert.')
+        parser.add_argument('--refresh', action='store_true', help='Ignore stored ETag/Last-Modified/hash validators and re-read every feed.')
+        parser.add_argument('--screen-workers', type=int, default=4, help='Concurrent LLM screening calls per feed.')
+
     def handle(self, *args, **options):
         self.stdout.write("📡 Starting Smart RSS Import...")
         
         # 1. SETUP
         self.screener = MarTechScreener()
+        self.screen_workers = options.get('screen_workers') or 4
         self.tool_cache = {self.screener._normalize(t.name): t for t in Tool.objects.all()}
-        self.geolocator = Nominatim(user_agent="martechstack_rss_bot_v1")
-        self.location_cache = {}
+        self.geocoder = Geocoder(user_agent="martechstack_rss_bot_v1").load()
         self.total_added = 0
+        self.metrics = StageMetrics("fetch_rss")
+        self.writer = JobWriter(batch_size=options.get('batch_size') or 50, metrics=self.metrics)
+        self.http = HttpClient(timeout=15)
+        self.dedupe = DedupeIndex().load()
+        self.feed_cache = ConditionalCache(force=options.get('refresh', False))
 
-        # 2. FEED LIST
-        feeds = [
-            {
-                "name": "WeWorkRemotely",
-                "url": "https://weworkremotely.com/categories/remote-marketing-jobs.rss",
-                "tag": "WWR"
-            },
-            {
-                "name": "Remotive",
-                "url": "https://remotive.com/remote-jobs/marketing/feed",
-                "tag": "Remotive"
-            },
-            {
-                "name": "RemoteOK",
-                "url": "https://remoteok.com/remote-marketing-jobs.rss",
-                "tag": "RemoteOK"
-            }
-        ]
+        # 2. FEED LIST (admin-managed RssFeed rows, else settings.RSS_FEEDS)
+        if RssFeed.objects.exists():
+            feeds = list(RssFeed.objects.filter(is_active=True).values('name', 'url', 'tag'))
+        else:
+            feeds = settings.RSS_FEEDS
 
+        # 3. FETCH ALL FEEDS IN PARALLEL, THEN PROCESS IN ORDER
+        self.feed_cache.prime([f['url'] for f in feeds])
+        with self.metrics.stage("fetch"):
+            responses = asyncio.run(self.fetch_feeds(feeds)) if feeds else {}
         for feed_config in feeds:
-            self.process_feed(feed_config)
+            self.process_feed(feed_config, responses.get(feed_config['url']))
 
+        self.writer.flush()
         self.stdout.write(self.style.SUCCESS(f"\n✨ RSS Import Complete! Added {self.total_added} new jobs."))
+        self.stdout.write(f"🗂️ Feed cache: {self.feed_cache.summary()}")
+        self.stdout.write(f"📍 Geocoding: {self.geocoder.summary()}")
+        self.stdout.write(f"♻️ Skipped {self.dedupe.skipped} duplicate entries.")
+        self.stdout.write(f"🧠 Verdict cache: {self.screener.verdicts.summary()}")
+        self.stdout.write(f"⛔ Block rules: {self.screener.block_summary()}")
+        self.stdout.write(f"🤖 Pre-classifier: {self.screener.classifier_summary()}")
+        self.stdout.write(f"✂️ Screener prompts: {self.screener.compactor.summary()}")
+        self.http.stats.write(self.stdout)
+
+        self.metrics.cache("feeds", self.feed_cache.unchanged, self.feed_cache.changed)
+        self.metrics.cache("geocoding", self.geocoder.hits, self.geocoder.lookups)
+        self.metrics.cache("verdicts", self.screener.verdicts.hits, self.screener.verdicts.misses)
+        self.metrics.count("duplicates_skipped", self.dedupe.skipped)
+        self.metrics.count("blocked", sum(self.screener.blocked.values()))
+        for tier, n in self.screener.tiers.items(): self.metrics.count(f"classifier_{tier}", n)
+        self.metrics.count("screener_prompts_compacted", self.screener.compactor.calls)
+        self.metrics.count("screener_prompt_tokens_saved", self.screener.compactor.tokens_in - self.screener.compactor.tokens_out)
+        self.metrics.count("jobs_written", self.writer.written)
+        report = self.metrics.save().report
+        self.stdout.write("\n📊 Run report:\n" + json.dumps(report, indent=2))
+
+    async def fetch_feeds(self, feeds):
+        """
+        Downloads every feed concurrently with conditional headers; returns {url: response or None}.
+        """
+        async with AsyncHttpClient(timeout=15, stats=self.http.stats, scheduler=self.http.scheduler) as client:
+            async def fetch(config):
+                try:
+                    return config['url'], await client.get(config['url'], headers=self.feed_cache.headers_for(config['url']))
+                except httpx.HTTPError as e:
+                    self.stdout.write(self.style.ERROR(f"   ❌ {config['name']} failed: {e}"))
+                    return config['url'], None
 
-    def process_feed(self, config):
+            results = await asyncio.gather(*(fetch(f) for f in feeds))
+        return dict(results)
+
+    def process_feed(self, config, resp):
         self.stdout.write(f"\n🔌 Connecting to {config['name']}...")
+        if resp is None: return
         try:
-            feed = feedparser.parse(config['url'])
-            self.stdout.write(f"   Found {len(feed.entries)} entries. Analyzing...")
+            # 304, or a body identical to the last fully processed one: nothing to parse.
+            if self.feed_cache.is_unchanged(config['url'], resp.status_code, resp.headers, resp.content):
+                self.stdout.write("   ⏭️ Feed unchanged since last run.")
+                return
+            if resp.status_code != 200:
+                self.stdout.write(self.style.ERROR(f"   ❌ Failed: HTTP {resp.status_code}"))
+                return
+            feed = feedparser.parse(resp.content)
+            # Known links are dropped up front against the in-memory dedupe index (no per-entry queries).
+            with self.metrics.stage("dedupe"):
+                entries = [entry for entry in feed.entries if not self.dedupe.has_url(entry.get('link', ''))]
+            self.metrics.count("entries_seen", len(feed.entries))
+            self.stdout.write(f"   Found {len(feed.entries)} entries, {len(entries)} new. Analyzing...")
 
-            for entry in feed.entries:
-                self.process_entry(entry, config['tag'])
+            seen = set()
+            items = [item for item in (self.prepare_entry(entry, config['tag'], seen) for entry in entries) if item]
+            if items:
+                with self.metrics.stage("screen"):
+                    analyses = self.screener.screen_many(items, workers=self.screen_workers)
+                for item, analysis in zip(items, analyses):
+                    self.store_entry(item, analysis)
+            # Store the entries before the validators, so an interrupted run re-reads the feed.
+            self.writer.flush()
+            self.feed_cache.commit(config['url'])
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"   ❌ Failed: {e}"))
 
-    def process_entry(self, entry, source_tag):
+    def prepare_entry(self, entry, source_tag, seen):
+        """
+        Extracts company, title, location and logo from an entry; None for duplicates
+        (stored ones, or ones already in `seen`, this feed's links and title/company keys).
+        """
         link = entry.get('link', '')
-        if Job.objects.filter(apply_url=link).exists(): return
 
         # --- 1. SMART DATA EXTRACTION ---
         title_raw = entry.get('title', 'Unknown Role')
@@ -67,13 +135,18 @@ class Command(BaseCommand):
         
         # A. Extract Company & Title
         company, title = self.extract_company_and_title(title_raw, author_raw)
+        with self.metrics.stage("dedupe"):
+            key = self.dedupe.make_key(title, company)
+            if link in seen or key in seen or self.dedupe.is_duplicate(title, company, link): return None
+            seen.update((link, key))
         
-        # B. Extract Location (The Hard Part)
-        raw_loc = self.extract_location_from_rss(entry, title_raw)
-        
-        # C. Geocode Location
-        # Assume remote for RSS feeds unless specified otherwise
-        clean_loc, arr = self._clean_location(raw_loc, is_remote_flag=True)
+        with self.metrics.stage("normalize"):
+            # B. Extract Location (The Hard Part)
+            raw_loc = self.extract_location_from_rss(entry, title_raw)
+
+            # C. Geocode Location
+            # Assume remote for RSS feeds unless specified otherwise
+            clean_loc, arr = self._clean_location(raw_loc, is_remote_flag=True)
 
         # --- 2. LOGO RESOLUTION ---
         logo_url = None
@@ -81,40 +154,44 @@ class Command(BaseCommand):
             domain_guess = company.lower().replace(' ', '').replace(',', '').replace('.', '')
             logo_url = f"https://www.google.com/s2/favicons?domain={domain_guess}.com&sz=128"
 
-        # --- 3. SCREENING ---
         description = entry.get('summary', '') or entry.get('description', '')
-        
-        analysis = self.screener.screen(
-            title=title, company=company, location=clean_loc, 
-            description=description, apply_url=link
-        )
+        return {
+            "title": title, "company": company, "location": clean_loc, "work_arrangement": arr,
+            "description": description, "apply_url": link, "logo_url": logo_url, "tag": source_tag,
+        }
 
+    def store_entry(self, item, analysis):
+        # --- 3. SCREENING (done for the whole feed by screen_many) ---
+        title, company, link = item["title"], item["company"], item["apply_url"]
         status = analysis.get("status", "pending")
+        self.metrics.count(f"screened_{status}")
         if status == "rejected": return
 
         # --- 4. SAVE ---
         signals = analysis.get("details", {}).get("signals", {})
         
-        job = Job.objects.create(
+        job = Job(
             title=title,
             company=company,
-            company_logo=logo_url,
-            location=clean_loc,
-            work_arrangement=arr,
-            description=description,
+            company_logo=item["logo_url"],
+            location=item["location"],
+            work_arrangement=item["work_arrangement"],
+            description=item["description"],
             apply_url=link,
             role_type="full_time",
             screening_status=status,
             screening_score=analysis.get("score", 50.0),
             screening_reason=analysis.get("reason", "RSS Import"),
             is_active=(status == "approved"),
-            tags=f"RSS, {source_tag}",
+            tags=f"RSS, {item['tag']}",
             screened_at=timezone.now()
         )
-
+        tools = []
         for tool_name in signals.get("stack", []):
             t_obj = self.tool_cache.get(self.screener._normalize(tool_name))
-            if t_obj: job.tools.add(t_obj)
+            if t_obj: tools.append(t_obj)
+        self.writer.add(job, tools)
+        self.dedupe.add(title, company, link)
 
         if status == "approved":
             self.total_added += 1
@@ -172,28 +249,6 @@ class Command(BaseCommand):
                 
         return "Remote"
 
-    def resolve_location_automatically(self, raw_loc):
-        """
-        Geocoding Logic (Shared with API Hunter)
-        """
-        if not raw_loc or len(raw_loc) < 3: return raw_loc
-        if raw_loc in self.location_cache: return self.location_cache[raw_loc]
-        
-        try:
-            location = self.geolocator.geocode(raw_loc, language="en", addressdetails=True, timeout=5)
-            if location:
-                addr = location.raw.get('address', {})
-                city = addr.get('city') or addr.get('town') or addr.get('village') or addr.get('county')
-                state = addr.get('state') or addr.get('region')
-                country = addr.get('country')
-                parts = [p for p in [city, state, country] if p]
-                formatted_loc = ", ".join(parts)
-                self.location_cache[raw_loc] = formatted_loc
-                return formatted_loc
-        except: pass
-        
-        return raw_loc
-
     def _clean_location(self, location_str, is_remote_flag):
         if not location_str: return "Remote", 'remote'
         
@@ -211,8 +266,8 @@ class Command(BaseCommand):
         # Automatic Resolution if we have a specific city name
         if arrangement == 'remote' and clean_loc.lower() != "remote":
              # Even if remote, if they said "Remote (London)", we want to standardize "London"
-             clean_loc = self.resolve_location_automatically(clean_loc)
+             clean_loc = self.geocoder.resolve(clean_loc)
         elif arrangement != 'remote':
-             clean_loc = self.resolve_location_automatically(clean_loc)
+             clean_loc = self.geocoder.resolve(clean_loc)
 
         return clean_loc, arrangement
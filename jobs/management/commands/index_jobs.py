@@ -5,6 +5,7 @@ from django.core.management.base import BaseCommand
 from django.conf import settings
 from google.oauth2 import service_account
 from google.auth.transport.requests import Request
+from jobs.http import HttpClient
 from jobs.models import Job
 
 class Command(BaseCommand):
@@ -54,6 +55,7 @@ class Command(BaseCommand):
              return
 
         success_count = 0
+        http = HttpClient(timeout=10)
         
         for job in jobs:
             url = f"{settings.DOMAIN_URL}/job/{job.id}/{job.slug}/"
@@ -62,7 +64,7 @@ class Command(BaseCommand):
             headers = {"Authorization": f"Bearer {creds.token}"}
             
             try:
-                resp = requests.post(endpoint, json=payload, headers=headers)
+                resp = http.post(endpoint, json=payload, headers=headers)
                 
                 if resp.status_code == 200:
                     self.stdout.write(self.style.SUCCESS(f"   ✅ Pinged: {job.title}"))
@@ -74,7 +76,8 @@ class Command(BaseCommand):
                     return # Stop trying, all will fail
                 else:
                     self.stdout.write(self.style.ERROR(f"   ❌ Failed ({resp.status_code}): {resp.text}"))
-            except Exception as e:
+            except requests.RequestException as e:
                 self.stdout.write(self.style.ERROR(f"   ❌ Request Error: {e}"))
 
         self.stdout.write(self.style.SUCCESS(f"\n✨ Done. Successfully indexed {success_count} jobs."))
+        http.stats.write(self.stdout)
@@ -0,0 +1,27 @@
+import argparse
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from jobs.replay import Archive, activate
+
+
+class Command(BaseCommand):
+    help = 'Runs an ingestion command live and records every outbound HTTP/LLM exchange into an archive for benchmark_ingest.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help='Path of the archive to write (JSON lines).')
+        parser.add_argument('target', help='Command to run, e.g. fetch_jobs or fetch_rss.')
+        parser.add_argument('target_args', nargs=argparse.REMAINDER, help='Arguments passed through to the command.')
+
+    def handle(self, *args, **options):
+        archive = Archive(options['archive'])
+        self.stdout.write(f"⏺️ Recording {options['target']} {' '.join(options['target_args'])} -> {archive.path}")
+        with activate("record", archive) as session:
+            try:
+                call_command(options['target'], *options['target_args'], stdout=self.stdout, stderr=self.stderr)
+            finally:
+                archive.save()
+        self.stdout.write(self.style.SUCCESS(f"\n💾 Saved {len(archive.exchanges)} exchanges to {archive.path}"))
+        for stage in sorted(session.stage_calls):
+            self.stdout.write(f"   {stage}: {session.stage_calls[stage]} calls, {session.stage_time[stage]:.1f}s")
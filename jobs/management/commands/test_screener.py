@@ -1,49 +1,164 @@
-from django.core.management.base import BaseCommand
+import os
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from jobs.classifier import precision_recall
+from jobs.metrics import StageMetrics, percentile
+from jobs.models import ScreeningLabel
+from jobs.replay import Archive, activate
 from jobs.screener import MarTechScreener
 
+FIELDS = ('key', 'title', 'company', 'description', 'source', 'status')
+
+
 class Command(BaseCommand):
-    help = 'Simulates the AI Screener on test cases to verify the "Strict Trap" logic.'
+    help = ('Benchmarks MarTechScreener on a labelled corpus of past jobs (ScreeningLabel): agreement with the '
+            'recorded approve/reject decisions, per-stage latency, and tokens and cost per 1,000 postings.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--export', metavar='PATH', help='Write the labelled corpus (approved/rejected labels) to PATH as JSON lines and exit.')
+        parser.add_argument('--corpus', metavar='PATH', help='Corpus written by --export (default: read the screening labels).')
+        parser.add_argument('--limit', type=int, default=500, help='Labels taken from the database: review decisions first, then the most recent.')
+        parser.add_argument('--min-per-class', type=int, default=20, help='Refuse to benchmark with fewer approved or rejected labels than this.')
+        parser.add_argument('--llm', choices=['stub', 'live', 'record'], default='stub',
+                            help='stub: answer from the --responses recording; live: call the API (or OPENAI_BASE_URL); record: call it and save the answers to --responses.')
+        parser.add_argument('--responses', metavar='PATH', help='Recorded LLM exchanges (JSON lines) for --llm stub/record.')
+        parser.add_argument('--recorded-latency', action='store_true', help='Stub mode: replay each answer with the latency it was recorded with.')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=1)
+        parser.add_argument('--classifier', action='store_true', help='Include the trained pre-classifier tier (trained on these same jobs, so its agreement is optimistic).')
+        parser.add_argument('--price-in', type=float, default=0.15, help='USD per 1M prompt tokens.')
+        parser.add_argument('--price-out', type=float, default=0.60, help='USD per 1M completion tokens.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
 
     def handle(self, *args, **options):
-        self.stdout.write("🧠 Loading Screener Brain...")
-        screener = MarTechScreener()
-        
-        # --- TEST CASES ---
-        tests = [
-            {
-                "name": "THE TRAP (Generic Title + Tool)",
-                "title": "Product Manager", 
-                "company": "Generic Corp",
-                "desc": "We are looking for a PM to lead our roadmap. You will work closely with the marketing team who uses Marketo and Salesforce. We need someone organized."
-            },
-            {
-                "name": "THE PERFECT MATCH (Specific Title)",
-                "title": "Marketing Operations Manager", 
-                "company": "Tech Inc",
-                "desc": "We need a MOPs expert to manage our Marketo instance, build scoring models, and integrate with Salesforce. Python is a plus."
+        if options['export']:
+            rows = self.labelled_jobs(options['limit'])
+            with open(options['export'], 'w') as f:
+                for row in rows: f.write(json.dumps(row) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"💾 Exported {len(rows)} labelled jobs to {options['export']}"))
+            return
+
+        corpus = self.load_corpus(options['corpus']) if options['corpus'] else self.labelled_jobs(options['limit'])
+        if not corpus: raise CommandError("Empty corpus: no approved or rejected labels.")
+        # With one class missing or scarce, agreement mostly measures how often the screener approves.
+        counts = Counter(row["label"] for row in corpus)
+        self.stdout.write(f"📚 {len(corpus)} labelled jobs: {counts['approved']} approved, {counts['rejected']} rejected.")
+        if min(counts['approved'], counts['rejected']) < options['min_per_class']:
+            raise CommandError(f"Need at least {options['min_per_class']} approved and {options['min_per_class']} rejected labels (see --min-per-class).")
+        if options['llm'] != 'live' and not options['responses']:
+            raise CommandError(f"--llm {options['llm']} needs --responses PATH.")
+
+        # stub answers only prompts identical to the recorded ones; anything else counts as unmatched.
+        archive, recorder = None, nullcontext()
+        if options['llm'] == 'stub':
+            archive = Archive(options['responses'], strict=True).load()
+            os.environ.setdefault('OPENAI_API_KEY', 'replay')
+            recorder = activate("replay", archive, recorded_latency=options['recorded_latency'])
+        elif options['llm'] == 'record':
+            archive = Archive(options['responses'])
+            recorder = activate("record", archive)
+
+        metrics = StageMetrics("test_screener")
+        screener = MarTechScreener(use_classifier=options['classifier'], use_cache=False, metrics=metrics)
+        postings = [{"title": r["title"], "company": r["company"], "location": r.get("location") or "", "description": r["description"], "apply_url": r.get("apply_url") or ""} for r in corpus]
+
+        self.stdout.write(f"🧪 Screening {len(postings)} labelled jobs (LLM: {options['llm']}, model {screener.model}, prompt {screener.prompt_version})...")
+        with recorder, transaction.atomic():
+            start = time.monotonic()
+            results = screener.screen_many(postings, workers=options['workers'], batch_size=options['batch_size'])
+            wall = time.monotonic() - start
+            # Nothing the benchmark touched (BlockRule hit counts) is kept.
+            screener.block_summary()
+            transaction.set_rollback(True)
+        if options['llm'] == 'record': archive.save()
+
+        report = self.build_report(corpus, results, screener, metrics, wall, options)
+        if archive is not None and options['llm'] == 'stub':
+            report["replay"] = {"answered": archive.served, "unmatched": archive.misses}
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.write_report(report, screener)
+        if options['llm'] == 'record':
+            self.stdout.write(self.style.SUCCESS(f"\n💾 Saved {len(archive.exchanges)} LLM exchanges to {archive.path}"))
+
+    def labelled_jobs(self, limit):
+        # Rejected jobs are purged from the jobs table, so the labels are the only record of both classes.
+        review_first = Case(When(source='review', then=Value(0)), default=Value(1), output_field=IntegerField())
+        rows = ScreeningLabel.objects.filter(status__in=['approved', 'rejected']).order_by(review_first, '-updated_at').values(*FIELDS)[:limit]
+        return [{**{k: row[k] for k in FIELDS if k != 'status'}, "label": row['status']} for row in rows]
+
+    def load_corpus(self, path):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def build_report(self, corpus, results, screener, metrics, wall, options):
+        labels = [row["label"] for row in corpus]
+        predicted = [r["status"] for r in results]
+        n = len(labels)
+
+        by_stage = defaultdict(lambda: [0, 0])
+        for label, result in zip(labels, results):
+            stage = by_stage[result["details"].get("stage") or "unknown"]
+            stage[0] += 1
+            stage[1] += result["status"] == label
+
+        decisions = {}
+        for name in ("approved", "rejected"):
+            precision, recall = precision_recall(labels, predicted, name)
+            decisions[name] = {"precision": round(precision, 4), "recall": round(recall, 4)}
+
+        usage = dict(screener.usage)
+        cost = (usage["prompt_tokens"] * options['price_in'] + usage["completion_tokens"] * options['price_out']) / 1e6
+        per_k = 1000.0 / n
+        # Finer than StageMetrics.report(): the local stages take microseconds.
+        timings = {name: {"calls": len(v), "total_s": round(sum(v), 4), "p50_ms": round(percentile(v, 50) * 1000, 3), "p95_ms": round(percentile(v, 95) * 1000, 3)}
+                   for name, v in sorted(metrics.timings.items())}
+        return {
+            "postings": n,
+            "llm": options['llm'],
+            "model": screener.model,
+            "prompt_version": screener.prompt_version,
+            "agreement": round(sum(p == l for p, l in zip(predicted, labels)) / n, 4),
+            "left_pending": predicted.count("pending"),
+            "decisions": decisions,
+            "confusion": {f"{l}->{p}": c for (l, p), c in sorted(Counter(zip(labels, predicted)).items())},
+            "stages": {name: {"postings": total, "agreement": round(agree / total, 4)} for name, (total, agree) in sorted(by_stage.items())},
+            "latency": timings,
+            "wall_s": round(wall, 3),
+            "postings_per_sec": round(n / wall, 1) if wall else None,
+            "usage": usage,
+            "per_1000": {
+                "llm_requests": round(usage["requests"] * per_k, 1),
+                "prompt_tokens": round(usage["prompt_tokens"] * per_k),
+                "completion_tokens": round(usage["completion_tokens"] * per_k),
+                "cost_usd": round(cost * per_k, 4),
             },
-            {
-                "name": "THE GENERIC MARKETER",
-                "title": "Digital Marketing Manager", 
-                "company": "Agency XYZ",
-                "desc": "Looking for a digital marketer to run Facebook Ads and manage our Google Analytics. You will report to the VP of Marketing."
-            }
-        ]
-
-        self.stdout.write("\n🔎 RUNNING DIAGNOSTICS...\n")
-
-        for t in tests:
-            self.stdout.write(f"--- TESTING: {t['name']} ---")
-            self.stdout.write(f"Title: {t['title']}")
-            
-            # Run the screen
-            result = screener.screen(t['title'], t['company'], "Remote", t['desc'], "https://example.com")
-            
-            # Print Verdict
-            score = result.get('score')
-            status = result.get('status')
-            reason = result.get('reason')
-            
-            color = self.style.SUCCESS if status == 'approved' else self.style.ERROR
-            self.stdout.write(color(f"VERDICT: {status.upper()} (Score: {score})"))
-            self.stdout.write(f"Reason: {reason}\n")
+        }
+
+    def write_report(self, report, screener):
+        self.stdout.write(self.style.SUCCESS(f"\n🎯 Agreement with stored decisions: {report['agreement']:.1%} ({report['left_pending']} left pending)"))
+        for name, d in report["decisions"].items():
+            self.stdout.write(f"   {name:<9} precision {d['precision']:.3f}  recall {d['recall']:.3f}")
+        self.stdout.write("   " + ", ".join(f"{k} {v}" for k, v in report["confusion"].items()))
+
+        self.stdout.write("\n🧭 Decided by stage:")
+        for name, s in report["stages"].items():
+            self.stdout.write(f"   {name:<14}{s['postings']:>6} postings, agreement {s['agreement']:.1%}")
+
+        self.stdout.write(f"\n⏱️ {report['wall_s']}s wall, {report['postings_per_sec']} postings/s")
+        for name, s in report["latency"].items():
+            self.stdout.write(f"   {name:<14}{s['calls']:>6} calls  p50 {s['p50_ms']:.3f} ms  p95 {s['p95_ms']:.3f} ms  total {s['total_s']}s")
+
+        k = report["per_1000"]
+        self.stdout.write(f"\n💸 Per 1,000 postings: {k['llm_requests']} LLM requests, {k['prompt_tokens']} prompt + {k['completion_tokens']} completion tokens, ${k['cost_usd']:.4f}")
+        self.stdout.write(f"✂️ Screener prompts: {screener.compactor.summary()}")
+        if "replay" in report:
+            self.stdout.write(f"📼 {report['replay']['answered']} answers replayed, {report['replay']['unmatched']} prompts not in the recording")
@@ -0,0 +1,90 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs.classifier import PreClassifier, np, pick_thresholds, precision_recall
+from jobs.models import ScreeningLabel
+
+
+class Command(BaseCommand):
+    help = 'Trains the local screening pre-classifier on stored screening labels (LLM verdicts and review decisions) and reports how many LLM calls it would avoid.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dim', type=int, default=2 ** 18, help='Hashed feature space size.')
+        parser.add_argument('--epochs', type=int, default=300)
+        parser.add_argument('--lr', type=float, default=0.1)
+        parser.add_argument('--l2', type=float, default=1e-4)
+        parser.add_argument('--target-precision', type=float, default=0.97, help='Precision the auto-approve/auto-reject bands must keep on validation data.')
+        parser.add_argument('--min-rows', type=int, default=200, help='Refuse to train on fewer labelled rows.')
+        parser.add_argument('--min-per-class', type=int, default=50, help='Refuse to train with fewer approved or rejected rows than this.')
+        parser.add_argument('--seed', type=int, default=13)
+        parser.add_argument('--dry-run', action='store_true', help='Evaluate only; keep the current model.')
+
+    def handle(self, *args, **options):
+        if np is None: raise CommandError("NumPy is required: pip install numpy")
+
+        # ScreeningLabel survives the purge of rejected jobs and holds only LLM and review outcomes.
+        rows = list(ScreeningLabel.objects.filter(status__in=['approved', 'rejected']).values_list('title', 'company', 'description', 'status'))
+        if len(rows) < options['min_rows']:
+            raise CommandError(f"Only {len(rows)} labelled jobs (need {options['min_rows']}).")
+        docs = [(t, c, d) for t, c, d, _ in rows]
+        labels = [1 if s == 'approved' else 0 for *_, s in rows]
+        self.stdout.write(f"📚 {len(rows)} labelled jobs: {sum(labels)} approved, {len(labels) - sum(labels)} rejected.")
+        # Validation and test each get 15% of a class: too few and the tier thresholds are noise.
+        if min(sum(labels), len(labels) - sum(labels)) < options['min_per_class']:
+            raise CommandError(f"Need at least {options['min_per_class']} approved and {options['min_per_class']} rejected labels.")
+
+        # Stratified 70/15/15 split: fit on train, choose the tiers on validation, report on test.
+        rng = random.Random(options['seed'])
+        train, val, test = [], [], []
+        for label in (0, 1):
+            idx = [i for i, y in enumerate(labels) if y == label]
+            rng.shuffle(idx)
+            a, b = int(len(idx) * 0.7), int(len(idx) * 0.85)
+            train += idx[:a]; val += idx[a:b]; test += idx[b:]
+        pick = lambda idx: ([docs[i] for i in idx], [labels[i] for i in idx])
+        self.stdout.write(f"   train {len(train)} / validation {len(val)} / test {len(test)}")
+
+        model = PreClassifier.train(*pick(train), dim=options['dim'], epochs=options['epochs'], lr=options['lr'], l2=options['l2'])
+        val_docs, val_y = pick(val)
+        model.approve_above, model.reject_below = pick_thresholds(list(model.predict_many(val_docs)), val_y, options['target_precision'])
+
+        test_docs, test_y = pick(test)
+        probs = model.predict_many(test_docs)
+        report = self.evaluate(model, probs, test_y)
+        report.update({"train_rows": len(train), "approve_above": round(model.approve_above, 4), "reject_below": round(model.reject_below, 4)})
+
+        self.stdout.write("\n📊 Test set at p=0.5:")
+        for name in ("approved", "rejected"):
+            self.stdout.write(f"   {name:<9} precision {report[name]['precision']:.3f}  recall {report[name]['recall']:.3f}")
+        self.stdout.write(f"   accuracy {report['accuracy']:.3f}")
+        self.stdout.write(f"\n🎚️ Tiers (≥{options['target_precision']:.0%} precision on validation): approve ≥ {model.approve_above:.3f}, reject ≤ {model.reject_below:.3f}")
+        tiers = report["tiers"]
+        self.stdout.write(f"   auto-approved {tiers['approved']} (precision {tiers['approved_precision']:.3f}), auto-rejected {tiers['rejected']} (precision {tiers['rejected_precision']:.3f}), escalated {tiers['escalated']}")
+        self.stdout.write(self.style.SUCCESS(f"   ⚡ LLM calls avoided: {tiers['llm_calls_avoided']:.1%}"))
+
+        if options['dry_run']:
+            self.stdout.write("\n(dry run: model not saved)")
+            return
+        saved = model.save(train_rows=len(train), metrics=report)
+        self.stdout.write(self.style.SUCCESS(f"\n💾 Saved and activated {saved}."))
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def evaluate(self, model, probs, y):
+        at_half = [1 if p >= 0.5 else 0 for p in probs]
+        report = {"accuracy": sum(a == b for a, b in zip(at_half, y)) / len(y) if y else 0.0}
+        for name, positive in (("approved", 1), ("rejected", 0)):
+            precision, recall = precision_recall(y, at_half, positive)
+            report[name] = {"precision": round(precision, 4), "recall": round(recall, 4)}
+
+        decided = [(model.tier(float(p)), t) for p, t in zip(probs, y)]
+        auto_app = [t for d, t in decided if d == "approved"]
+        auto_rej = [t for d, t in decided if d == "rejected"]
+        report["tiers"] = {
+            "approved": len(auto_app), "rejected": len(auto_rej), "escalated": len(y) - len(auto_app) - len(auto_rej),
+            "approved_precision": round(sum(auto_app) / len(auto_app), 4) if auto_app else 0.0,
+            "rejected_precision": round(auto_rej.count(0) / len(auto_rej), 4) if auto_rej else 0.0,
+            "llm_calls_avoided": round((len(auto_app) + len(auto_rej)) / len(y), 4) if y else 0.0,
+        }
+        return report
@@ -1,8 +1,9 @@
-import time
 import os
 import requests
 from urllib.parse import urlparse
 from django.core.management.base import BaseCommand
+from jobs.caches import SearchCache
+from jobs.http import HttpClient
 from jobs.models import Job
 
 class Command(BaseCommand):
@@ -10,6 +11,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.serpapi_key = os.environ.get('SERPAPI_KEY')
+        self.http = HttpClient(timeout=5, retries=2)
+        self.search_cache = SearchCache("logos")
         
         # 1. Find jobs with missing logos
         jobs = Job.objects.filter(company_logo__isnull=True) | Job.objects.filter(company_logo__exact='')
@@ -17,11 +20,6 @@ class Command(BaseCommand):
         
         self.stdout.write(f"🔍 Found {total} jobs missing logos. Starting update...")
         
-        # Headers to prevent 403 blocks
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-
         updated_count = 0
         
         for job in jobs:
@@ -41,10 +39,10 @@ class Command(BaseCommand):
             # Engine A: Clearbit
             clearbit_url = f"https://logo.clearbit.com/{domain}"
             try:
-                resp = requests.get(clearbit_url, headers=headers, timeout=3)
+                resp = self.http.get(clearbit_url, timeout=3, retries=0)
                 if resp.status_code == 200:
                     logo_url = clearbit_url
-            except: pass
+            except requests.RequestException: pass
 
             # Engine B: Google Favicon (Fallback)
             if not logo_url:
@@ -61,10 +59,9 @@ class Command(BaseCommand):
             else:
                 self.stdout.write(self.style.ERROR(f"   ❌ Failed to find logo for {domain}"))
 
-            # Polite delay
-            time.sleep(0.2)
-
         self.stdout.write(self.style.SUCCESS(f"\n✨ Operation Complete. Updated {updated_count}/{total} jobs."))
+        self.stdout.write(f"🔁 SerpAPI cache: {self.search_cache.summary()}")
+        self.http.stats.write(self.stdout)
 
     def resolve_domain(self, company_name):
         """
@@ -82,20 +79,24 @@ class Command(BaseCommand):
         # 2. Try SerpApi if available (Best for 'Jasper AI' -> 'jasper.ai')
         if self.serpapi_key:
             try:
+                query = f"{company_name} official site"
                 params = { 
                     "engine": "google", 
-                    "q": f"{company_name} official site", 
+                    "q": query, 
                     "api_key": self.serpapi_key, 
                     "num": 1 
                 }
-                resp = requests.get("https://serpapi.com/search", params=params, timeout=5)
-                if resp.status_code == 200:
-                    results = resp.json().get("organic_results", [])
-                    if results:
-                        link = results[0].get("link")
-                        return urlparse(link).netloc.replace("www.", "")
-            except: 
-                pass
+                results = self.search_cache.get(query, params)
+                if results is None:
+                    resp = self.http.get("https://serpapi.com/search", params=params)
+                    if resp.status_code == 200:
+                        results = resp.json().get("organic_results", [])
+                        self.search_cache.set(query, params, results)
+                if results:
+                    link = results[0].get("link")
+                    return urlparse(link).netloc.replace("www.", "")
+            except (requests.RequestException, ValueError) as e:
+                self.stdout.write(self.style.WARNING(f"   ⚠️ SerpAPI lookup failed for {company_name}: {e}"))
         
         # 3. Fallback to heuristic
         return heuristic_domain
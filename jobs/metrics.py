@@ -0,0 +1,77 @@
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from jobs.models import IngestReport
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of a list of numbers (0 for an empty list).
+    """
+    if not values: return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class StageMetrics:
+    """
+    Timers and counters for one ingestion run.
+
+    `with metrics.stage("screen"):` records one timed call of that stage; count() bumps a
+    counter; cache() registers hit/miss figures. report() summarises everything as a dict
+    (per-stage totals, p50/p95, call counts, cache hit ratios) and save() stores it as an
+    IngestReport so runs can be compared.
+    """
+    STAGES = ("discover", "fetch", "normalize", "dedupe", "screen", "persist")
+
+    def __init__(self, command):
+        self.command = command
+        self.started_at = timezone.now()
+        self.start = time.monotonic()
+        self.timings = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.caches = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[name].append(time.monotonic() - start)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def cache(self, name, hits, misses):
+        self.caches[name] = (hits, misses)
+
+    def report(self):
+        stages = {}
+        for name in list(self.STAGES) + sorted(set(self.timings) - set(self.STAGES)):
+            values = self.timings.get(name, [])
+            stages[name] = {
+                "calls": len(values), "total_s": round(sum(values), 3),
+                "p50_ms": round(percentile(values, 50) * 1000, 1), "p95_ms": round(percentile(values, 95) * 1000, 1),
+            }
+        caches = {}
+        for name, (hits, misses) in self.caches.items():
+            total = hits + misses
+            caches[name] = {"hits": hits, "misses": misses, "hit_ratio": round(hits / total, 3) if total else None}
+        return {
+            "command": self.command,
+            "started_at": self.started_at.isoformat(),
+            "wall_s": round(time.monotonic() - self.start, 3),
+            "stages": stages,
+            "counters": dict(self.counters),
+            "caches": caches,
+        }
+
+    def save(self, fetch_run=None):
+        report = self.report()
+        return IngestReport.objects.create(command=self.command, started_at=self.started_at, wall_seconds=report["wall_s"], report=report, fetch_run=fetch_run)
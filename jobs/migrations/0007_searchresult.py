@@ -0,0 +1,25 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_fetchstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('caller', models.CharField(db_index=True, max_length=50)),
+                ('query', models.TextField()),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('results', models.JSONField(blank=True, default=list)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_geocoderesult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtsBoard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('greenhouse', 'Greenhouse'), ('lever', 'Lever'), ('ashby', 'Ashby'), ('workable', 'Workable'), ('smartrecruiters', 'SmartRecruiters')], max_length=20)),
+                ('token', models.CharField(max_length=200)),
+                ('company', models.CharField(blank=True, default='', max_length=200)),
+                ('is_active', models.BooleanField(default=True)),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_polled', models.DateTimeField(blank=True, null=True)),
+                ('last_changed', models.DateTimeField(blank=True, null=True)),
+                ('next_poll_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('poll_interval_hours', models.FloatField(default=24)),
+                ('polls', models.PositiveIntegerField(default=0)),
+                ('postings', models.PositiveIntegerField(default=0)),
+                ('approvals', models.PositiveIntegerField(default=0)),
+                ('last_postings', models.PositiveIntegerField(default=0)),
+                ('last_approvals', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('source', 'token')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_atsboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FetchRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(default='fetch_jobs', max_length=50)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='running', max_length=20)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('checkpoint', models.JSONField(blank=True, default=dict)),
+                ('jobs_added', models.PositiveIntegerField(default=0)),
+                ('resumes', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='fetch_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='jobs.fetchrun'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0010_fetchrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostingDetail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20)),
+                ('company', models.CharField(max_length=200)),
+                ('posting_id', models.CharField(max_length=100)),
+                ('released', models.CharField(blank=True, default='', max_length=50)),
+                ('description', models.TextField(blank=True, default='')),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'unique_together': {('source', 'company', 'posting_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_postingdetail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='atsboard',
+            name='source',
+            field=models.CharField(choices=[('greenhouse', 'Greenhouse'), ('lever', 'Lever'), ('ashby', 'Ashby'), ('workable', 'Workable'), ('smartrecruiters', 'SmartRecruiters'), ('workday', 'Workday'), ('bamboohr', 'BambooHR')], max_length=20),
+        ),
+    ]
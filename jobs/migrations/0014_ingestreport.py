@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0013_rssfeed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(db_index=True, max_length=50)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+                ('wall_seconds', models.FloatField(default=0)),
+                ('report', models.JSONField(blank=True, default=dict)),
+                ('fetch_run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reports', to='jobs.fetchrun')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
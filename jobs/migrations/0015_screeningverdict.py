@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0014_ingestreport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('prompt_version', models.CharField(db_index=True, max_length=16)),
+                ('title', models.CharField(max_length=200)),
+                ('company', models.CharField(max_length=200)),
+                ('status', models.CharField(max_length=20)),
+                ('score', models.FloatField(default=0.0)),
+                ('reason', models.TextField(blank=True, default='')),
+                ('signals', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
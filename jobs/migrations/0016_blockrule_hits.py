@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0015_screeningverdict'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockrule',
+            name='hit_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blockrule',
+            name='last_hit_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_blockrule_hits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dim', models.PositiveIntegerField()),
+                ('weights', models.BinaryField()),
+                ('idf', models.BinaryField()),
+                ('bias', models.FloatField(default=0.0)),
+                ('approve_above', models.FloatField(default=1.01)),
+                ('reject_below', models.FloatField(default=-0.01)),
+                ('train_rows', models.PositiveIntegerField(default=0)),
+                ('metrics', models.JSONField(blank=True, default=dict)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+import json
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    # Seed the labels with the approved/rejected jobs still stored (BlockRule rejections aside).
+    Job = apps.get_model('jobs', 'Job')
+    ScreeningLabel = apps.get_model('jobs', 'ScreeningLabel')
+    norm = lambda text: " ".join((text or "").split()).lower()
+    labels = {}
+    rows = (Job.objects.filter(screening_status__in=['approved', 'rejected'])
+            .exclude(screening_reason__startswith="Blocked by rule")
+            .values_list('title', 'company', 'description', 'screening_status'))
+    for title, company, description, status in rows.iterator():
+        key = hashlib.sha256(json.dumps([norm(title), norm(company), norm(description)]).encode("utf-8")).hexdigest()
+        labels[key] = ScreeningLabel(key=key, title=(title or "")[:200], company=(company or "")[:200],
+                                     description=(description or "")[:5000], status=status, source="backfill")
+    ScreeningLabel.objects.bulk_create(labels.values(), batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_screeningmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningLabel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('company', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, default='')),
+                ('status', models.CharField(max_length=20)),
+                ('source', models.CharField(choices=[('llm', 'LLM verdict'), ('review', 'Review decision'), ('backfill', 'Stored job')], default='llm', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
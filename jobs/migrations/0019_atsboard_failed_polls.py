@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_screeninglabel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='atsboard',
+            name='failed_polls',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def deactivate(apps, schema_editor):
+    # Boards registered from BambooHR's own site (www.bamboohr.com etc.), not a company account.
+    AtsBoard = apps.get_model('jobs', 'AtsBoard')
+    AtsBoard.objects.filter(source="bamboohr", token__in=["www", "help", "marketplace", "partners", "api", "app", "status", "developers",
+                                                          "documentation", "blog", "community", "support", "go", "info", "learn"]).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_atsboard_failed_polls'),
+    ]
+
+    operations = [
+        migrations.RunPython(deactivate, migrations.RunPython.noop),
+    ]
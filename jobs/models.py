@@ -3,6 +3,8 @@ from django.utils import timezone
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 import html
+import json
+import hashlib
 from bs4 import BeautifulSoup
 import re
 from datetime import timedelta
@@ -113,6 +115,7 @@ class Job(models.Model):
     tags = models.CharField(max_length=200, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    fetch_run = models.ForeignKey('FetchRun', on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
 
     def __str__(self): return f"{self.title} at {self.company}"
 
@@ -136,7 +139,8 @@ class Job(models.Model):
     def get_schema_valid_through(self):
         return (self.created_at + timedelta(days=90)).strftime('%Y-%m-%d')
 
-    def save(self, *args, **kwargs):
+    def normalize_fields(self):
+        # Shared by save() and the bulk writer (jobs.writer.JobWriter), which bypasses save().
         if self.location: self.location = normalize_location(self.location)
         if self.description: self.description = clean_html_description(self.description)
         if not self.slug: self.slug = slugify(f"{self.title} at {self.company}")
@@ -144,6 +148,9 @@ class Job(models.Model):
             self.is_active = True
         else:
             self.is_active = False
+
+    def save(self, *args, **kwargs):
+        self.normalize_fields()
         super().save(*args, **kwargs)
 
     class Meta:
@@ -178,9 +185,249 @@ class BlockRule(models.Model):
     value = models.CharField(max_length=500)
     enabled = models.BooleanField(default=True)
     notes = models.CharField(max_length=500, blank=True, default="")
+    hit_count = models.PositiveIntegerField(default=0)
+    last_hit_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     def __str__(self): return f"{self.rule_type}: {self.value}"
 
+# --- INGESTION STATE ---
+
+class AtsBoard(models.Model):
+    """
+    A company board on a supported ATS, discovered via search and then polled directly.
+    The poll interval adapts to how often the board changes (see record_poll); a board
+    unavailable for MAX_FAILED_POLLS polls in a row is deactivated.
+    """
+    SOURCE_CHOICES = [("greenhouse", "Greenhouse"), ("lever", "Lever"), ("ashby", "Ashby"), ("workable", "Workable"), ("smartrecruiters", "SmartRecruiters"), ("workday", "Workday"), ("bamboohr", "BambooHR")]
+    MIN_INTERVAL_HOURS = 6
+    MAX_INTERVAL_HOURS = 24 * 7
+    MAX_FAILED_POLLS = 5
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    token = models.CharField(max_length=200)
+    company = models.CharField(max_length=200, blank=True, default="")
+    is_active = models.BooleanField(default=True)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_seen = models.DateTimeField(default=timezone.now)
+    last_polled = models.DateTimeField(blank=True, null=True)
+    last_changed = models.DateTimeField(blank=True, null=True)
+    next_poll_at = models.DateTimeField(default=timezone.now, db_index=True)
+    poll_interval_hours = models.FloatField(default=24)
+    polls = models.PositiveIntegerField(default=0)
+    postings = models.PositiveIntegerField(default=0)
+    approvals = models.PositiveIntegerField(default=0)
+    last_postings = models.PositiveIntegerField(default=0)
+    last_approvals = models.PositiveIntegerField(default=0)
+    failed_polls = models.PositiveIntegerField(default=0)
+
+    def __str__(self): return f"{self.get_source_display()}: {self.token}"
+
+    @property
+    def postings_per_poll(self): return self.postings / self.polls if self.polls else 0.0
+    @property
+    def approvals_per_poll(self): return self.approvals / self.polls if self.polls else 0.0
+
+    def record_poll(self, changed, postings=0, approvals=0, available=True):
+        """
+        Changed boards are polled twice as often, unchanged ones back off by 1.5x.
+        Unavailable polls (404/410, errors, open circuit) are counted until the next
+        good one; at MAX_FAILED_POLLS the board is deactivated and no longer polled.
+        """
+        now = timezone.now()
+        self.failed_polls = 0 if available else self.failed_polls + 1
+        if self.failed_polls >= self.MAX_FAILED_POLLS: self.is_active = False
+        if changed:
+            self.poll_interval_hours = max(self.MIN_INTERVAL_HOURS, self.poll_interval_hours / 2)
+            self.last_changed = now
+        else:
+            self.poll_interval_hours = min(self.MAX_INTERVAL_HOURS, self.poll_interval_hours * 1.5)
+        self.last_polled = now
+        self.next_poll_at = now + timedelta(hours=self.poll_interval_hours)
+        self.polls += 1
+        self.postings += postings
+        self.approvals += approvals
+        self.last_postings = postings
+        self.last_approvals = approvals
+
+    class Meta:
+        unique_together = ("source", "token")
+
+class FetchRun(models.Model):
+    """
+    One fetch_jobs run. The checkpoint (completed queries, processed board tokens and the
+    links still pending for the current query) is saved as the run goes, so an interrupted
+    run can be picked up with --resume. Jobs inserted by the run point back to it.
+    """
+    STATUS_CHOICES = [("running", "Running"), ("completed", "Completed"), ("failed", "Failed")]
+
+    command = models.CharField(max_length=50, default="fetch_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running", db_index=True)
+    options = models.JSONField(blank=True, default=dict)
+    checkpoint = models.JSONField(blank=True, default=dict)
+    jobs_added = models.PositiveIntegerField(default=0)
+    resumes = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self): return f"{self.command} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-started_at']
+
+class IngestReport(models.Model):
+    """
+    End-of-run report of an ingestion command (see jobs.metrics.StageMetrics):
+    per-stage totals and p50/p95 latencies, counters and cache hit ratios.
+    """
+    command = models.CharField(max_length=50, db_index=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(auto_now_add=True)
+    wall_seconds = models.FloatField(default=0)
+    report = models.JSONField(blank=True, default=dict)
+    fetch_run = models.ForeignKey(FetchRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='reports')
+
+    def __str__(self): return f"{self.command} @ {self.started_at:%Y-%m-%d %H:%M} ({self.wall_seconds:.0f}s)"
+
+    class Meta:
+        ordering = ['-started_at']
+
+class RssFeed(models.Model):
+    """
+    A job feed polled by fetch_rss. When the table is empty, settings.RSS_FEEDS is used.
+    """
+    name = models.CharField(max_length=100)
+    url = models.URLField(max_length=500, unique=True)
+    tag = models.CharField(max_length=50, help_text="Stored on imported jobs as 'RSS, <tag>'.")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    def __str__(self): return self.name
+
+# --- INGESTION CACHES ---
+
+class FetchState(models.Model):
+    """
+    HTTP validators for endpoints we poll repeatedly (ATS boards, feeds).
+    Lets the next fetch send If-None-Match / If-Modified-Since and skip unchanged bodies.
+    """
+    url = models.URLField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_modified = models.CharField(max_length=100, blank=True, default="")
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+    checked_at = models.DateTimeField(blank=True, null=True)
+    changed_at = models.DateTimeField(blank=True, null=True)
+    def __str__(self): return self.url
+
+class SearchResult(models.Model):
+    """
+    Cached SerpAPI organic results, keyed by normalized query + (tbs, num, gl).
+    """
+    key = models.CharField(max_length=64, unique=True)
+    caller = models.CharField(max_length=50, db_index=True)
+    query = models.TextField()
+    params = models.JSONField(blank=True, default=dict)
+    results = models.JSONField(blank=True, default=list)
+    fetched_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
+    def __str__(self): return f"[{self.caller}] {self.query[:80]}"
+
+class GeocodeResult(models.Model):
+    """
+    Nominatim lookups shared by the ingestion commands. found=False rows are negative
+    results (Nominatim had no match) so we don't ask again every night.
+    """
+    query = models.CharField(max_length=255, unique=True)
+    formatted = models.CharField(max_length=255, blank=True, default="")
+    found = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    def __str__(self): return f"{self.query} -> {self.formatted or '∅'}"
+
+class PostingDetail(models.Model):
+    """
+    Description fetched from a per-posting detail endpoint (SmartRecruiters), keyed by
+    (source, company, posting_id). Refetched only when the posting's released date changes.
+    """
+    source = models.CharField(max_length=20)
+    company = models.CharField(max_length=200)
+    posting_id = models.CharField(max_length=100)
+    released = models.CharField(max_length=50, blank=True, default="")
+    description = models.TextField(blank=True, default="")
+    fetched_at = models.DateTimeField(default=timezone.now)
+    def __str__(self): return f"{self.source}: {self.company}/{self.posting_id}"
+
+    class Meta:
+        unique_together = ("source", "company", "posting_id")
+
+class ScreeningVerdict(models.Model):
+    """
+    Stored LLM screening verdicts, keyed by a hash of the prompt version plus the
+    normalized title, company and compacted description. A new prompt, model or
+    hunt_targets.txt changes the version, so old rows simply stop matching.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    prompt_version = models.CharField(max_length=16, db_index=True)
+    title = models.CharField(max_length=200)
+    company = models.CharField(max_length=200)
+    status = models.CharField(max_length=20)
+    score = models.FloatField(default=0.0)
+    reason = models.TextField(blank=True, default="")
+    signals = models.JSONField(blank=True, default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    def __str__(self): return f"{self.title} @ {self.company}: {self.status}"
+
+class ScreeningModel(models.Model):
+    """
+    A local pre-classifier trained by train_screener (hashed TF-IDF + logistic
+    regression, float32 arrays stored as bytes). The screener loads the active one and
+    only escalates postings scored between reject_below and approve_above to the LLM.
+    """
+    dim = models.PositiveIntegerField()
+    weights = models.BinaryField()
+    idf = models.BinaryField()
+    bias = models.FloatField(default=0.0)
+    approve_above = models.FloatField(default=1.01)
+    reject_below = models.FloatField(default=-0.01)
+    train_rows = models.PositiveIntegerField(default=0)
+    metrics = models.JSONField(blank=True, default=dict)
+    is_active = models.BooleanField(default=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    def __str__(self): return f"Screening model {self.created_at:%Y-%m-%d %H:%M} ({self.train_rows} rows)"
+
+class ScreeningLabel(models.Model):
+    """
+    Training labels for the pre-classifier (train_screener): LLM verdicts recorded by
+    the screener and approve/reject decisions from review. Kept apart from Job rows,
+    since rejected jobs are purged on every run and zero-score ones are never stored.
+    A review decision replaces whatever label the posting had; other sources only add.
+    """
+    SOURCE_CHOICES = [("llm", "LLM verdict"), ("review", "Review decision"), ("backfill", "Stored job")]
+    # The classifier reads no more of a description than this (classifier.DESCRIPTION_CHARS).
+    DESCRIPTION_CHARS = 5000
+
+    key = models.CharField(max_length=64, unique=True)
+    title = models.CharField(max_length=200)
+    company = models.CharField(max_length=200)
+    description = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=20)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default="llm")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    def __str__(self): return f"{self.title} @ {self.company}: {self.status} ({self.source})"
+
+    @staticmethod
+    def make_key(title, company, description):
+        norm = lambda text: " ".join((text or "").split()).lower()
+        return hashlib.sha256(json.dumps([norm(title), norm(company), norm(description)]).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def record(cls, title, company, description, status, source="llm"):
+        if status not in ("approved", "rejected"): return
+        key = cls.make_key(title, company, description)
+        fields = dict(title=(title or "")[:200], company=(company or "")[:200], description=(description or "")[:cls.DESCRIPTION_CHARS], status=status, source=source)
+        if source == "review": cls.objects.update_or_create(key=key, defaults=fields)
+        else: cls.objects.get_or_create(key=key, defaults=fields)
+
 class UserSubmission(Job):
     class Meta: proxy = True; verbose_name = "User Submission"
 
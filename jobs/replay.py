@@ -0,0 +1,211 @@
+import io
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger("replay")
+
+# Query params never written to an archive (and ignored when matching).
+SECRET_PARAMS = {"api_key", "key", "token", "access_token"}
+# Bodies are stored decoded, so transfer headers from the live response no longer apply.
+DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "set-cookie"}
+# Outbound hosts -> stage, for attributing wall time in benchmarks. Everything else is "fetch".
+HOST_STAGES = {"serpapi.com": "search", "openai.com": "llm", "nominatim.openstreetmap.org": "geocode"}
+
+
+def stage_for(url):
+    host = urlsplit(str(url)).hostname or ""
+    for suffix, stage in HOST_STAGES.items():
+        if host == suffix or host.endswith("." + suffix): return stage
+    return "fetch"
+
+
+def clean_url(url):
+    parts = urlsplit(str(url))
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS])
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+def body_hash(body):
+    if body is None: body = b""
+    if isinstance(body, str): body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+class Archive:
+    """
+    Recorded HTTP exchanges (one JSON object per line). Replay matches on method + URL
+    (secrets stripped) + request-body hash; when the body differs (e.g. an edited prompt)
+    it falls back to the next recording for the same method + URL. Exchanges for the same
+    key are served in recorded order, the last one repeating. strict=True disables the
+    fallback, so only identical requests are answered.
+    """
+
+    def __init__(self, path, strict=False):
+        self.path = path
+        self.strict = strict
+        self.exchanges = []
+        self.by_key = defaultdict(deque)
+        self.by_route = defaultdict(deque)
+        self.lock = threading.Lock()
+        self.misses = 0
+        self.served = 0
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                if line.strip(): self._index(json.loads(line))
+        return self
+
+    def _index(self, ex):
+        self.exchanges.append(ex)
+        self.by_key[(ex["method"], ex["url"], ex["body_hash"])].append(ex)
+        self.by_route[(ex["method"], ex["url"])].append(ex)
+
+    def add(self, method, url, body, status, headers, content, elapsed):
+        ex = {
+            "method": method.upper(), "url": clean_url(url), "body_hash": body_hash(body), "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS},
+            "body": base64.b64encode(content or b"").decode("ascii"), "elapsed": round(elapsed, 4),
+        }
+        with self.lock:
+            self._index(ex)
+
+    def save(self):
+        with open(self.path, "w") as f:
+            for ex in self.exchanges:
+                f.write(json.dumps(ex) + "\n")
+
+    def match(self, method, url, body):
+        method, url = method.upper(), clean_url(url)
+        with self.lock:
+            queue = self.by_key.get((method, url, body_hash(body))) or (None if self.strict else self.by_route.get((method, url)))
+            if not queue:
+                self.misses += 1
+                logger.warning(f"No recording for {method} {url}")
+                return None
+            self.served += 1
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+
+class Session:
+    """
+    Active record/replay session: the archive, the latency policy and per-stage I/O timers.
+    """
+
+    def __init__(self, mode, archive, latency=0.0, recorded_latency=False):
+        self.mode = mode
+        self.archive = archive
+        self.latency = latency
+        self.recorded_latency = recorded_latency
+        self.stage_time = defaultdict(float)
+        self.stage_calls = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def delay_for(self, ex):
+        return ex["elapsed"] if self.recorded_latency else self.latency
+
+    def track(self, url, seconds):
+        stage = stage_for(url)
+        with self.lock:
+            self.stage_time[stage] += seconds
+            self.stage_calls[stage] += 1
+
+    def response_parts(self, ex):
+        if ex is None: return 404, {}, b""
+        return ex["status"], ex["headers"], base64.b64decode(ex["body"])
+
+
+def _requests_response(request, status, headers, content):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers = CaseInsensitiveDict(headers)
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.raw = io.BytesIO(content)
+    resp._content = content
+    resp._content_consumed = True
+    resp.url = request.url
+    resp.request = request
+    resp.reason = "Replayed"
+    return resp
+
+
+@contextmanager
+def activate(mode, archive, latency=0.0, recorded_latency=False):
+    """
+    Routes every outbound requests/httpx call (HttpClient, AsyncHttpClient, OpenAI, geopy)
+    through the archive for the duration of the block: mode="record" performs the real call
+    and stores it, mode="replay" answers from the archive without touching the network.
+    Yields the Session.
+    """
+    session = Session(mode, archive, latency, recorded_latency)
+    orig_send = HTTPAdapter.send
+    orig_sync = httpx.HTTPTransport.handle_request
+    orig_async = httpx.AsyncHTTPTransport.handle_async_request
+
+    def send(adapter, request, **kwargs):
+        start = time.monotonic()
+        if mode == "record":
+            resp = orig_send(adapter, request, **kwargs)
+            archive.add(request.method, request.url, request.body, resp.status_code, resp.headers, resp.content, time.monotonic() - start)
+        else:
+            ex = archive.match(request.method, request.url, request.body)
+            if ex: time.sleep(session.delay_for(ex))
+            resp = _requests_response(request, *session.response_parts(ex))
+        session.track(request.url, time.monotonic() - start)
+        return resp
+
+    def handle_request(transport, request):
+        start = time.monotonic()
+        if mode == "record":
+            resp = orig_sync(transport, request)
+            content = resp.read()
+            archive.add(request.method, request.url, request.content, resp.status_code, resp.headers, content, time.monotonic() - start)
+            headers = {k: v for k, v in resp.headers.items() if k.lower() not in DROP_HEADERS}
+            resp = httpx.Response(resp.status_code, headers=headers, content=content, request=request)
+        else:
+            ex = archive.match(request.method, request.url, request.content)
+            if ex: time.sleep(session.delay_for(ex))
+            status, headers, content = session.response_parts(ex)
+            resp = httpx.Response(status, headers=headers, content=content, request=request)
+        session.track(request.url, time.monotonic() - start)
+        return resp
+
+    async def handle_async_request(transport, request):
+        start = time.monotonic()
+        if mode == "record":
+            resp = await orig_async(transport, request)
+            content = await resp.aread()
+            archive.add(request.method, request.url, request.content, resp.status_code, resp.headers, content, time.monotonic() - start)
+            headers = {k: v for k, v in resp.headers.items() if k.lower() not in DROP_HEADERS}
+            resp = httpx.Response(resp.status_code, headers=headers, content=content, request=request)
+        else:
+            ex = archive.match(request.method, request.url, request.content)
+            if ex: await asyncio.sleep(session.delay_for(ex))
+            status, headers, content = session.response_parts(ex)
+            resp = httpx.Response(status, headers=headers, content=content, request=request)
+        session.track(request.url, time.monotonic() - start)
+        return resp
+
+    HTTPAdapter.send = send
+    httpx.HTTPTransport.handle_request = handle_request
+    httpx.AsyncHTTPTransport.handle_async_request = handle_async_request
+    try:
+        yield session
+    finally:
+        HTTPAdapter.send = orig_send
+        httpx.HTTPTransport.handle_request = orig_sync
+        httpx.AsyncHTTPTransport.handle_async_request = orig_async
@@ -1,12 +1,25 @@
 import os
 import re
 import json
+import time
+import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from typing import Optional, Dict, List, Any 
+import openai
 from openai import OpenAI
 from urllib.parse import urlparse
 from django.conf import settings
-from jobs.models import BlockRule, Tool 
+from collections import Counter
+from jobs.blocklist import get_blocklist
+from jobs.caches import VerdictCache, content_hash
+from jobs.classifier import PreClassifier
+from jobs.compaction import Compactor
+from jobs.http import retry_after_seconds
+from jobs.keywords import KeywordMatcher
+from jobs.models import BlockRule, ScreeningLabel, Tool 
 
 logger = logging.getLogger("screener")
 
@@ -16,11 +29,87 @@ class MarTechScreener:
     1. Golden Rule: If a Tool Name is in the title, it is APPROVED.
     2. Bypasses "Vendor Trap" if the title mentions a specific tool.
     """
+    TRANSIENT_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)  # APITimeoutError is an APIConnectionError
+    # Bump when the verdict mapping in ask_ai or the snippet compaction changes; prompt/model/target edits are picked up automatically.
+    PROMPT_REVISION = 2
+    # Token budget for the description in each prompt (see jobs.compaction).
+    SNIPPET_TOKENS = 600
+    SYSTEM_PROMPT = "You are a strict job screener. Output only valid JSON."
+    JOB_TEMPLATE = """
+        Act as a "Senior MarTech Recruiter". 
+        
+        JOB CONTEXT:
+        - Title: {title}
+        - Company: {company}
+        - Snippet: {snippet}...
+
+"""
+    RULES_TEMPLATE = """        ✅ VALID TOOLS MENU:
+        [{tools}]
+
+        ⛔ HARD REJECT KEYWORDS:
+        [
+         "Customer Success", "CSM", "Account Manager", "Sales", "SDR", "BDR",
+         "Event", "Social Media", "Content", "Brand", "Community", "PR", "SEO", "Search Engine",
+         "Copywriter", "Creative", "Audit", "Support", "Field Marketing"
+        ]
+
+        YOUR TASKS:
+        1. **Detect Tech Stack:** Identify tools from the VALID TOOLS MENU above.
+
+        2. **Analyze Role (STRICT FILTER):**
+           - **STEP A: GOLDEN RULE:** If ANY tool from the VALID TOOLS MENU appears in the Job Title -> APPROVE (95). 
+             (e.g. "Salesforce Developer", "HubSpot Admin", "Adobe Architect"). This overrides "Engineer" or "Developer" concerns.
+           
+           - **STEP B: The "Marketing" Trap:** If title contains SEO/Social/Brand -> REJECT (0).
+           
+           - **STEP C: The "Good" Signals:**
+             - "Marketing Operations", "MarTech" -> APPROVE (90).
+             - "Solution Architect" (if MarTech related) -> APPROVE (85).
+
+        3. **Scoring:** 0 = Reject, 65 = Pending, 85-100 = Auto-Approve.
 
-    def __init__(self, model: str = "gpt-4o-mini"):
+"""
+    OUTPUT_TEMPLATE = """        Output JSON:
+        {{
+            "decision": "APPROVE" | "REJECT" | "PENDING",
+            "score": 0-100,
+            "reason": "Clear explanation.",
+            "signals": {{ "stack": [], "role_type": "MOPs" }}
+        }}
+        """
+    PROMPT_TEMPLATE = JOB_TEMPLATE + RULES_TEMPLATE + OUTPUT_TEMPLATE
+
+    # Batch mode: the rules and tools menu once, then every posting tagged with its index.
+    BATCH_POSTING_TEMPLATE = """
+        POSTING {id}:
+        - Title: {title}
+        - Company: {company}
+        - Snippet: {snippet}...
+"""
+    BATCH_PROMPT_TEMPLATE = """
+        Act as a "Senior MarTech Recruiter". Screen each of the {count} postings below on its own.
+{postings}
+""" + RULES_TEMPLATE + """        Output JSON with one verdict per posting, using its POSTING number as "id":
+        {{
+            "verdicts": [
+                {{ "id": 0, "decision": "APPROVE" | "REJECT" | "PENDING", "score": 0-100, "reason": "Clear explanation.", "signals": {{ "stack": [], "role_type": "MOPs" }} }}
+            ]
+        }}
+        """
+
+    def __init__(self, model: str = "gpt-4o-mini", max_retries: int = 3, backoff_base: float = 1.0, backoff_cap: float = 30.0, use_classifier: bool = True, use_cache: bool = True, metrics=None):
         self.model = model
         api_key = os.environ.get("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key) if api_key else None
+        # Retries are ours (_with_backoff), not the client's, so they are counted once.
+        self.client = OpenAI(api_key=api_key, max_retries=0) if api_key else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.usage_lock = threading.Lock()
+        self.use_cache = use_cache
+        # Optional jobs.metrics.StageMetrics: times blocklist, quick_kill, keyword_gate, classifier and llm.
+        self.metrics = metrics
         
         self.hunt_roles = []
         self.hunt_tools = []
@@ -45,13 +134,33 @@ class MarTechScreener:
         self.REQUIRED_KEYWORDS = list(set([r.lower() for r in self.hunt_roles + self.hunt_tools]))
         # Ensure we have a clean list of just tools for the prompt and check
         self.tool_list_clean = [t.lower() for t in self.hunt_tools if len(t) > 2]
-        self.tool_menu_str = ", ".join(set(self.hunt_tools))
+        self.tool_menu_str = ", ".join(sorted(set(self.hunt_tools)))
         
         self.VENDOR_COMPANIES = [
             "Braze", "Iterable", "Adobe", "Salesforce", "HubSpot", "Segment", 
             "Tealium", "Klaviyo", "mParticle", "Amplitude", "Mixpanel", 
             "Optimizely", "6sense", "Demandbase", "Drift", "Outreach", "Salesloft"
         ]
+        self.BAD_TITLE_KEYWORDS = ["seo ", "seo&", "event ", "events ", "social media", "community manager", "brand manager", "pr manager", "public relations"]
+        self.VENDOR_BAD_TITLES = ["software engineer", "product manager", "data scientist", "machine learning", "ai scientist", "account executive", "csm", "customer success"]
+
+        # Each list compiled once; a check is then one regex scan of the text.
+        self.required_matcher = KeywordMatcher(self.REQUIRED_KEYWORDS)
+        self.tool_matcher = KeywordMatcher(self.tool_list_clean)
+        self.vendor_matcher = KeywordMatcher(self.VENDOR_COMPANIES)
+        self.bad_title_matcher = KeywordMatcher(self.BAD_TITLE_KEYWORDS)
+        self.vendor_bad_title_matcher = KeywordMatcher(self.VENDOR_BAD_TITLES)
+        self.compactor = Compactor(self.REQUIRED_KEYWORDS, budget=self.SNIPPET_TOKENS)
+
+        self.prompt_version = content_hash(json.dumps([
+            self.PROMPT_REVISION, self.SNIPPET_TOKENS, self.model, self.SYSTEM_PROMPT, self.PROMPT_TEMPLATE, self.BATCH_PROMPT_TEMPLATE, self.BATCH_POSTING_TEMPLATE, sorted(self.hunt_roles), sorted(self.hunt_tools),
+        ]))[:16]
+        self.verdicts = VerdictCache(self.prompt_version, self.compactor.shrink)
+        self.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.blocked = Counter()
+        # Local pre-classifier tier (train_screener); None until a model is trained.
+        self.classifier = PreClassifier.load_active() if use_classifier else None
+        self.tiers = Counter()
 
     def _normalize(self, text: str) -> str:
         return (text or "").strip().lower()
@@ -61,98 +170,178 @@ class MarTechScreener:
         c_low = company.lower()
 
         # 1. SEO/Event/Social Trap (Still keep this to filter noise)
-        bad_keywords = ["seo ", "seo&", "event ", "events ", "social media", "community manager", "brand manager", "pr manager", "public relations"]
-        if any(bad in t_low for bad in bad_keywords):
+        if self.bad_title_matcher.search(t_low):
             if "operations" not in t_low and "technology" not in t_low:
-                return {"status": "rejected", "score": 0.0, "reason": "Hard Reject: Non-Technical Role (SEO/Event/Social)", "details": {}}
+                return {"status": "rejected", "score": 0.0, "reason": "Hard Reject: Non-Technical Role (SEO/Event/Social)", "details": {"stage": "quick_kill"}}
 
         # 2. Vendor Trap (Working AT Salesforce/Adobe)
-        is_vendor = any(v.lower() in c_low for v in self.VENDOR_COMPANIES)
+        is_vendor = self.vendor_matcher.search(c_low)
         if is_vendor:
             # SAFETY BYPASS: If the title explicitly names a tool (e.g. "Salesforce Developer"), ALLOW IT.
-            has_tool_in_title = any(tool in t_low for tool in self.tool_list_clean)
+            has_tool_in_title = self.tool_matcher.search(t_low)
             
             if not has_tool_in_title:
                 # Only reject if it's a generic product role AND doesn't mention a tool
-                vendor_bad_titles = ["software engineer", "product manager", "data scientist", "machine learning", "ai scientist", "account executive", "csm", "customer success"]
-                if any(bt in t_low for bt in vendor_bad_titles):
+                if self.vendor_bad_title_matcher.search(t_low):
                     if "marketing" not in t_low and "martech" not in t_low:
-                        return {"status": "rejected", "score": 0.0, "reason": f"Vendor Trap: {title} at {company} is a product role (no tool mentioned).", "details": {}}
+                        return {"status": "rejected", "score": 0.0, "reason": f"Vendor Trap: {title} at {company} is a product role (no tool mentioned).", "details": {"stage": "quick_kill"}}
 
         return None
 
-    def screen(self, title: str, company: str, location: str, description: str, apply_url: str) -> dict:
-        quick_reject = self._quick_kill(title, company)
+    def _pre_screen(self, title, company, description, apply_url=""):
+        """
+        The checks that need no LLM call: BlockRules, quick kill, keyword gate, cached
+        verdict. Returns a result, or None when the posting has to go to the model.
+        """
+        with self._stage("blocklist"):
+            rule = get_blocklist().match(title, company, description, apply_url)
+        if rule:
+            self.blocked[str(rule)] += 1
+            return {"status": "rejected", "score": 0.0, "reason": f"Blocked by rule ({rule})", "details": {"stage": "blocklist", "rule_id": rule.pk}}
+
+        with self._stage("quick_kill"):
+            quick_reject = self._quick_kill(title, company)
         if quick_reject:
             return quick_reject
 
-        full_text = self._normalize(f"{title} {description}")
-        
-        has_keyword = any(kw in full_text for kw in self.REQUIRED_KEYWORDS)
+        with self._stage("keyword_gate"):
+            has_keyword = self.required_matcher.search(self._normalize(f"{title} {description}"))
         if not has_keyword:
             return {"status": "rejected", "score": 0.0, "reason": "Stage 1: No hunt_targets keyword found.", "details": {"stage": "fast_fail"}}
         
+        cached = self.verdicts.get(title, company, description) if self.use_cache else None
+        if cached:
+            return {"status": cached["status"], "score": cached["score"], "reason": cached["reason"], "details": {"stage": "cached", "signals": cached["signals"]}}
+
+        if self.classifier:
+            with self._stage("classifier"):
+                probability = self.classifier.predict(title, company, description)
+            tier = self.classifier.tier(probability)
+            self.tiers[tier or "escalated"] += 1
+            if tier:
+                stack = sorted({kw for _, kw in self.tool_matcher.find_all(f"{title} {description}")})
+                score = max(85.0, round(100 * probability, 1)) if tier == "approved" else 0.0
+                # A local approval goes live only once reviewed; its rejections stand.
+                status = "pending" if tier == "approved" else tier
+                return {"status": status, "score": score, "reason": f"Pre-classifier: P(approved) = {probability:.2f}", "details": {"stage": "classifier", "probability": probability, "signals": {"stack": stack}}}
+
         if not self.client:
             return {"status": "pending", "score": 50.0, "reason": "OPENAI_API_KEY missing.", "details": {"stage": "api_missing"}}
+        return None
 
+    def _stage(self, name):
+        return self.metrics.stage(name) if self.metrics else nullcontext()
+
+    def block_summary(self):
+        """
+        Postings rejected by BlockRules during this run (stores the rule hit counts).
+        """
+        get_blocklist().flush_hits()
+        if not self.blocked: return "no postings blocked"
+        return f"{sum(self.blocked.values())} postings blocked: " + ", ".join(f"{rule} ×{n}" for rule, n in self.blocked.most_common())
+
+    def classifier_summary(self):
+        if not self.classifier: return "no trained model (run train_screener)"
+        return f"{self.tiers['approved']} likely approvals held for review, {self.tiers['rejected']} rejected locally, {self.tiers['escalated']} escalated to the LLM"
+
+    def _remember(self, title, company, description, result):
+        if result["details"].get("stage") in ("gpt_analysis", "gpt_batch"):
+            if self.use_cache: self.verdicts.set(title, company, description, result["status"], result["score"], result["reason"], result["details"]["signals"])
+            ScreeningLabel.record(title, company, description, result["status"])
+        return result
+
+    def screen(self, title: str, company: str, location: str, description: str, apply_url: str) -> dict:
+        early = self._pre_screen(title, company, description, apply_url)
+        if early:
+            return early
+
+        return self._ask(title, company, location, description)
+
+    def _ask(self, title, company, location, description):
+        return self._remember(title, company, description, self._ask_llm(title, company, location, description))
+
+    def _ask_llm(self, title, company, location, description):
+        # LLM only (no database access), so it can run on worker threads.
         try:
-            return self.ask_ai(title, company, description, location)
+            with self._stage("llm"):
+                return self._with_backoff(self.ask_ai, title, company, description, location)
         except Exception as e:
             logger.error(f"AI Crash: {e}")
             return {"status": "pending", "score": 25.0, "reason": f"AI Crash: {e}", "details": {"stage": "api_error"}}
 
-    def ask_ai(self, title, company, description, location):
-        prompt = f"""
-        Act as a "Senior MarTech Recruiter". 
-        
-        JOB CONTEXT:
-        - Title: {title}
-        - Company: {company}
-        - Snippet: {description[:3000]}...
-
-        ✅ VALID TOOLS MENU:
-        [{self.tool_menu_str}]
+    def _with_backoff(self, fn, *args):
+        """
+        Calls fn, retrying rate limits, timeouts, connection errors and 5xx with full-jitter
+        exponential backoff (honouring Retry-After, capped at MAX_RETRY_AFTER, when the API sends one).
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return fn(*args)
+            except self.TRANSIENT_ERRORS as e:
+                if attempt >= self.max_retries: raise
+                delay = retry_after_seconds(getattr(getattr(e, "response", None), "headers", {}).get("retry-after"))
+                if delay is None: delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                logger.warning(f"Transient AI error ({type(e).__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
 
-        ⛔ HARD REJECT KEYWORDS:
-        [
-         "Customer Success", "CSM", "Account Manager", "Sales", "SDR", "BDR",
-         "Event", "Social Media", "Content", "Brand", "Community", "PR", "SEO", "Search Engine",
-         "Copywriter", "Creative", "Audit", "Support", "Field Marketing"
-        ]
+    def screen_batch(self, postings: List[Dict[str, Any]], batch_size: int = 8) -> List[dict]:
+        """
+        Screens postings one batched prompt at a time (see screen_many).
+        """
+        return self.screen_many(postings, workers=1, batch_size=batch_size)
 
-        YOUR TASKS:
-        1. **Detect Tech Stack:** Identify tools from the VALID TOOLS MENU above.
+    def screen_many(self, postings: List[Dict[str, Any]], workers: int = 4, batch_size: int = 1) -> List[dict]:
+        """
+        Screens a list of postings (dicts with title, company, location, description,
+        apply_url) and returns their results in the same order.
 
-        2. **Analyze Role (STRICT FILTER):**
-           - **STEP A: GOLDEN RULE:** If ANY tool from the VALID TOOLS MENU appears in the Job Title -> APPROVE (95). 
-             (e.g. "Salesforce Developer", "HubSpot Admin", "Adobe Architect"). This overrides "Engineer" or "Developer" concerns.
-           
-           - **STEP B: The "Marketing" Trap:** If title contains SEO/Social/Brand -> REJECT (0).
-           
-           - **STEP C: The "Good" Signals:**
-             - "Marketing Operations", "MarTech" -> APPROVE (90).
-             - "Solution Architect" (if MarTech related) -> APPROVE (85).
+        Quick kills, keyword misses and cached verdicts are answered inline; the rest go
+        to the LLM on a pool of `workers` threads. With batch_size > 1 they are sent
+        batch_size per request, so the rules and tools menu are paid once per batch, and
+        any posting whose batched verdict is missing or malformed is retried on its own.
+        Verdicts are written to the cache (and as training labels) on the calling thread.
+        """
+        results = [None] * len(postings)
+        pending = []
+        for i, p in enumerate(postings):
+            results[i] = self._pre_screen(p.get("title") or "", p.get("company") or "", p.get("description") or "", p.get("apply_url") or "")
+            if results[i] is None: pending.append(i)
+        if not pending: return results
 
-        3. **Scoring:** 0 = Reject, 65 = Pending, 85-100 = Auto-Approve.
+        chunks = [pending[start:start + batch_size] for start in range(0, len(pending), max(1, batch_size))]
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+            for chunk, verdicts in zip(chunks, pool.map(lambda chunk: self._screen_chunk([postings[i] for i in chunk]), chunks)):
+                for i, result in zip(chunk, verdicts):
+                    p = postings[i]
+                    results[i] = self._remember(p.get("title") or "", p.get("company") or "", p.get("description") or "", result)
+        return results
 
-        Output JSON:
-        {{
-            "decision": "APPROVE" | "REJECT" | "PENDING",
-            "score": 0-100,
-            "reason": "Clear explanation.",
-            "signals": {{ "stack": [], "role_type": "MOPs" }}
-        }}
-        """
+    def _screen_chunk(self, postings):
+        verdicts = {}
+        if len(postings) > 1:
+            try:
+                with self._stage("llm_batch"):
+                    verdicts = self._with_backoff(self.ask_ai_batch, postings)
+            except Exception as e:
+                logger.error(f"AI Batch Crash: {e}")
+        return [verdicts.get(n) or self._ask_llm(p.get("title") or "", p.get("company") or "", p.get("location"), p.get("description") or "")
+                for n, p in enumerate(postings)]
 
+    def _complete(self, prompt):
         completion = self.client.chat.completions.create(
             model=self.model,
             messages=[
-                {"role": "system", "content": "You are a strict job screener. Output only valid JSON."},
+                {"role": "system", "content": self.SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             response_format={"type": "json_object"},
             temperature=0
         )
+        usage = getattr(completion, "usage", None)
+        with self.usage_lock:
+            self.usage["requests"] += 1
+            self.usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self.usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
 
         content = completion.choices[0].message.content.strip()
         
@@ -160,12 +349,44 @@ class MarTechScreener:
             content = content[7:]
         if content.endswith("```"):
             content = content[:-3]
+        return content.strip()
+
+    def ask_ai(self, title, company, description, location):
+        prompt = self.PROMPT_TEMPLATE.format(title=title, company=company, snippet=self.compactor.compact(description), tools=self.tool_menu_str)
+        content = self._complete(prompt)
 
         try:
-            result = json.loads(content.strip())
+            result = json.loads(content)
         except json.JSONDecodeError:
             return {"status": "pending", "score": 50.0, "reason": "AI JSON Error", "details": {"raw": content}}
-        
+        return self._verdict(result, content, "gpt_analysis")
+
+    def ask_ai_batch(self, postings):
+        """
+        One completion for several postings. Returns {index: result} for the verdicts
+        that parsed; missing or malformed ones are left out for the caller to retry.
+        """
+        blocks = "".join(self.BATCH_POSTING_TEMPLATE.format(
+            id=n, title=p.get("title") or "", company=p.get("company") or "", snippet=self.compactor.compact(p.get("description") or ""),
+        ) for n, p in enumerate(postings))
+        content = self._complete(self.BATCH_PROMPT_TEMPLATE.format(count=len(postings), postings=blocks, tools=self.tool_menu_str))
+
+        try:
+            items = json.loads(content).get("verdicts", [])
+        except (json.JSONDecodeError, AttributeError):
+            logger.warning("AI Batch JSON Error, falling back to single calls.")
+            return {}
+        verdicts = {}
+        for item in items if isinstance(items, list) else []:
+            try:
+                n = int(item["id"])
+                if 0 <= n < len(postings) and item.get("decision"):
+                    verdicts[n] = self._verdict(item, json.dumps(item), "gpt_batch")
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+        return verdicts
+
+    def _verdict(self, result, content, stage):
         signals = result.get("signals", {})
         stack = signals.get("stack", [])
         
@@ -194,5 +415,5 @@ class MarTechScreener:
             "status": final_status,
             "score": score,
             "reason": str(result.get("reason", "AI analysis complete.")),
-            "details": {"stage": "gpt_analysis", "signals": result.get("signals", {}), "raw_response": content}
+            "details": {"stage": stage, "signals": result.get("signals", {}), "raw_response": content}
         }
@@ -1,3 +1,334 @@
+import io
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+import requests
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.utils import timezone
+from requests.structures import CaseInsensitiveDict
+
+from jobs.boards import BoardRegistry, tracked_board_keys
+from jobs.caches import ConditionalCache, VerdictCache
+from jobs.compaction import Compactor, estimate_tokens
+from jobs.dedupe import DedupeIndex
+from jobs.extract import job_posting_ld, main_text
+from jobs.fakellm import serve
+from jobs.management.commands import fetch_jobs, test_screener
+from jobs.metrics import StageMetrics
+from jobs.models import AtsBoard, ScreeningLabel
+from jobs.screener import MarTechScreener
+
+FIXTURES = Path(__file__).resolve().parent / "test_fixtures"
+
+
+def fixture(name):
+    return (FIXTURES / name).read_bytes()
+
+
+class RecordedHttp:
+    """
+    Stands in for HttpClient: answers each URL with a recorded body (404 for anything else).
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        resp = requests.Response()
+        resp.url, resp.encoding = url, "utf-8"
+        resp.status_code = 200 if url in self.routes else 404
+        resp.raw = io.BytesIO(fixture(self.routes[url]) if url in self.routes else b"")
+        resp.headers = CaseInsensitiveDict()
+        return resp
+
+    def get(self, url, **kwargs): return self.request("GET", url, **kwargs)
+    def post(self, url, **kwargs): return self.request("POST", url, **kwargs)
+
+
+class AdapterFixtureTests(TestCase):
+    """
+    Recorded board listings and posting pages run through the fetch_jobs adapters;
+    the jobs they would hand to the screener are captured instead of screened.
+    """
+
+    def command(self, routes, cutoff=None):
+        cmd = fetch_jobs.Command(stdout=io.StringIO())
+        cmd.http = RecordedHttp(routes)
+        cmd.serial = True
+        cmd.metrics = StageMetrics("test")
+        cmd.board_cache, cmd.page_cache = ConditionalCache(), ConditionalCache()
+        # Nothing stored yet: no duplicates, and board diffs close nothing.
+        cmd.dedupe = DedupeIndex()
+        cmd.registry = mock.Mock(close_unlisted=mock.Mock(return_value=0))
+        cmd.geocoder = mock.Mock(resolve=lambda loc: loc)
+        cmd.writer = mock.Mock()
+        cmd.prefetched, cmd.board_outcomes, cmd.processed_tokens = {}, {}, set()
+        cmd.total_closed = 0
+        cmd.cutoff_date = cutoff or timezone.now() - timedelta(days=14)
+        cmd.screened = []
+        cmd.screen_and_upsert_many = cmd.screened.extend
+        cmd.screen_and_upsert = cmd.screened.append
+        return cmd
+
+    def test_workday_board(self):
+        detail = "https://acme.wd5.myworkdayjobs.com/wday/cxs/acme/External/job/"
+        cmd = self.command({
+            "https://acme.wd5.myworkdayjobs.com/wday/cxs/acme/External/jobs": "workday_jobs.json",
+            detail + "New-York-NY/Marketing-Operations-Manager_R1042": "workday_detail_R1042.json",
+            detail + "Remote-USA/Marketo-Administrator_R1051": "workday_detail_R1051.json",
+        })
+        cmd.fetch_workday_api("acme.wd5.myworkdayjobs.com/External")
+
+        # The 30+ day old posting is past the cutoff and never screened.
+        self.assertEqual([(j["title"], j["company"], j["location"], j["apply_url"]) for j in cmd.screened], [
+            ("Marketing Operations Manager", "Acme", "New York, NY",
+             "https://acme.wd5.myworkdayjobs.com/External/job/New-York-NY/Marketing-Operations-Manager_R1042"),
+            ("Marketo Administrator", "Acme", "Remote - USA",
+             "https://acme.wd5.myworkdayjobs.com/External/job/Remote-USA/Marketo-Administrator_R1051"),
+        ])
+        self.assertIn("Marketo", cmd.screened[0]["description"])
+        self.assertEqual([j["work_arrangement"] for j in cmd.screened], ["onsite", "remote"])
+        self.assertEqual(cmd.board_outcomes[("workday", "acme.wd5.myworkdayjobs.com/External")], "changed")
+        self.assertIn("acme.wd5.myworkdayjobs.com/External", cmd.processed_tokens)
+        # All three listed postings count as still open, stale or not.
+        self.assertEqual(len(cmd.registry.close_unlisted.call_args.args[2]), 3)
+
+    def test_bamboohr_board(self):
+        cmd = self.command({
+            "https://beta.bamboohr.com/careers/list": "bamboohr_list.json",
+            "https://beta.bamboohr.com/careers/57/detail": "bamboohr_detail_57.json",
+            "https://beta.bamboohr.com/careers/61/detail": "bamboohr_detail_61.json",
+        })
+        cmd.fetch_bamboohr_api("beta")
+
+        self.assertEqual([(j["title"], j["company"], j["location"], j["apply_url"]) for j in cmd.screened], [
+            ("Marketing Automation Specialist", "Beta", "Austin, Texas, United States", "https://beta.bamboohr.com/careers/57"),
+            ("HubSpot Administrator", "Beta", "Remote", "https://beta.bamboohr.com/careers/61"),
+        ])
+        self.assertEqual(cmd.screened[1]["description"], "<p>Own the HubSpot portal.</p>")
+        self.assertEqual(cmd.screened[1]["work_arrangement"], "remote")
+
+    def test_icims_posting_from_iframe_page(self):
+        url = "https://careers-gamma.icims.com/jobs/4821/marketo-architect/job"
+        cmd = self.command({url: "icims_job.html", f"{url}?in_iframe=1": "icims_job_iframe.html"},
+                           cutoff=timezone.make_aware(datetime(2025, 3, 1)))
+        cmd.fetch_jsonld_posting(url, "iCIMS")
+
+        self.assertEqual(len(cmd.screened), 1)
+        job = cmd.screened[0]
+        self.assertEqual((job["title"], job["company"], job["location"], job["apply_url"]), ("Marketo Architect", "Gamma Health", "Boston, MA, US", url))
+        self.assertEqual(job["description"], "<p>Design our Marketo &amp; Salesforce integration.</p>")
+        self.assertEqual(job["source"], "iCIMS")
+
+    def test_jobvite_posting(self):
+        url = "https://jobs.jobvite.com/delta/job/oQ1xyz"
+        cmd = self.command({url: "jobvite_job.html"}, cutoff=timezone.make_aware(datetime(2025, 3, 1)))
+        cmd.fetch_jsonld_posting(url, "Jobvite")
+
+        job = cmd.screened[0]
+        self.assertEqual((job["title"], job["company"], job["location"], job["apply_url"]), ("Lifecycle Marketing Manager", "Delta Apps", "US", url))
+        self.assertEqual(job["work_arrangement"], "remote")
+        self.assertEqual(cmd.http.calls, [("GET", url)])
+
+    def test_stale_posting_is_skipped(self):
+        url = "https://jobs.jobvite.com/delta/job/oQ1xyz"
+        cmd = self.command({url: "jobvite_job.html"})
+        cmd.fetch_jsonld_posting(url, "Jobvite")
+        self.assertEqual(cmd.screened, [])
+
+    def test_job_posting_ld(self):
+        self.assertEqual(job_posting_ld(fixture("icims_job_iframe.html").decode())["title"], "Marketo Architect")
+        self.assertEqual(job_posting_ld(fixture("jobvite_job.html").decode())["hiringOrganization"]["name"], "Delta Apps")
+        self.assertIsNone(job_posting_ld(fixture("icims_job.html").decode()))
+        self.assertIsNone(job_posting_ld('<script type="application/ld+json">{not json</script>'))
+
+
+class MatchBoardTests(TestCase):
+    def match(self, url):
+        cmd = fetch_jobs.Command(stdout=io.StringIO())
+        return cmd._match_board(cmd._clean_url(url))
+
+    def test_workday(self):
+        self.assertEqual(self.match("https://acme.wd5.myworkdayjobs.com/External/job/New-York-NY/Marketing-Operations-Manager_R1042"),
+                         ("workday", "acme.wd5.myworkdayjobs.com/External"))
+        # The locale segment is not part of the site; /apply is stripped first.
+        self.assertEqual(self.match("https://acme.wd5.myworkdayjobs.com/en-US/External/job/Remote-USA/Marketo-Administrator_R1051/apply"),
+                         ("workday", "acme.wd5.myworkdayjobs.com/External"))
+        self.assertIsNone(self.match("https://acme.wd5.myworkdayjobs.com/External"))
+
+    def test_bamboohr(self):
+        self.assertEqual(self.match("https://beta.bamboohr.com/careers/57"), ("bamboohr", "beta"))
+        self.assertEqual(self.match("https://beta.bamboohr.com/jobs/view.php?id=57"), ("bamboohr", "beta"))
+        # BambooHR's own site and pages that aren't a company's careers listing.
+        self.assertIsNone(self.match("https://www.bamboohr.com/careers/"))
+        self.assertIsNone(self.match("https://www.bamboohr.com/hr-glossary/applicant-tracking-system"))
+        self.assertIsNone(self.match("https://marketplace.bamboohr.com/careers/greenhouse"))
+        self.assertIsNone(self.match("https://beta.bamboohr.com/login"))
+
+    def test_other_boards(self):
+        self.assertEqual(self.match("https://job-boards.greenhouse.io/acme/jobs/123?gh_src=x"), ("greenhouse", "acme"))
+        self.assertEqual(self.match("https://jobs.lever.co/acme/0b1c-22/apply"), ("lever", "acme"))
+        self.assertEqual(self.match("https://jobs.ashbyhq.com/acme/9f0e"), ("ashby", "acme"))
+        self.assertEqual(self.match("https://jobs.smartrecruiters.com/Acme/7432"), ("smartrecruiters", "Acme"))
+
+    def test_no_board(self):
+        self.assertIsNone(self.match("https://careers-gamma.icims.com/jobs/4821/marketo-architect/job"))
+        self.assertIsNone(self.match("https://www.example.com/careers/marketing-ops"))
+
+
+class BoardRegistryTests(TestCase):
+    def test_board_deactivated_after_consecutive_unavailable_polls(self):
+        registry = BoardRegistry().load()
+        board = registry.discover("greenhouse", "gone")
+        for _ in range(AtsBoard.MAX_FAILED_POLLS - 1):
+            registry.record_poll("greenhouse", "gone", changed=False, available=False)
+        # A good poll in between starts the count over.
+        registry.record_poll("greenhouse", "gone", changed=False)
+        for _ in range(AtsBoard.MAX_FAILED_POLLS - 1):
+            registry.record_poll("greenhouse", "gone", changed=False, available=False)
+        board.refresh_from_db()
+        self.assertTrue(board.is_active)
+        self.assertEqual(board.failed_polls, AtsBoard.MAX_FAILED_POLLS - 1)
+
+        registry.record_poll("greenhouse", "gone", changed=False, available=False)
+        board.refresh_from_db()
+        self.assertFalse(board.is_active)
+        self.assertNotIn(("greenhouse", "gone"), BoardRegistry().load().due_boards())
+        self.assertFalse(BoardRegistry().load().is_due("greenhouse", "gone"))
+
+    def test_failing_boards_are_left_to_dead_link_probes(self):
+        registry = BoardRegistry().load()
+        registry.discover("lever", "healthy")
+        registry.discover("lever", "failing")
+        registry.record_poll("lever", "healthy", changed=True)
+        registry.record_poll("lever", "failing", changed=False, available=False)
+        self.assertEqual(tracked_board_keys(), {("Lever", "Healthy")})
+        registry.record_poll("lever", "failing", changed=True)
+        self.assertEqual(tracked_board_keys(), {("Lever", "Healthy"), ("Lever", "Failing")})
+
+
+class VerdictCacheKeyTests(TestCase):
+    def test_key_follows_the_compacted_snippet(self):
+        cache = VerdictCache("v1", Compactor(["marketo"], budget=600).shrink)
+        body = "<h3>The role</h3><p>Run Marketo programs.</p>"
+        # Boilerplate the prompt never carries doesn't change the key...
+        self.assertEqual(cache.make_key("MOps", "Acme", body),
+                         cache.make_key("MOps", "Acme", body + "<h3>Benefits</h3><p>Dental, vision and a 401(k).</p>"))
+        # ...text it does carry does, even past the first 3,000 characters.
+        padded = body + "<p>" + "Own lead scoring. " * 200 + "</p>"
+        self.assertNotEqual(cache.make_key("MOps", "Acme", padded), cache.make_key("MOps", "Acme", padded + "<p>Migrate to HubSpot.</p>"))
+
+
+class ScreeningLabelTests(TestCase):
+    def test_review_decision_replaces_llm_label(self):
+        ScreeningLabel.record("Marketo Admin", "Acme", "<p>Run Marketo.</p>", "rejected")
+        ScreeningLabel.record("marketo admin ", "ACME", "<p>Run  Marketo.</p>", "approved", source="review")
+        ScreeningLabel.record("Marketo Admin", "Acme", "<p>Run Marketo.</p>", "rejected")
+        ScreeningLabel.record("Marketo Admin", "Acme", "<p>Run Marketo.</p>", "pending")
+        self.assertEqual(list(ScreeningLabel.objects.values_list("status", "source")), [("approved", "review")])
+
+
+class PageCompactionTests(TestCase):
+    PAGE = ("<main><h1>Marketing Operations Manager</h1><dl><dt>Location:</dt><dd>Boston, MA</dd></dl>"
+            "<h2>About us</h2><p>Acme Robotics builds warehouse robots.</p><h2>The role</h2><p>Own our Marketo instance.</p>"
+            + "".join(f"<p>Partner with finance on forecast {i}.</p>" for i in range(200))
+            + "<p>Company: Acme Robotics Inc.</p></main>")
+
+    def test_scraped_page_keeps_header_and_labels(self):
+        text = main_text(self.PAGE, limit=16000, lines=True)
+        compacted = Compactor(["marketo"], budget=300, lead=6, keep_header=True).compact(text)
+        for fact in ("Marketing Operations Manager", "Location: Boston, MA", "Acme Robotics builds warehouse robots.", "Company: Acme Robotics Inc.", "Own our Marketo instance."):
+            self.assertIn(fact, compacted)
+        self.assertLessEqual(estimate_tokens(compacted), 300)
+
+    def test_description_still_drops_about_us(self):
+        self.assertEqual(Compactor(["marketo"]).sentences("<h3>About us</h3><p>Acme builds robots.</p><h3>Role</h3><p>Own Marketo.</p>"), ["Own Marketo."])
+
+
+class ScreenerLLMTests(TestCase):
+    """
+    The screener's LLM paths against jobs.fakellm served over HTTP, as fake_llm_server runs it.
+    """
+    POSTINGS = [
+        ("Braze Engineer", "<p>Build Braze canvases.</p>", "approved"),
+        ("Marketing Operations Manager", "<p>Run our Marketo instance.</p>", "approved"),
+        ("Brand Analyst", "<p>Report on Marketo campaigns.</p>", "rejected"),
+        ("Data Analyst", "<p>Marketo reporting for the sales team.</p>", "pending"),
+        ("MarTech Lead", "<p>Own the Braze and Marketo stack.</p>", "approved"),
+    ]
+
+    def screener(self, **options):
+        server = serve(**options)
+        self.addCleanup(server.shutdown)
+        env = mock.patch.dict(os.environ, {"OPENAI_API_KEY": "fake", "OPENAI_BASE_URL": server.base_url})
+        env.start()
+        self.addCleanup(env.stop)
+        return MarTechScreener(use_classifier=False, use_cache=False, backoff_base=0.0), server.llm
+
+    def postings(self):
+        return [{"title": t, "company": f"Co{n}", "location": "Remote", "description": d, "apply_url": f"https://x.test/{n}"}
+                for n, (t, d, _) in enumerate(self.POSTINGS)]
+
+    def test_batch_keeps_order_and_retries_dropped_postings_alone(self):
+        screener, llm = self.screener(drop_every=2)
+        results = screener.screen_many(self.postings(), workers=1, batch_size=5)
+
+        self.assertEqual([r["status"] for r in results], [s for *_, s in self.POSTINGS])
+        # Postings 1 and 3 were left out of the batched answer and asked on their own.
+        self.assertEqual([r["details"]["stage"] for r in results], ["gpt_batch", "gpt_analysis", "gpt_batch", "gpt_analysis", "gpt_batch"])
+        self.assertEqual(llm.requests, 3)
+
+    def test_every_posting_dropped_from_the_batch(self):
+        screener, llm = self.screener(drop_every=1)
+        results = screener.screen_many(self.postings(), workers=2, batch_size=2)
+        self.assertEqual([r["status"] for r in results], [s for *_, s in self.POSTINGS])
+        self.assertEqual({r["details"]["stage"] for r in results}, {"gpt_analysis"})
+
+    def test_failed_batch_falls_back_to_single_calls(self):
+        screener, llm = self.screener()
+        with mock.patch.object(screener, "ask_ai_batch", side_effect=ValueError("not JSON")):
+            results = screener.screen_many(self.postings(), workers=2, batch_size=3)
+        self.assertEqual([r["status"] for r in results], [s for *_, s in self.POSTINGS])
+        self.assertEqual([r["details"]["stage"] for r in results], ["gpt_analysis"] * len(self.POSTINGS))
+        self.assertEqual(llm.requests, len(self.POSTINGS))
+
+    def test_rate_limit_is_retried_after_retry_after(self):
+        screener, llm = self.screener(throttle=2, retry_after=7)
+        with mock.patch("jobs.screener.time.sleep") as sleep:
+            results = screener.screen_many(self.postings()[:1], workers=1)
+        self.assertEqual(results[0]["status"], "approved")
+        self.assertEqual(results[0]["details"]["stage"], "gpt_analysis")
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [7, 7])
+        self.assertEqual((llm.throttled, llm.requests), (2, 1))
+
+    def test_rate_limit_past_max_retries_leaves_posting_pending(self):
+        screener, llm = self.screener(throttle=100, retry_after=1)
+        with mock.patch("jobs.screener.time.sleep") as sleep:
+            results = screener.screen_many(self.postings()[:1], workers=1)
+        self.assertEqual(results[0]["status"], "pending")
+        self.assertEqual(results[0]["details"]["stage"], "api_error")
+        self.assertEqual(sleep.call_count, screener.max_retries)
+        self.assertEqual((llm.throttled, llm.requests), (screener.max_retries + 1, 0))
+
+
+class TestScreenerCorpusTests(TestCase):
+    def label(self, title, status, source="llm"):
+        ScreeningLabel.record(title, "Acme", f"<p>{title}</p>", status, source=source)
+
+    def test_review_labels_come_first(self):
+        self.label("Marketo Admin", "approved", source="review")
+        self.label("SEO Writer", "rejected")
+        self.label("Brand Manager", "rejected", source="review")
+        corpus = test_screener.Command().labelled_jobs(limit=2)
+        self.assertEqual({(r["title"], r["source"], r["label"]) for r in corpus}, {("Marketo Admin", "review", "approved"), ("Brand Manager", "review", "rejected")})
 
-# Create your tests here.
+    def test_refuses_a_corpus_without_rejections(self):
+        for n in range(3): self.label(f"Marketo Admin {n}", "approved")
+        with self.assertRaisesMessage(CommandError, "rejected labels"):
+            call_command("test_screener", "--min-per-class", "1", "--llm", "live", stdout=io.StringIO())
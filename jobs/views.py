@@ -16,7 +16,8 @@ from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.core.mail import EmailMultiAlternatives
 
-from .models import Job, Tool, Category, Subscriber, BlogPost
+from .blocklist import get_blocklist
+from .models import Job, Tool, Category, Subscriber, BlogPost, ScreeningLabel
 from .forms import JobPostForm, ContactForm
 from .emails import send_job_alert, send_welcome_email, send_admin_new_subscriber_alert
 
@@ -244,7 +245,17 @@ def post_job(request):
             plan = form.cleaned_data.get('plan')
             job.plan_name = plan
             job.is_featured = False; job.is_pinned = False; job.screening_status = 'pending'; job.is_active = False 
-            job.tags = f"User Submission: {plan}"; job.save(); form.save_m2m()
+            job.tags = f"User Submission: {plan}"
+            # BlockRules apply to submissions too: the row stays pending (fetch_jobs purges 'rejected')
+            # with score 0, so it's out of the main queue but under User Submissions for review.
+            blocked = get_blocklist().match(job.title, job.company, job.description, job.apply_url)
+            if blocked:
+                job.screening_score = 0.0; job.screening_reason = f"Blocked by rule ({blocked})"
+                get_blocklist().flush_hits()
+            job.save(); form.save_m2m()
+            if blocked:
+                messages.error(request, "⚠️ Your job post was not accepted: it matched our spam filters. If you think this is a mistake, please contact us.")
+                return redirect('post_job')
             
             new_tools_text = form.cleaned_data.get('new_tools')
             if new_tools_text:
@@ -326,6 +337,7 @@ def review_action(request, job_id, action):
             cache.delete('popular_tech_stacks_v2'); cache.delete('available_countries_v2'); send_job_alert(job)
     elif action == "reject": job.screening_status = "rejected"; job.is_active = False; job.save()
     elif action == "pending": job.screening_status = "pending"; job.save()
+    ScreeningLabel.record(job.title, job.company, job.description, job.screening_status, source="review")
     return redirect(request.META.get("HTTP_REFERER", "review_queue"))
 
 def about(request): return render(request, 'jobs/about.html')
@@ -0,0 +1,40 @@
+from contextlib import nullcontext
+
+from django.db import transaction
+
+from jobs.models import Job
+
+
+class JobWriter:
+    """
+    Buffers screened postings and persists them in batches: one bulk_create for the
+    jobs and one for the Job-Tool through table, inside a transaction per batch.
+    Rows get the same normalization as Job.save() via Job.normalize_fields().
+    With a StageMetrics, every flush is timed as the "persist" stage.
+    """
+
+    def __init__(self, batch_size=50, metrics=None):
+        self.batch_size = max(1, batch_size)
+        self.buffer = []
+        self.written = 0
+        self.metrics = metrics
+
+    def add(self, job, tools=()):
+        self.buffer.append((job, list(tools)))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer: return []
+        batch, self.buffer = self.buffer, []
+        with self.metrics.stage("persist") if self.metrics else nullcontext():
+            for job, _ in batch:
+                job.normalize_fields()
+
+            Through = Job.tools.through
+            with transaction.atomic():
+                created = Job.objects.bulk_create([job for job, _ in batch])
+                links = {(job.pk, tool.pk) for job, tools in batch for tool in tools}
+                Through.objects.bulk_create([Through(job_id=job_id, tool_id=tool_id) for job_id, tool_id in links])
+        self.written += len(created)
+        return created